@@ -1,7 +1,7 @@
 #!/bin/bash
 
-# Build the Docker image
-docker build -t gcp-script .
+# Build the Docker image from GCP/ so ../verification_proof is in the context
+docker build -f Dockerfile -t gcp-script ..
 
 # Tag the image for GCP Container Registry
 docker tag gcp-script gcr.io/$(gcloud config get-value project)/gcp-script
@@ -0,0 +1,111 @@
+//! In-memory registry of signer public keys.
+//!
+//! Keys are loaded from `keys/public_keys.json` once and indexed by signer
+//! name. A background task reloads the file when its mtime changes, keeping
+//! the last good copy if the new contents fail to parse, and `KeyManager` can
+//! push updates over HTTP so new signers need no restart.
+
+use log::{error, info, warn};
+use std::collections::HashMap;
+use std::fs;
+use std::io;
+use std::path::PathBuf;
+use std::sync::{Arc, RwLock};
+use std::time::SystemTime;
+
+struct RegistryState {
+    keys: Arc<HashMap<String, String>>,
+    modified: Option<SystemTime>,
+}
+
+pub struct KeyRegistry {
+    path: PathBuf,
+    state: RwLock<RegistryState>,
+}
+
+impl KeyRegistry {
+    pub fn load(path: PathBuf) -> Self {
+        let registry = KeyRegistry {
+            path,
+            state: RwLock::new(RegistryState {
+                keys: Arc::new(HashMap::new()),
+                modified: None,
+            }),
+        };
+        registry.reload_if_changed();
+        registry
+    }
+
+    /// Current key set. Cheap: clones an `Arc`, never touches the disk.
+    pub fn snapshot(&self) -> Arc<HashMap<String, String>> {
+        self.state.read().unwrap().keys.clone()
+    }
+
+    /// Public keys for the given signers, skipping unknown names.
+    pub fn resolve(&self, signers: &[String]) -> Vec<String> {
+        let keys = self.snapshot();
+        signers.iter().filter_map(|signer| keys.get(signer).cloned()).collect()
+    }
+
+    /// Re-read the key file if its mtime changed. Returns true if new keys
+    /// were installed.
+    pub fn reload_if_changed(&self) -> bool {
+        let modified = match fs::metadata(&self.path).and_then(|meta| meta.modified()) {
+            Ok(modified) => modified,
+            Err(e) => {
+                if self.state.read().unwrap().modified.is_some() {
+                    warn!("Key file {:?} unavailable, keeping last good keys: {}", self.path, e);
+                } else {
+                    error!("Failed to read {:?}: {}", self.path, e);
+                }
+                return false;
+            }
+        };
+        if self.state.read().unwrap().modified == Some(modified) {
+            return false;
+        }
+
+        let parsed = fs::read_to_string(&self.path)
+            .map_err(|e| e.to_string())
+            .and_then(|content| {
+                serde_json::from_str::<HashMap<String, String>>(&content).map_err(|e| e.to_string())
+            });
+
+        let mut state = self.state.write().unwrap();
+        // Remember the mtime even on failure so a broken file is not re-parsed every tick
+        state.modified = Some(modified);
+        match parsed {
+            Ok(keys) => {
+                info!("Loaded {} public keys from {:?}", keys.len(), self.path);
+                state.keys = Arc::new(keys);
+                true
+            }
+            Err(e) => {
+                error!("Failed to parse {:?}, keeping last good keys: {}", self.path, e);
+                false
+            }
+        }
+    }
+
+    /// Merge pushed keys into the registry and persist them, so they survive
+    /// a restart. Returns the total number of keys.
+    pub fn upsert(&self, updates: HashMap<String, String>) -> io::Result<usize> {
+        let mut state = self.state.write().unwrap();
+        let mut keys = (*state.keys).clone();
+        keys.extend(updates);
+
+        let content = serde_json::to_string_pretty(&keys)?;
+        if let Some(dir) = self.path.parent() {
+            fs::create_dir_all(dir)?;
+        }
+        // Write then rename so concurrent reloads never see a partial file
+        let tmp = self.path.with_extension("json.tmp");
+        fs::write(&tmp, content)?;
+        fs::rename(&tmp, &self.path)?;
+
+        state.modified = fs::metadata(&self.path).and_then(|meta| meta.modified()).ok();
+        let total = keys.len();
+        state.keys = Arc::new(keys);
+        Ok(total)
+    }
+}
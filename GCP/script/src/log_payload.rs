@@ -0,0 +1,161 @@
+//! Size-capped, redacted formatting of request payloads for the logs, plus
+//! sampling of repetitive events.
+//!
+//! `Payload` implements `Display`, so with the `log` macros nothing is
+//! formatted unless the record is emitted, and then only up to
+//! `LOG_PAYLOAD_MAX_CHARS` characters: the document walk stops at the cap
+//! instead of pretty-printing everything. Keys match the bots' redaction list.
+
+use serde_json::Value;
+use std::collections::HashMap;
+use std::fmt;
+use std::sync::{Mutex, OnceLock};
+use std::time::{Duration, Instant};
+
+const REDACTED_KEYS: &[&str] = &["signature", "proof", "verification_key", "private_key", "public_key", "public_keys"];
+// Characters kept of a long string inside a document
+const STRING_HEAD: usize = 80;
+
+fn max_chars() -> usize {
+    static MAX: OnceLock<usize> = OnceLock::new();
+    *MAX.get_or_init(|| env_number("LOG_PAYLOAD_MAX_CHARS", 600))
+}
+
+fn sample_interval() -> Duration {
+    static INTERVAL: OnceLock<Duration> = OnceLock::new();
+    *INTERVAL.get_or_init(|| Duration::from_secs(env_number("LOG_SAMPLE_INTERVAL", 60) as u64))
+}
+
+fn env_number(name: &str, default: usize) -> usize {
+    std::env::var(name)
+        .ok()
+        .and_then(|value| value.parse::<f64>().ok())
+        .map(|value| value as usize)
+        .unwrap_or(default)
+}
+
+/// Writes into a string until the character budget runs out.
+struct Capped {
+    out: String,
+    left: usize,
+}
+
+impl Capped {
+    /// Returns false if the text did not fit and was cut.
+    fn push(&mut self, text: &str) -> bool {
+        let taken: String = text.chars().take(self.left).collect();
+        let count = taken.chars().count();
+        self.left -= count;
+        self.out.push_str(&taken);
+        count == text.chars().count()
+    }
+}
+
+fn describe(value: &Value) -> String {
+    match value {
+        Value::Object(map) => format!("{} keys", map.len()),
+        Value::Array(items) => format!("{} items", items.len()),
+        Value::String(text) => format!("{} chars", text.chars().count()),
+        _ => "value".to_string(),
+    }
+}
+
+fn render(value: &Value, out: &mut Capped) -> bool {
+    match value {
+        Value::Object(map) => render_object(map.iter(), out),
+        Value::Array(items) => {
+            if !out.push("[") {
+                return false;
+            }
+            for (i, item) in items.iter().enumerate() {
+                if (i > 0 && !out.push(",")) || !render(item, out) {
+                    return false;
+                }
+            }
+            out.push("]")
+        }
+        Value::String(text) if text.chars().count() > STRING_HEAD => {
+            let head: String = text.chars().take(STRING_HEAD).collect();
+            out.push(&format!("{}…({} chars)", Value::String(head), text.chars().count()))
+        }
+        other => out.push(&other.to_string()),
+    }
+}
+
+fn render_object<'a>(entries: impl Iterator<Item = (&'a String, &'a Value)>, out: &mut Capped) -> bool {
+    if !out.push("{") {
+        return false;
+    }
+    for (i, (key, item)) in entries.enumerate() {
+        if (i > 0 && !out.push(",")) || !out.push(&format!("{}:", Value::String(key.clone()))) {
+            return false;
+        }
+        let written = if REDACTED_KEYS.contains(&key.as_str()) && !item.is_null() {
+            out.push(&format!("\"<redacted, {}>\"", describe(item)))
+        } else {
+            render(item, out)
+        };
+        if !written {
+            return false;
+        }
+    }
+    out.push("}")
+}
+
+/// The documents of a request, formatted lazily and capped.
+pub struct Documents<'a>(pub &'a [HashMap<String, Value>]);
+
+impl fmt::Display for Documents<'_> {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        let mut out = Capped { out: String::new(), left: max_chars() };
+        let mut complete = out.push("[");
+        for (i, document) in self.0.iter().enumerate() {
+            if !complete {
+                break;
+            }
+            complete = (i == 0 || out.push(",")) && render_object(document.iter(), &mut out);
+        }
+        if complete && out.push("]") {
+            return f.write_str(&out.out);
+        }
+        write!(f, "{}… [truncated, {} documents]", out.out, self.0.len())
+    }
+}
+
+/// Free text, cut at the cap and tagged with its length.
+pub struct Text<'a>(pub &'a str);
+
+impl fmt::Display for Text<'_> {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        let limit = max_chars();
+        match self.0.char_indices().nth(limit) {
+            None => f.write_str(self.0),
+            Some((end, _)) => write!(f, "{}… [{} bytes]", &self.0[..end], self.0.len()),
+        }
+    }
+}
+
+/// Returns `Some(suppressed)` if an event with this key may be logged now,
+/// at most once per `LOG_SAMPLE_INTERVAL`, with the number of events dropped
+/// since the last one that was logged.
+pub fn sample(key: &'static str) -> Option<u64> {
+    static EVENTS: OnceLock<Mutex<HashMap<&'static str, (Instant, u64)>>> = OnceLock::new();
+    let mut events = EVENTS.get_or_init(|| Mutex::new(HashMap::new())).lock().unwrap();
+    let now = Instant::now();
+    match events.get_mut(key) {
+        Some((last, suppressed)) if now.duration_since(*last) < sample_interval() => {
+            *suppressed += 1;
+            None
+        }
+        Some((last, suppressed)) => {
+            let dropped = *suppressed;
+            *last = now;
+            *suppressed = 0;
+            Some(dropped)
+        }
+        None => {
+            events.insert(key, (now, 0));
+            Some(0)
+        }
+    }
+}
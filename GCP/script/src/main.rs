@@ -1,26 +1,86 @@
-use actix_web::{web, App, HttpResponse, HttpServer, Responder};
+use actix_web::{web, App, HttpRequest, HttpResponse, HttpServer, Responder};
 use serde::{Deserialize, Serialize};
 use std::collections::HashMap;
-use log::{info, error};
+use std::path::PathBuf;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Mutex, OnceLock};
+use std::time::{Duration, Instant, SystemTime, UNIX_EPOCH};
+use log::{debug, error, info};
 use env_logger;
-use sp1_sdk::{include_elf, ProverClient, SP1Stdin};
+use fibonacci_lib::predicates::{self, PredicateProgram};
+use sp1_sdk::{include_elf, EnvProver, ProverClient, SP1ProvingKey, SP1Stdin, SP1VerifyingKey};
 use hex;
 
+mod key_registry;
+mod log_payload;
+mod metrics;
+mod proof_cache;
+use key_registry::KeyRegistry;
+use proof_cache::ProofCache;
+
 // Include the verification program ELF
 pub const VERIFY_ELF: &[u8] = include_bytes!("../../verification_proof/elf/riscv32im-succinct-zkvm-elf");
 
+/// Prover client and the keys for `VERIFY_ELF`. The ELF is a compile-time
+/// constant, so setup only ever has to run once per process.
+struct ProverState {
+    client: EnvProver,
+    #[allow(dead_code)] // kept for proof generation
+    pk: SP1ProvingKey,
+    #[allow(dead_code)]
+    vk: SP1VerifyingKey,
+    setup_time: Duration,
+}
+
+static PROVER: OnceLock<ProverState> = OnceLock::new();
+
+/// Shared state for the verification routes.
+struct AppState {
+    cache: ProofCache,
+    keys: KeyRegistry,
+}
+
+// How often the key file's mtime is checked for changes
+const KEY_RELOAD_INTERVAL: Duration = Duration::from_secs(5);
+
+/// Return the shared prover, running setup on first use.
+fn prover() -> &'static ProverState {
+    PROVER.get_or_init(|| {
+        let start = Instant::now();
+        let client = ProverClient::from_env();
+        let (pk, vk) = client.setup(VERIFY_ELF);
+        let setup_time = start.elapsed();
+        info!("Prover setup finished in {:?}", setup_time);
+        ProverState { client, pk, vk, setup_time }
+    })
+}
+
 #[derive(Debug, Serialize, Deserialize)]
 struct VerificationData {
     verification_file: String,
     json_dicts: Vec<HashMap<String, serde_json::Value>>,
+    /// Structured form of `verification_file`, evaluated directly when present
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    predicates: Option<PredicateProgram>,
 }
 
-#[derive(Debug, Serialize, Deserialize)]
+#[derive(Debug, Clone, Serialize, Deserialize)]
 struct ProofResult {
     verification_result: bool,
     proof: String,
     verification_key: String,
     public_values: String,
+    /// zkVM cycles spent on this claim
+    #[serde(default)]
+    cycles: u64,
+    /// Served from the proof cache; no cycles were spent on this request
+    #[serde(default, skip_serializing_if = "std::ops::Not::not")]
+    cached: bool,
+}
+
+#[derive(Debug, Deserialize)]
+struct BatchRequest {
+    claims: Vec<VerificationData>,
 }
 
 #[derive(Debug, Serialize, Deserialize)]
@@ -29,48 +89,128 @@ struct PublicValues {
     conditions: String,
     signature_verified: bool,
     conditions_verified: bool,
+    #[serde(default)]
+    predicate_results: Vec<bool>,
 }
 
-async fn process_data(data: web::Json<VerificationData>) -> impl Responder {
-    info!("=== GCP Server - Received New Request ===");
-    info!("Verification file content:");
-    info!("{}", data.verification_file);
-    info!("\nJSON dictionaries received:");
-    info!("{}", serde_json::to_string_pretty(&data.json_dicts).unwrap());
-    
-    // Extract signers from json_dicts
-    let signers: Vec<String> = data.json_dicts.iter()
-        .filter_map(|dict| {
-            dict.get("signed_data")
-                .and_then(|signed_data| signed_data.as_object())
-                .and_then(|signed_data_obj| signed_data_obj.get("signer"))
-                .and_then(|signer| signer.as_str())
-                .map(String::from)
-        })
-        .collect();
-    
-    info!("Extracted signers: {:?}", signers);
-    
-    // Read and parse public keys file
-    let public_keys: HashMap<String, String> = match std::fs::read_to_string("keys/public_keys.json") {
-        Ok(content) => serde_json::from_str(&content).unwrap(),
-        Err(e) => {
-            error!("Failed to read public_keys.json: {}", e);
-            return HttpResponse::InternalServerError().json(serde_json::json!({
-                "error": "Failed to read public keys file"
-            }));
+/// Why a claim could not be verified: a malformed request, or a failure on
+/// the server. A claim that is simply false is not an error.
+#[derive(Debug)]
+enum ClaimError {
+    Invalid(String),
+    Failed(String),
+}
+
+impl std::fmt::Display for ClaimError {
+    fn fmt(&self, f: &mut std::fmt::Formatter<'_>) -> std::fmt::Result {
+        match self {
+            ClaimError::Invalid(e) | ClaimError::Failed(e) => f.write_str(e),
         }
-    };
-    
-    // Create vector of just the public keys for our signers
-    let relevant_keys: Vec<String> = signers.iter()
-        .filter_map(|signer| public_keys.get(signer).cloned())
-        .collect();
-    
-    info!("Found {} relevant public keys", relevant_keys.len());
+    }
+}
+
+impl From<String> for ClaimError {
+    fn from(error: String) -> Self {
+        ClaimError::Failed(error)
+    }
+}
+
+/// A claim ready to be proven.
+struct PreparedClaim {
+    relevant_keys: Vec<String>,
+    cache_key: String,
+    /// Predicate results when the pre-check already showed the claim is false
+    refuted: Option<Vec<bool>>,
+}
+
+/// State of a proof job submitted through `/api/jobs`.
+#[derive(Debug, Clone, Serialize)]
+#[serde(tag = "status", rename_all = "snake_case")]
+enum JobState {
+    Pending,
+    Running,
+    Done { result: ProofResult },
+    Failed { error: String },
+}
+
+impl JobState {
+    fn is_finished(&self) -> bool {
+        matches!(self, JobState::Done { .. } | JobState::Failed { .. })
+    }
+}
+
+struct JobEntry {
+    state: JobState,
+    updated: Instant,
+}
+
+/// In-memory registry of proof jobs shared by all workers.
+struct JobStore {
+    jobs: Mutex<HashMap<String, JobEntry>>,
+    next_id: AtomicU64,
+}
+
+// Finished jobs are kept this long so clients can still fetch their results
+const JOB_TTL: Duration = Duration::from_secs(60 * 60);
+// Upper bound for a single long-poll on `/api/jobs/{id}?wait=<secs>`
+const MAX_JOB_WAIT_SECS: u64 = 60;
+const JOB_POLL_INTERVAL: Duration = Duration::from_millis(200);
+
+impl JobStore {
+    fn new() -> Self {
+        JobStore {
+            jobs: Mutex::new(HashMap::new()),
+            next_id: AtomicU64::new(1),
+        }
+    }
+
+    fn create(&self) -> String {
+        let millis = SystemTime::now()
+            .duration_since(UNIX_EPOCH)
+            .map(|d| d.as_millis())
+            .unwrap_or(0);
+        let id = format!("{:x}-{:x}", millis, self.next_id.fetch_add(1, Ordering::Relaxed));
+
+        let mut jobs = self.jobs.lock().unwrap();
+        // Drop finished jobs nobody collected in time
+        jobs.retain(|_, entry| !entry.state.is_finished() || entry.updated.elapsed() < JOB_TTL);
+        jobs.insert(id.clone(), JobEntry { state: JobState::Pending, updated: Instant::now() });
+        id
+    }
+
+    fn set(&self, id: &str, state: JobState) {
+        if let Some(entry) = self.jobs.lock().unwrap().get_mut(id) {
+            entry.state = state;
+            entry.updated = Instant::now();
+        }
+    }
+
+    fn get(&self, id: &str) -> Option<JobState> {
+        self.jobs.lock().unwrap().get(id).map(|entry| entry.state.clone())
+    }
+}
+
+#[derive(Debug, Deserialize)]
+struct JobQuery {
+    wait: Option<u64>,
+}
+
+/// Run the verification program for one request. This is CPU-bound and must
+/// be called from a blocking thread, never directly on an Actix worker.
+fn run_verification(data: &VerificationData, relevant_keys: &[String]) -> Result<ProofResult, String> {
+    // Payloads are formatted lazily and capped; full documents only at debug level
+    info!(
+        "Verifying {} documents against: {}",
+        data.json_dicts.len(),
+        log_payload::Text(&data.verification_file)
+    );
+    debug!("Documents: {}", log_payload::Documents(&data.json_dicts));
     
-    // Setup the prover client
-    let client = ProverClient::from_env();
+    // Get the shared prover client and keys
+    let setup_start = Instant::now();
+    let warm = PROVER.get().is_some();
+    let state = prover();
+    let setup_elapsed = setup_start.elapsed();
     
     // Setup the inputs for the proof
     let mut stdin = SP1Stdin::new();
@@ -83,40 +223,337 @@ async fn process_data(data: web::Json<VerificationData>) -> impl Responder {
     stdin.write(&json_data);
     
     // Write the vector of public keys
-    stdin.write(&relevant_keys);
+    stdin.write(&relevant_keys.to_vec());
 
-    // Generate the proving and verification keys
-    let (pk, vk) = client.setup(VERIFY_ELF);
-    
     // Execute the program and get public values
-    let (public_values, report) = client.execute(VERIFY_ELF, &stdin).run().unwrap();
-    info!("Executed program with {} cycles", report.total_instruction_count());
+    let execute_start = Instant::now();
+    let (public_values, report) = state.client.execute(VERIFY_ELF, &stdin).run().unwrap();
+    let execute_elapsed = execute_start.elapsed();
+    let cycles = report.total_instruction_count();
+    let registry = metrics::global();
+    registry.observe_duration(metrics::STAGE_SECONDS, &[("stage", "setup")], setup_elapsed);
+    registry.observe_duration(metrics::STAGE_SECONDS, &[("stage", "execute")], execute_elapsed);
+    registry.observe(metrics::CYCLES, &[], cycles as f64);
+    info!("Executed program with {} cycles", cycles);
+    if warm {
+        info!(
+            "Timing: setup {:?} (reused keys, saved ~{:?}), execute {:?}",
+            setup_elapsed, state.setup_time, execute_elapsed
+        );
+    } else {
+        info!("Timing: setup {:?} (cold), execute {:?}", setup_elapsed, execute_elapsed);
+    }
     
     // Convert SP1PublicValues to bytes and then deserialize into PublicValues struct
     let public_values_bytes = public_values.to_vec();
-    let public_values_struct: PublicValues = match serde_json::from_slice(&public_values_bytes) {
+    let public_values_struct: PublicValues = match serde_json::from_slice::<PublicValues>(&public_values_bytes) {
         Ok(values) => {
-            info!("Successfully parsed public values: {:?}", values);
+            info!(
+                "Parsed public values: signature_verified={}, conditions_verified={}, {} public keys",
+                values.signature_verified,
+                values.conditions_verified,
+                values.public_keys.len()
+            );
             values
         },
         Err(e) => {
             error!("Failed to parse public values: {}", e);
-            return HttpResponse::InternalServerError().json(serde_json::json!({
-                "error": format!("Failed to parse public values: {}", e)
-            }));
+            return Err(format!("Failed to parse public values: {}", e));
         }
     };
     
     // Create the result with public values as a pretty-printed string
-    let result = ProofResult {
+    Ok(ProofResult {
         verification_result: public_values_struct.signature_verified && public_values_struct.conditions_verified,
         proof: "".to_string(),
         verification_key: "".to_string(),
         public_values: serde_json::to_string_pretty(&public_values_struct).unwrap(),
-    };
+        cycles,
+        cached: false,
+    })
+}
+
+/// Extract the signer names from json_dicts
+fn extract_signers(data: &VerificationData) -> Vec<String> {
+    data.json_dicts.iter()
+        .filter_map(|dict| {
+            dict.get("signed_data")
+                .and_then(|signed_data| signed_data.as_object())
+                .and_then(|signed_data_obj| signed_data_obj.get("signer"))
+                .and_then(|signer| signer.as_str())
+                .map(String::from)
+        })
+        .collect()
+}
+
+/// Resolve the signers' public keys and pre-check the claim's predicates.
+fn prepare_claim(state: &AppState, data: &VerificationData) -> Result<PreparedClaim, ClaimError> {
+    let signers = extract_signers(data);
+    info!("Extracted signers: {:?}", signers);
+    
+    // Look up just the public keys for our signers
+    let relevant_keys = state.keys.resolve(&signers);
+    info!("Found {} relevant public keys", relevant_keys.len());
     
-    info!("Sending response with public values: {}", result.public_values);
-    HttpResponse::Ok().json(result)
+    // Evaluating the predicates here is cheap; conditions that fail never reach the zkVM
+    let mut refuted = None;
+    if let Some(program) = &data.predicates {
+        let documents = serde_json::to_value(&data.json_dicts)
+            .ok()
+            .and_then(|value| value.as_array().cloned())
+            .unwrap_or_default();
+        let results = predicates::evaluate(program, &documents)
+            .map_err(|e| ClaimError::Invalid(format!("Invalid predicate program: {}", e)))?;
+        info!("Predicate pre-check: {:?}", results);
+        if !results.iter().all(|&result| result) {
+            refuted = Some(results);
+        }
+    }
+
+    // The keys are part of the key: a rotated signer key must not reuse old results
+    let cache_key = ProofCache::key(
+        &data.verification_file,
+        &(&data.json_dicts, &relevant_keys, &data.predicates),
+    );
+    Ok(PreparedClaim { relevant_keys, cache_key, refuted })
+}
+
+/// The result for a claim the pre-check showed to be false. It is reported
+/// like any proof result, with `verification_result: false` and the
+/// per-predicate results, but the zkVM never ran: nothing was proven and the
+/// signatures were not checked.
+fn refuted_result(data: &VerificationData, relevant_keys: Vec<String>, results: Vec<bool>) -> ProofResult {
+    let public_values = PublicValues {
+        public_keys: relevant_keys,
+        conditions: data.verification_file.clone(),
+        signature_verified: false,
+        conditions_verified: false,
+        predicate_results: results,
+    };
+    ProofResult {
+        verification_result: false,
+        proof: "".to_string(),
+        verification_key: "".to_string(),
+        public_values: serde_json::to_string_pretty(&public_values).unwrap(),
+        cycles: 0,
+        cached: false,
+    }
+}
+
+/// Serve the verification from the proof cache, running the prover only on a
+/// miss.
+fn verify_with_cache(state: &AppState, data: &VerificationData) -> Result<ProofResult, ClaimError> {
+    let claim = prepare_claim(state, data)?;
+    if let Some(results) = claim.refuted {
+        return Ok(refuted_result(data, claim.relevant_keys, results));
+    }
+    if let Some(result) = state.cache.get::<ProofResult>(&claim.cache_key) {
+        return Ok(ProofResult { cached: true, ..result });
+    }
+    let result = run_verification(data, &claim.relevant_keys)?;
+    state.cache.put(&claim.cache_key, &result);
+    Ok(result)
+}
+
+/// Verify several claims in one request. Claims are pre-checked and looked
+/// up in the cache one by one; the rest are proven one execution each, since
+/// the guest reports on all of a request's conditions at once.
+fn verify_batch(state: &AppState, claims: &[VerificationData]) -> Vec<Result<ProofResult, String>> {
+    claims
+        .iter()
+        .map(|claim| verify_with_cache(state, claim).map_err(|e| e.to_string()))
+        .collect()
+}
+
+/// Record a request's latency and outcome for `/metrics`.
+fn record_request(route: &str, start: Instant, ok: bool) {
+    let registry = metrics::global();
+    registry.observe_duration(metrics::REQUEST_SECONDS, &[("route", route)], start.elapsed());
+    registry.inc(metrics::REQUESTS_TOTAL, &[("route", route), ("result", if ok { "ok" } else { "error" })]);
+}
+
+async fn process_data(state: web::Data<AppState>, data: web::Json<VerificationData>) -> impl Responder {
+    info!("=== GCP Server - Received New Request ===");
+    let start = Instant::now();
+    let data = data.into_inner();
+    let state = state.into_inner();
+    let outcome = web::block(move || verify_with_cache(&state, &data)).await;
+    record_request("process", start, matches!(outcome, Ok(Ok(_))));
+    match outcome {
+        Ok(Ok(result)) => {
+            info!(
+                "Sending response (verified: {}, cached: {}): {}",
+                result.verification_result,
+                result.cached,
+                log_payload::Text(&result.public_values)
+            );
+            HttpResponse::Ok().json(result)
+        }
+        Ok(Err(ClaimError::Invalid(e))) => HttpResponse::BadRequest().json(serde_json::json!({ "error": e })),
+        Ok(Err(ClaimError::Failed(e))) => HttpResponse::InternalServerError().json(serde_json::json!({ "error": e })),
+        Err(e) => {
+            error!("Verification task failed: {}", e);
+            HttpResponse::InternalServerError().json(serde_json::json!({
+                "error": "Verification task failed"
+            }))
+        }
+    }
+}
+
+/// Prove a batch of claims. Responds with one entry per claim, in order:
+/// a proof result, or `{"error": ...}`.
+async fn process_batch(state: web::Data<AppState>, batch: web::Json<BatchRequest>) -> impl Responder {
+    let claims = batch.into_inner().claims;
+    info!("=== GCP Server - Received batch of {} claims ===", claims.len());
+    let start = Instant::now();
+    let state = state.into_inner();
+    let outcome = web::block(move || verify_batch(&state, &claims)).await;
+    record_request("process_batch", start, outcome.is_ok());
+    match outcome {
+        Ok(outcomes) => {
+            let results: Vec<serde_json::Value> = outcomes
+                .into_iter()
+                .map(|outcome| match outcome {
+                    Ok(result) => serde_json::to_value(result).unwrap(),
+                    Err(error) => serde_json::json!({ "error": error }),
+                })
+                .collect();
+            HttpResponse::Ok().json(serde_json::json!({ "results": results }))
+        }
+        Err(e) => {
+            error!("Batch verification task failed: {}", e);
+            HttpResponse::InternalServerError().json(serde_json::json!({
+                "error": "Batch verification task failed"
+            }))
+        }
+    }
+}
+
+/// Submit a proof job and return its id immediately.
+async fn submit_job(
+    store: web::Data<JobStore>,
+    state: web::Data<AppState>,
+    data: web::Json<VerificationData>,
+) -> impl Responder {
+    let job_id = store.create();
+    info!("=== GCP Server - Queued job {} ===", job_id);
+
+    let data = data.into_inner();
+    let store = store.into_inner();
+    let state = state.into_inner();
+    let id = job_id.clone();
+    actix_web::rt::spawn(async move {
+        store.set(&id, JobState::Running);
+        let start = Instant::now();
+        let outcome = web::block(move || verify_with_cache(&state, &data)).await;
+        record_request("jobs", start, matches!(outcome, Ok(Ok(_))));
+        let job_state = match outcome {
+            Ok(Ok(result)) => JobState::Done { result },
+            Ok(Err(error)) => JobState::Failed { error: error.to_string() },
+            Err(e) => JobState::Failed { error: format!("Verification task failed: {}", e) },
+        };
+        info!("Job {} finished", id);
+        store.set(&id, job_state);
+    });
+
+    HttpResponse::Accepted().json(serde_json::json!({
+        "job_id": job_id,
+        "status": "pending",
+    }))
+}
+
+/// Report a job's status, including its result once it is done. With
+/// `?wait=<secs>` the request is held until the job finishes or the wait
+/// elapses, so clients do not need to poll aggressively.
+async fn job_status(
+    store: web::Data<JobStore>,
+    path: web::Path<String>,
+    query: web::Query<JobQuery>,
+) -> impl Responder {
+    let job_id = path.into_inner();
+    let deadline = Instant::now() + Duration::from_secs(query.wait.unwrap_or(0).min(MAX_JOB_WAIT_SECS));
+
+    loop {
+        let state = match store.get(&job_id) {
+            Some(state) => state,
+            None => {
+                return HttpResponse::NotFound().json(serde_json::json!({
+                    "error": format!("Unknown job {}", job_id)
+                }));
+            }
+        };
+        if state.is_finished() || Instant::now() >= deadline {
+            let mut body = serde_json::to_value(&state).unwrap();
+            body["job_id"] = serde_json::Value::String(job_id);
+            return HttpResponse::Ok().json(body);
+        }
+        actix_web::rt::time::sleep(JOB_POLL_INTERVAL).await;
+    }
+}
+
+async fn cache_stats(state: web::Data<AppState>) -> impl Responder {
+    HttpResponse::Ok().json(state.cache.stats())
+}
+
+/// Stage and request histograms plus the proof cache counters, in
+/// Prometheus text format.
+async fn metrics_text(state: web::Data<AppState>) -> impl Responder {
+    let mut body = metrics::global().render();
+    let stats = state.cache.stats();
+    metrics::write_sample(&mut body, "prover_cache_hits_total", "counter", "Proof cache hits", stats.hits);
+    metrics::write_sample(&mut body, "prover_cache_misses_total", "counter", "Proof cache misses", stats.misses);
+    metrics::write_sample(&mut body, "prover_cache_entries", "gauge", "Entries in the proof cache", stats.entries);
+    metrics::write_sample(&mut body, "prover_cache_bytes", "gauge", "Size of the proof cache on disk", stats.bytes);
+    HttpResponse::Ok()
+        .content_type("text/plain; version=0.0.4; charset=utf-8")
+        .body(body)
+}
+
+/// Merge public keys pushed by `KeyManager` into the registry. Requires the
+/// server's `GCP_API_KEY` as a bearer token; disabled when it is unset.
+async fn push_keys(
+    state: web::Data<AppState>,
+    req: HttpRequest,
+    keys: web::Json<HashMap<String, String>>,
+) -> impl Responder {
+    let expected = match std::env::var("GCP_API_KEY") {
+        Ok(key) if !key.is_empty() => format!("Bearer {}", key),
+        _ => {
+            return HttpResponse::Forbidden().json(serde_json::json!({
+                "error": "Key updates are disabled: GCP_API_KEY is not set"
+            }));
+        }
+    };
+    let authorized = req.headers()
+        .get("Authorization")
+        .and_then(|value| value.to_str().ok())
+        .map(|value| value == expected)
+        .unwrap_or(false);
+    if !authorized {
+        return HttpResponse::Unauthorized().json(serde_json::json!({ "error": "Invalid API key" }));
+    }
+
+    let updates = keys.into_inner();
+    let updated = updates.len();
+    let state = state.into_inner();
+    match web::block(move || state.keys.upsert(updates)).await {
+        Ok(Ok(total)) => {
+            info!("Registered {} pushed public keys ({} total)", updated, total);
+            HttpResponse::Ok().json(serde_json::json!({ "updated": updated, "total": total }))
+        }
+        Ok(Err(e)) => {
+            error!("Failed to persist pushed keys: {}", e);
+            HttpResponse::InternalServerError().json(serde_json::json!({
+                "error": "Failed to persist public keys"
+            }))
+        }
+        Err(e) => {
+            error!("Key update task failed: {}", e);
+            HttpResponse::InternalServerError().json(serde_json::json!({
+                "error": "Key update task failed"
+            }))
+        }
+    }
 }
 
 #[actix_web::main]
@@ -130,12 +567,47 @@ async fn main() -> std::io::Result<()> {
     let mut server = None;
     let mut bound_port = None;
     
+    // Optionally pay the prover setup cost before accepting requests
+    if std::env::var("PROVER_WARMUP").map(|v| v == "1").unwrap_or(false) {
+        info!("Warming up prover...");
+        prover();
+    }
+    
+    // Job registry shared by every worker
+    let jobs = web::Data::new(JobStore::new());
+    // Proof cache and public key registry shared by every worker
+    let state = web::Data::new(AppState {
+        cache: ProofCache::from_env(),
+        keys: KeyRegistry::load(PathBuf::from("keys/public_keys.json")),
+    });
+    
+    // Pick up edits to the key file without a restart
+    let watched = state.clone();
+    actix_web::rt::spawn(async move {
+        let mut interval = actix_web::rt::time::interval(KEY_RELOAD_INTERVAL);
+        loop {
+            interval.tick().await;
+            let registry = watched.clone();
+            let _ = web::block(move || registry.keys.reload_if_changed()).await;
+        }
+    });
+    
     for port in ports {
         let bind_address = format!("0.0.0.0:{}", port);
-        match HttpServer::new(|| {
+        let jobs = jobs.clone();
+        let state = state.clone();
+        match HttpServer::new(move || {
             App::new()
                 .app_data(web::JsonConfig::default().limit(1024 * 1024 * 10))
+                .app_data(jobs.clone())
+                .app_data(state.clone())
                 .route("/api/process", web::post().to(process_data))
+                .route("/api/process_batch", web::post().to(process_batch))
+                .route("/api/jobs", web::post().to(submit_job))
+                .route("/api/jobs/{job_id}", web::get().to(job_status))
+                .route("/api/cache/stats", web::get().to(cache_stats))
+                .route("/metrics", web::get().to(metrics_text))
+                .route("/api/keys", web::post().to(push_keys))
         })
         .bind(&bind_address) {
             Ok(s) => {
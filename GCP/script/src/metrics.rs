@@ -0,0 +1,141 @@
+//! Prometheus-format metrics for the verification server.
+//!
+//! Histograms and counters live in one process-wide registry and are served
+//! as text from `/metrics`. Series are keyed by metric name and rendered
+//! label set, which keeps recording a one-line call at each timing site.
+
+use std::collections::BTreeMap;
+use std::fmt::Write;
+use std::sync::{Mutex, OnceLock};
+use std::time::Duration;
+
+const SECONDS_BUCKETS: &[f64] = &[0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0];
+const CYCLE_BUCKETS: &[f64] = &[1e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8, 1e9];
+
+pub const STAGE_SECONDS: &str = "prover_stage_seconds";
+pub const REQUEST_SECONDS: &str = "prover_request_seconds";
+pub const CYCLES: &str = "prover_cycles";
+pub const REQUESTS_TOTAL: &str = "prover_requests_total";
+
+fn help(name: &str) -> Option<&'static str> {
+    match name {
+        STAGE_SECONDS => Some("Time spent in prover setup and program execution"),
+        REQUEST_SECONDS => Some("Time to answer a proof request, per route"),
+        CYCLES => Some("zkVM cycles per program execution"),
+        REQUESTS_TOTAL => Some("Proof requests per route and outcome"),
+        _ => None,
+    }
+}
+
+fn buckets(name: &str) -> &'static [f64] {
+    if name == CYCLES {
+        CYCLE_BUCKETS
+    } else {
+        SECONDS_BUCKETS
+    }
+}
+
+struct Histogram {
+    counts: Vec<u64>,
+    sum: f64,
+    count: u64,
+}
+
+#[derive(Default)]
+pub struct Metrics {
+    histograms: Mutex<BTreeMap<(&'static str, String), Histogram>>,
+    counters: Mutex<BTreeMap<(&'static str, String), u64>>,
+}
+
+static METRICS: OnceLock<Metrics> = OnceLock::new();
+
+/// The registry shared by every worker.
+pub fn global() -> &'static Metrics {
+    METRICS.get_or_init(Metrics::default)
+}
+
+fn format_labels(labels: &[(&str, &str)]) -> String {
+    if labels.is_empty() {
+        return String::new();
+    }
+    let pairs: Vec<String> = labels
+        .iter()
+        .map(|(key, value)| format!("{}=\"{}\"", key, value.replace('\\', "\\\\").replace('"', "\\\"")))
+        .collect();
+    format!("{{{}}}", pairs.join(","))
+}
+
+/// Append `le` to an already rendered label set.
+fn with_le(labels: &str, le: &str) -> String {
+    match labels.strip_suffix('}') {
+        Some(open) => format!("{},le=\"{}\"}}", open, le),
+        None => format!("{{le=\"{}\"}}", le),
+    }
+}
+
+/// Append one sample with its HELP and TYPE header, for values that are
+/// read from elsewhere at scrape time (e.g. the proof cache's counters).
+pub fn write_sample(out: &mut String, name: &str, kind: &str, help: &str, value: u64) {
+    let _ = writeln!(out, "# HELP {} {}", name, help);
+    let _ = writeln!(out, "# TYPE {} {}", name, kind);
+    let _ = writeln!(out, "{} {}", name, value);
+}
+
+impl Metrics {
+    pub fn observe(&self, name: &'static str, labels: &[(&str, &str)], value: f64) {
+        let bounds = buckets(name);
+        let mut histograms = self.histograms.lock().unwrap();
+        let histogram = histograms
+            .entry((name, format_labels(labels)))
+            .or_insert_with(|| Histogram { counts: vec![0; bounds.len()], sum: 0.0, count: 0 });
+        if let Some(i) = bounds.iter().position(|&bound| value <= bound) {
+            histogram.counts[i] += 1;
+        }
+        histogram.sum += value;
+        histogram.count += 1;
+    }
+
+    pub fn observe_duration(&self, name: &'static str, labels: &[(&str, &str)], elapsed: Duration) {
+        self.observe(name, labels, elapsed.as_secs_f64());
+    }
+
+    pub fn inc(&self, name: &'static str, labels: &[(&str, &str)]) {
+        *self.counters.lock().unwrap().entry((name, format_labels(labels))).or_insert(0) += 1;
+    }
+
+    /// All series in Prometheus text exposition format.
+    pub fn render(&self) -> String {
+        let mut out = String::new();
+        let mut last: Option<&str> = None;
+        for ((name, labels), histogram) in self.histograms.lock().unwrap().iter() {
+            if last != Some(name) {
+                write_header(&mut out, name, "histogram");
+                last = Some(name);
+            }
+            let mut cumulative = 0;
+            for (bound, count) in buckets(name).iter().zip(&histogram.counts) {
+                cumulative += count;
+                let _ = writeln!(out, "{}_bucket{} {}", name, with_le(labels, &bound.to_string()), cumulative);
+            }
+            let _ = writeln!(out, "{}_bucket{} {}", name, with_le(labels, "+Inf"), histogram.count);
+            let _ = writeln!(out, "{}_sum{} {}", name, labels, histogram.sum);
+            let _ = writeln!(out, "{}_count{} {}", name, labels, histogram.count);
+        }
+        let mut last: Option<&str> = None;
+        for ((name, labels), value) in self.counters.lock().unwrap().iter() {
+            if last != Some(name) {
+                write_header(&mut out, name, "counter");
+                last = Some(name);
+            }
+            let _ = writeln!(out, "{}{} {}", name, labels, value);
+        }
+        out
+    }
+}
+
+fn write_header(out: &mut String, name: &str, kind: &str) {
+    if let Some(text) = help(name) {
+        let _ = writeln!(out, "# HELP {} {}", name, text);
+    }
+    let _ = writeln!(out, "# TYPE {} {}", name, kind);
+}
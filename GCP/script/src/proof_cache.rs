@@ -0,0 +1,206 @@
+//! Content-addressed disk cache for verification results.
+//!
+//! Entries are keyed by a SHA-256 over the normalized conditions and the
+//! canonical JSON of the documents, so repeating a claim over the same
+//! documents skips the zkVM entirely.
+
+use log::{error, info};
+use serde::de::DeserializeOwned;
+use serde::Serialize;
+use sha2::{Digest, Sha256};
+use std::fs;
+use std::path::PathBuf;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::time::{Duration, SystemTime};
+
+pub struct ProofCache {
+    dir: PathBuf,
+    ttl: Duration,
+    max_bytes: u64,
+    hits: AtomicU64,
+    misses: AtomicU64,
+}
+
+#[derive(Debug, Serialize)]
+pub struct CacheStats {
+    pub hits: u64,
+    pub misses: u64,
+    pub entries: u64,
+    pub bytes: u64,
+}
+
+impl ProofCache {
+    pub fn new(dir: PathBuf, ttl: Duration, max_bytes: u64) -> Self {
+        if let Err(e) = fs::create_dir_all(&dir) {
+            error!("Failed to create proof cache directory {:?}: {}", dir, e);
+        }
+        ProofCache {
+            dir,
+            ttl,
+            max_bytes,
+            hits: AtomicU64::new(0),
+            misses: AtomicU64::new(0),
+        }
+    }
+
+    /// Build the cache from `PROOF_CACHE_DIR`, `PROOF_CACHE_TTL` (seconds) and
+    /// `PROOF_CACHE_MAX_BYTES`.
+    pub fn from_env() -> Self {
+        let dir = std::env::var("PROOF_CACHE_DIR").unwrap_or_else(|_| "proof_cache".to_string());
+        let ttl = env_u64("PROOF_CACHE_TTL", 24 * 60 * 60);
+        let max_bytes = env_u64("PROOF_CACHE_MAX_BYTES", 256 * 1024 * 1024);
+        ProofCache::new(PathBuf::from(dir), Duration::from_secs(ttl), max_bytes)
+    }
+
+    /// Hash the conditions (trimmed, blank lines dropped) together with the
+    /// documents serialized with sorted keys.
+    pub fn key<T: Serialize>(conditions: &str, documents: &T) -> String {
+        let normalized: Vec<&str> = conditions
+            .lines()
+            .map(str::trim)
+            .filter(|line| !line.is_empty())
+            .collect();
+        let documents = serde_json::to_value(documents).unwrap_or(serde_json::Value::Null);
+
+        let mut canonical = String::new();
+        write_canonical(&documents, &mut canonical);
+
+        let mut hasher = Sha256::new();
+        hasher.update(normalized.join("\n").as_bytes());
+        hasher.update([0u8]);
+        hasher.update(canonical.as_bytes());
+        hex::encode(hasher.finalize())
+    }
+
+    fn path(&self, key: &str) -> PathBuf {
+        self.dir.join(format!("{}.json", key))
+    }
+
+    pub fn get<T: DeserializeOwned>(&self, key: &str) -> Option<T> {
+        let path = self.path(key);
+        let fresh = fs::metadata(&path)
+            .and_then(|meta| meta.modified())
+            .map(|modified| modified.elapsed().unwrap_or_default() < self.ttl)
+            .unwrap_or(false);
+
+        let value = if fresh {
+            fs::read(&path).ok().and_then(|bytes| serde_json::from_slice(&bytes).ok())
+        } else {
+            // Expired or missing; dropping an expired file keeps the directory small
+            let _ = fs::remove_file(&path);
+            None
+        };
+
+        match value {
+            Some(value) => {
+                self.hits.fetch_add(1, Ordering::Relaxed);
+                if let Some(suppressed) = crate::log_payload::sample("proof_cache_hit") {
+                    info!("Proof cache hit for {} ({} similar suppressed)", key, suppressed);
+                }
+                Some(value)
+            }
+            None => {
+                self.misses.fetch_add(1, Ordering::Relaxed);
+                None
+            }
+        }
+    }
+
+    pub fn put<T: Serialize>(&self, key: &str, value: &T) {
+        let bytes = match serde_json::to_vec(value) {
+            Ok(bytes) => bytes,
+            Err(e) => {
+                error!("Failed to serialize cache entry: {}", e);
+                return;
+            }
+        };
+        // Write then rename so readers never see a partial entry
+        let tmp = self.dir.join(format!("{}.tmp", key));
+        if let Err(e) = fs::write(&tmp, &bytes).and_then(|_| fs::rename(&tmp, self.path(key))) {
+            error!("Failed to write cache entry {}: {}", key, e);
+            return;
+        }
+        self.evict();
+    }
+
+    /// Remove expired entries, then the oldest ones until the cache fits in
+    /// `max_bytes`.
+    fn evict(&self) {
+        let mut entries: Vec<(SystemTime, u64, PathBuf)> = match fs::read_dir(&self.dir) {
+            Ok(dir) => dir
+                .filter_map(|entry| entry.ok())
+                .filter_map(|entry| {
+                    let meta = entry.metadata().ok()?;
+                    Some((meta.modified().ok()?, meta.len(), entry.path()))
+                })
+                .collect(),
+            Err(_) => return,
+        };
+        entries.sort_by_key(|(modified, _, _)| *modified);
+
+        let mut total: u64 = entries.iter().map(|(_, len, _)| len).sum();
+        for (modified, len, path) in entries {
+            let expired = modified.elapsed().unwrap_or_default() >= self.ttl;
+            if !expired && total <= self.max_bytes {
+                break;
+            }
+            if fs::remove_file(&path).is_ok() {
+                total -= len;
+            }
+        }
+    }
+
+    pub fn stats(&self) -> CacheStats {
+        let (entries, bytes) = fs::read_dir(&self.dir)
+            .map(|dir| {
+                dir.filter_map(|entry| entry.ok()?.metadata().ok())
+                    .fold((0, 0), |(count, size), meta| (count + 1, size + meta.len()))
+            })
+            .unwrap_or((0, 0));
+        CacheStats {
+            hits: self.hits.load(Ordering::Relaxed),
+            misses: self.misses.load(Ordering::Relaxed),
+            entries,
+            bytes,
+        }
+    }
+}
+
+fn env_u64(name: &str, default: u64) -> u64 {
+    std::env::var(name)
+        .ok()
+        .and_then(|value| value.parse().ok())
+        .unwrap_or(default)
+}
+
+/// Serialize a JSON value with object keys in sorted order, independent of
+/// whether serde_json was built with `preserve_order`.
+fn write_canonical(value: &serde_json::Value, out: &mut String) {
+    match value {
+        serde_json::Value::Object(map) => {
+            let mut keys: Vec<&String> = map.keys().collect();
+            keys.sort();
+            out.push('{');
+            for (i, key) in keys.into_iter().enumerate() {
+                if i > 0 {
+                    out.push(',');
+                }
+                out.push_str(&serde_json::Value::String(key.clone()).to_string());
+                out.push(':');
+                write_canonical(&map[key], out);
+            }
+            out.push('}');
+        }
+        serde_json::Value::Array(items) => {
+            out.push('[');
+            for (i, item) in items.iter().enumerate() {
+                if i > 0 {
+                    out.push(',');
+                }
+                write_canonical(item, out);
+            }
+            out.push(']');
+        }
+        other => out.push_str(&other.to_string()),
+    }
+}
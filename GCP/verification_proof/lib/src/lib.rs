@@ -1,5 +1,7 @@
 use alloy_sol_types::sol;
 
+pub mod predicates;
+
 sol! {
     /// The public values encoded as a struct that can be easily deserialized inside Solidity.
     struct PublicValuesStruct {
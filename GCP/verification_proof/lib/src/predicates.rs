@@ -0,0 +1,288 @@
+//! Evaluator for structured verification conditions.
+//!
+//! A `PredicateProgram` is produced by `discord/predicate_ir.py`: a table of
+//! field paths into the documents plus one boolean expression tree per claim,
+//! with nodes encoded as JSON arrays (`["gt", ["get", 0, "f64"], ["f64", 1.0]]`).
+//! Each path is resolved once and shared by every predicate that uses it. The
+//! GCP server runs it as a pre-check before proving.
+
+use serde::{Deserialize, Serialize};
+use serde_json::Value;
+use std::cmp::Ordering;
+
+pub const PROGRAM_VERSION: u32 = 1;
+
+/// One step of a field path: an array/document position or an object key.
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
+#[serde(untagged)]
+pub enum PathStep {
+    Index(u64),
+    Key(String),
+}
+
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
+pub struct PredicateProgram {
+    pub version: u32,
+    pub paths: Vec<Vec<PathStep>>,
+    pub predicates: Vec<Value>,
+}
+
+#[derive(Debug, Clone, PartialEq)]
+enum Scalar {
+    F64(f64),
+    Int(i64),
+    Str(String),
+    Bool(bool),
+    Json(Value),
+}
+
+enum EvalError {
+    /// The program itself is invalid; no predicate result can be trusted.
+    Malformed(String),
+    /// A value is missing or has the wrong type; the predicate is false.
+    Missing,
+}
+
+use EvalError::{Malformed, Missing};
+
+type EvalResult = Result<Scalar, EvalError>;
+
+/// Evaluate every predicate over `documents`.
+///
+/// A predicate whose fields are missing or of the wrong type evaluates to
+/// false; an invalid program is an error.
+pub fn evaluate(program: &PredicateProgram, documents: &[Value]) -> Result<Vec<bool>, String> {
+    if program.version != PROGRAM_VERSION {
+        return Err(format!("unsupported predicate program version {}", program.version));
+    }
+    let resolved: Vec<Option<&Value>> = program
+        .paths
+        .iter()
+        .map(|path| resolve(path, documents))
+        .collect();
+    let context = Context { resolved, documents: documents.len() };
+
+    program
+        .predicates
+        .iter()
+        .map(|predicate| match context.eval(predicate) {
+            Ok(Scalar::Bool(result)) => Ok(result),
+            Ok(other) => Err(format!("predicate evaluates to {:?}, not a bool", other)),
+            Err(Missing) => Ok(false),
+            Err(Malformed(e)) => Err(e),
+        })
+        .collect()
+}
+
+fn resolve<'a>(path: &[PathStep], documents: &'a [Value]) -> Option<&'a Value> {
+    let (first, rest) = path.split_first()?;
+    let mut value = match first {
+        PathStep::Index(i) => documents.get(*i as usize)?,
+        PathStep::Key(_) => return None,
+    };
+    for step in rest {
+        value = match step {
+            PathStep::Index(i) => value.as_array()?.get(*i as usize)?,
+            PathStep::Key(key) => value.as_object()?.get(key)?,
+        };
+    }
+    Some(value)
+}
+
+struct Context<'a> {
+    resolved: Vec<Option<&'a Value>>,
+    documents: usize,
+}
+
+impl<'a> Context<'a> {
+    fn eval(&self, node: &Value) -> EvalResult {
+        let items = node
+            .as_array()
+            .filter(|items| !items.is_empty())
+            .ok_or_else(|| Malformed(format!("invalid node {}", node)))?;
+        let op = items[0]
+            .as_str()
+            .ok_or_else(|| Malformed(format!("invalid operator in {}", node)))?;
+        let args = &items[1..];
+
+        match op {
+            "f64" => constant(args, |v| v.as_f64().map(Scalar::F64)),
+            "i64" => constant(args, |v| v.as_i64().map(Scalar::Int)),
+            "str" => constant(args, |v| v.as_str().map(|s| Scalar::Str(s.to_string()))),
+            "bool" => constant(args, |v| v.as_bool().map(Scalar::Bool)),
+            "get" => {
+                arity(op, args, 2)?;
+                let value = self.path(&args[0])?.ok_or(Missing)?;
+                let scalar = match args[1].as_str() {
+                    Some("f64") => value.as_f64().map(Scalar::F64),
+                    Some("i64") => value.as_i64().map(Scalar::Int),
+                    Some("u64") => value.as_u64().and_then(|n| i64::try_from(n).ok()).map(Scalar::Int),
+                    Some("str") => value.as_str().map(|s| Scalar::Str(s.to_string())),
+                    Some("bool") => value.as_bool().map(Scalar::Bool),
+                    Some("json") => Some(Scalar::Json(value.clone())),
+                    _ => return Err(Malformed(format!("unknown value type in {}", node))),
+                };
+                scalar.ok_or(Missing)
+            }
+            "exists" => {
+                arity(op, args, 1)?;
+                Ok(Scalar::Bool(self.path(&args[0])?.is_some()))
+            }
+            "is_null" => {
+                arity(op, args, 1)?;
+                Ok(Scalar::Bool(self.path(&args[0])?.map_or(true, Value::is_null)))
+            }
+            "count" => {
+                arity(op, args, 0)?;
+                Ok(Scalar::Int(self.documents as i64))
+            }
+            "and" | "or" => {
+                if args.len() < 2 {
+                    return Err(Malformed(format!("{} takes at least 2 operands", op)));
+                }
+                // Short-circuits like Rust's && and ||
+                let stop = op == "or";
+                for arg in args {
+                    if self.bool(arg)? == stop {
+                        return Ok(Scalar::Bool(stop));
+                    }
+                }
+                Ok(Scalar::Bool(!stop))
+            }
+            "not" => {
+                arity(op, args, 1)?;
+                Ok(Scalar::Bool(!self.bool(&args[0])?))
+            }
+            "eq" | "ne" | "lt" | "le" | "gt" | "ge" => {
+                arity(op, args, 2)?;
+                let ordering = compare(&self.eval(&args[0])?, &self.eval(&args[1])?, op)?;
+                let result = match (op, ordering) {
+                    (_, None) => op == "ne",
+                    ("eq", Some(o)) => o == Ordering::Equal,
+                    ("ne", Some(o)) => o != Ordering::Equal,
+                    ("lt", Some(o)) => o == Ordering::Less,
+                    ("le", Some(o)) => o != Ordering::Greater,
+                    ("gt", Some(o)) => o == Ordering::Greater,
+                    (_, Some(o)) => o != Ordering::Less,
+                };
+                Ok(Scalar::Bool(result))
+            }
+            "sum" | "avg" => {
+                if args.len() < 2 {
+                    return Err(Malformed(format!("{} takes at least 2 operands", op)));
+                }
+                let mut total = 0.0;
+                for arg in args {
+                    match self.eval(arg)? {
+                        Scalar::F64(x) => total += x,
+                        other => return Err(Malformed(format!("{} expects f64, got {:?}", op, other))),
+                    }
+                }
+                Ok(Scalar::F64(if op == "avg" { total / args.len() as f64 } else { total }))
+            }
+            "neg" | "abs" | "to_f64" | "to_int" => {
+                arity(op, args, 1)?;
+                match (op, self.eval(&args[0])?) {
+                    ("neg", Scalar::F64(x)) => Ok(Scalar::F64(-x)),
+                    ("neg", Scalar::Int(n)) => n.checked_neg().map(Scalar::Int).ok_or(Missing),
+                    ("abs", Scalar::F64(x)) => Ok(Scalar::F64(x.abs())),
+                    ("abs", Scalar::Int(n)) => n.checked_abs().map(Scalar::Int).ok_or(Missing),
+                    ("to_f64", Scalar::F64(x)) => Ok(Scalar::F64(x)),
+                    ("to_f64", Scalar::Int(n)) => Ok(Scalar::F64(n as f64)),
+                    ("to_int", Scalar::F64(x)) => Ok(Scalar::Int(x as i64)),
+                    ("to_int", Scalar::Int(n)) => Ok(Scalar::Int(n)),
+                    (_, other) => Err(Malformed(format!("{} expects a number, got {:?}", op, other))),
+                }
+            }
+            "add" | "sub" | "mul" | "div" | "rem" | "min" | "max" => {
+                arity(op, args, 2)?;
+                match (self.eval(&args[0])?, self.eval(&args[1])?) {
+                    (Scalar::F64(a), Scalar::F64(b)) => Ok(Scalar::F64(match op {
+                        "add" => a + b,
+                        "sub" => a - b,
+                        "mul" => a * b,
+                        "div" => a / b,
+                        "rem" => a % b,
+                        "min" => a.min(b),
+                        _ => a.max(b),
+                    })),
+                    (Scalar::Int(a), Scalar::Int(b)) => {
+                        // Overflow and division by zero would panic in Rust
+                        let result = match op {
+                            "add" => a.checked_add(b),
+                            "sub" => a.checked_sub(b),
+                            "mul" => a.checked_mul(b),
+                            "div" => a.checked_div(b),
+                            "rem" => a.checked_rem(b),
+                            "min" => Some(a.min(b)),
+                            _ => Some(a.max(b)),
+                        };
+                        result.map(Scalar::Int).ok_or(Missing)
+                    }
+                    (a, b) => Err(Malformed(format!("cannot apply {} to {:?} and {:?}", op, a, b))),
+                }
+            }
+            _ => Err(Malformed(format!("unknown operator {}", op))),
+        }
+    }
+
+    fn bool(&self, node: &Value) -> Result<bool, EvalError> {
+        match self.eval(node)? {
+            Scalar::Bool(b) => Ok(b),
+            other => Err(Malformed(format!("expected bool, got {:?}", other))),
+        }
+    }
+
+    fn path(&self, index: &Value) -> Result<Option<&'a Value>, EvalError> {
+        index
+            .as_u64()
+            .and_then(|i| self.resolved.get(i as usize))
+            .copied()
+            .ok_or_else(|| Malformed(format!("unknown path {}", index)))
+    }
+}
+
+fn arity(op: &str, args: &[Value], expected: usize) -> Result<(), EvalError> {
+    if args.len() == expected {
+        Ok(())
+    } else {
+        Err(Malformed(format!("{} takes {} operands, got {}", op, expected, args.len())))
+    }
+}
+
+fn constant(args: &[Value], convert: impl Fn(&Value) -> Option<Scalar>) -> EvalResult {
+    match args {
+        [value] => convert(value).ok_or_else(|| Malformed(format!("invalid constant {}", value))),
+        _ => Err(Malformed("constants take exactly one operand".to_string())),
+    }
+}
+
+/// Order two scalars. `None` means incomparable (NaN, or a JSON value of a
+/// different kind), which makes every comparison but `ne` false.
+fn compare(a: &Scalar, b: &Scalar, op: &str) -> Result<Option<Ordering>, EvalError> {
+    let ordering = match (a, b) {
+        (Scalar::F64(x), Scalar::F64(y)) => x.partial_cmp(y),
+        (Scalar::Int(x), Scalar::Int(y)) => Some(x.cmp(y)),
+        (Scalar::Str(x), Scalar::Str(y)) => Some(x.cmp(y)),
+        (Scalar::Bool(x), Scalar::Bool(y)) => Some(x.cmp(y)),
+        (Scalar::Json(_), _) | (_, Scalar::Json(_)) if op == "eq" || op == "ne" => {
+            // Mirrors serde_json's PartialEq impls between Value and primitives (an f64
+            // matches any number, an integer only an integer, 1 != 1.0 between Values);
+            // expression_eval.py pre-evaluates with the same rule
+            let equal = match (a, b) {
+                (Scalar::Json(x), Scalar::Json(y)) => x == y,
+                (Scalar::Json(v), other) | (other, Scalar::Json(v)) => match other {
+                    Scalar::F64(x) => v.as_f64() == Some(*x),
+                    Scalar::Int(n) => v.as_i64() == Some(*n),
+                    Scalar::Str(s) => v.as_str() == Some(s.as_str()),
+                    Scalar::Bool(b) => v.as_bool() == Some(*b),
+                    Scalar::Json(_) => unreachable!(),
+                },
+                _ => unreachable!(),
+            };
+            return Ok(if equal { Some(Ordering::Equal) } else { None });
+        }
+        _ => return Err(Malformed(format!("cannot compare {:?} with {:?} using {}", a, b, op))),
+    };
+    Ok(ordering)
+}
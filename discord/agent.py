@@ -6,7 +6,19 @@ import json
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 import io
-from gcp_client import GCPClient
+from gcp_client import GCPClient, cleanup_artifacts
+from prompt_builder import PromptBuilder, estimate_tokens, render_turn
+from rate_limit import get_limiter, PRIORITY_NEGOTIATION, PRIORITY_VERIFICATION, PRIORITY_SUMMARY
+from turn_pipeline import TurnPipeline
+from metrics import span
+from log_payload import payload
+from output_pipeline import get_output
+from briefing_ingest import ingest_attachments
+from briefing_index import BriefingIndex, BRIEFING_TOKEN_BUDGET, RETRIEVAL_QUERY_TURNS
+from field_index import FieldIndex
+from expression_eval import pre_evaluate, ExpressionError
+from predicate_ir import compile_program
+from proof_budget import get_budget, condition_shape, ProofPlan, BATCH, SKIP
 import logging
 
 # Configure logging
@@ -14,8 +26,13 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 MISTRAL_MODEL = "mistral-large-latest"
-REPLY_DELAY = 4 # second
-ONE_SECOND = 1 # second
+SUMMARY_MODEL = "mistral-small-latest"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))  # system prompt tokens
+MIN_HISTORY_TURNS = 2  # always keep the latest exchange
+COMPLETION_TOKEN_ALLOWANCE = 300  # tokens reserved for each completion
+STREAM_REPLIES = os.getenv("STREAM_REPLIES", "0") == "1"
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))  # seconds between message edits
+STREAM_CURSOR = "▌"  # marks a reply that is still streaming
 
 # Different personalities for the bots
 PERSONALITIES = {
@@ -42,26 +59,41 @@ Guidelines for negotiation:
 Keep all responses concise and under 100 words. You should be working towards the final goal to draft a deal."""
 }
 
+def _estimate_request_tokens(messages: List[Dict[str, str]]) -> int:
+    """Prompt token estimate plus room for the completion, for rate limiting"""
+    return sum(estimate_tokens(m["content"]) for m in messages) + COMPLETION_TOKEN_ALLOWANCE
+
 class MistralAgent:
-    def __init__(self, personality_key="bot1", bot_id: str = None, bot_name: str = None):
-        MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
-        self.client = Mistral(api_key=MISTRAL_API_KEY)
+    def __init__(self, personality_key="bot1", bot_id: str = None, bot_name: str = None,
+                 client: Optional[Mistral] = None, gcp_client: Optional[GCPClient] = None,
+                 memory_limit: Optional[int] = None):
+        # Sessions of one bot can share the Mistral and GCP clients and their connection pools
+        self.client = client or Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
         self.personality = PERSONALITIES.get(personality_key, PERSONALITIES["bot1"])
         self.bot_id = bot_id
         self.bot_name = bot_name or bot_id
         self.briefing_channel_id: Optional[int] = None
         self.negotiation_channel_id: Optional[int] = None
-        self.gcp_client = GCPClient()
+        self.gcp_client = gcp_client or GCPClient()
+        self.memory_limit = memory_limit  # approximate bytes of briefing and history, None = unlimited
+        self.prompt_builder = PromptBuilder(self.personality)
+        self.history_summary = ""  # Rolling summary of turns outside the window
+        self._pending_summary = []  # Evicted turns not yet summarized
+        self._summary_task: Optional[asyncio.Task] = None
         
         # State management
         self.conversation_history = []
+        self.turn_count = 0  # turns ever added, including ones trimmed from the history
         self.briefing_text = ""
         self.json_dicts = []
+        self.briefing_index = BriefingIndex()  # chunks of the briefing and documents, for retrieval
+        self.field_index = FieldIndex()  # typed leaf paths of json_dicts, for verification
         self.context = []
         self.negotiation_started = False
         self.first_bot_to_speak = None
         self.other_bot_id = None
-        self.first_verification = True  # Add as instance variable
+        self._background_tasks = set()  # Proof jobs still running for sent replies
+        self._json_bytes = 0  # size of the parsed JSON briefing files
         
     def set_channels(self, briefing_channel_id: int, negotiation_channel_id: int):
         """Set the channel IDs for this agent"""
@@ -72,63 +104,119 @@ class MistralAgent:
         """Set the ID of the other bot in the negotiation"""
         self.other_bot_id = other_bot_id
         
+    def add_turn(self, role: str, content: str, **extra) -> None:
+        """Append a turn to the conversation history"""
+        self.conversation_history.append({"role": role, "content": content, **extra})
+        self.turn_count += 1
+
     def get_conversation_text(self):
         """Format the conversation history into a text string"""
-        if not self.conversation_history:
-            return "No conversation yet."
-            
-        conversation_text = ""
-        for msg in self.conversation_history:
-            role = "User" if msg["role"] == "me" else "else"
-            conversation_text += f"{role}: {msg['content']}\n\n"
-        return conversation_text
+        self.prompt_builder.sync_history(self.conversation_history)
+        return self.prompt_builder.conversation_text
 
     def get_structured_context(self):
         """Format the context according to the required structure"""
-        structured_context = self.personality + "\n\n"
-        
-        # Add briefing information section
-        structured_context += "----(BRIEFING INFORMATION)------\n\n"
-        structured_context += self.briefing_text if self.briefing_text else "No briefing information available."
-        structured_context += "\n\n"
-        
-        # Add current conversation section
-        structured_context += "-----(CURRENT CONVERSATION)-------\n\n"
-        structured_context += self.get_conversation_text()
-        
-        return structured_context
+        # Only the briefing change or the new turns are rendered; the rest is cached
+        if self.briefing_index.tokens <= BRIEFING_TOKEN_BUDGET:
+            self.prompt_builder.set_briefing(self.briefing_text)
+            self.prompt_builder.set_documents(self.json_dicts)
+        else:
+            # Too large to send whole: only the excerpts relevant to the latest turns
+            query = " ".join(msg["content"] for msg in self.conversation_history[-RETRIEVAL_QUERY_TURNS:])
+            self.prompt_builder.set_briefing(self.briefing_index.render(query, BRIEFING_TOKEN_BUDGET))
+            self.prompt_builder.set_documents([])
+        self.prompt_builder.sync_history(self.conversation_history)
+        return self.prompt_builder.build()
+
+    @property
+    def budget_key(self):
+        """Proof budget account: both sides of one negotiation may run in one process"""
+        return (self.bot_id, self.negotiation_channel_id)
+
+    def memory_size(self) -> int:
+        """Approximate bytes held for the briefing, history and summary"""
+        history = sum(len(msg["content"]) for msg in self.conversation_history)
+        pending = sum(len(msg["content"]) for msg in self._pending_summary)
+        return len(self.briefing_text) + self._json_bytes + history + pending + len(self.history_summary)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Negotiation state that must survive a restart"""
+        return {
+            "briefing_text": self.briefing_text,
+            "json_dicts": self.json_dicts,
+            "context": self.context,
+            "conversation_history": self.conversation_history,
+            "turn_count": self.turn_count,
+            "history_summary": self.history_summary,
+            "pending_summary": self._pending_summary,
+            "negotiation_started": self.negotiation_started,
+            # The per-negotiation proof budget carries over a restart
+            "proof_cycles_spent": get_budget().spent(self.budget_key),
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Load state produced by snapshot() or replayed from the session journal"""
+        self.briefing_text = state["briefing_text"]
+        self.json_dicts = state["json_dicts"]
+        self.context = state["context"]
+        self.conversation_history = state["conversation_history"]
+        self.turn_count = state["turn_count"]
+        self.history_summary = state["history_summary"]
+        self._pending_summary = state["pending_summary"]
+        self.negotiation_started = state["negotiation_started"]
+        get_budget().restore_spent(self.budget_key, state.get("proof_cycles_spent", 0))
+        self._json_bytes = len(json.dumps(self.json_dicts))
+        self.briefing_index = BriefingIndex.build(
+            self.briefing_text, self.json_dicts,
+            [entry["data"]["message_content"] for entry in self.context if entry.get("source") == "briefing"]
+        )
+        self.field_index = FieldIndex()
+        self.field_index.sync(self.json_dicts)
+        self.prompt_builder.set_summary(self.history_summary)
+
+    def close(self) -> None:
+        """Release per-negotiation state when the session is evicted"""
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
+        get_budget().forget(self.budget_key)
 
     async def process_brief(self, message: discord.Message) -> None:
         """Process briefing content and update state"""            
+        if self.memory_limit and self.memory_size() + len(message.content) > self.memory_limit:
+            await get_output().send(message.channel, "⚠️ Briefing limit reached for this negotiation; message ignored.")
+            return
+
+        # Only what this message adds is echoed back
+        echo_start = len(self.briefing_text)
+
         # Add message content to briefing text if present
         if message.content:
             self.briefing_text += message.content + "\n"
+            # The briefer's own words are always kept in the prompt
+            self.briefing_index.add_text(message.content, pinned=True)
         
-        # Process any attached files
-        for attachment in message.attachments:
-            try:
-                content = await attachment.read()
-                if attachment.filename.endswith('.json'):
-                    try:
-                        content_str = content.decode('utf-8')
-                        json_data = json.loads(content_str)
-                        self.json_dicts.append(json_data)
-                        
-                        # Add the JSON content as text to the briefing text
-                        formatted_json = json.dumps(json_data, indent=2)
-                        self.briefing_text += f"\nFile: {attachment.filename}\n{formatted_json}\n"
-                    except json.JSONDecodeError:
-                        # If JSON parsing fails, store as raw text
-                        content_str = content.decode('utf-8')
-                        self.briefing_text += f"\nFile: {attachment.filename}\n{content_str}\n"
-                else:
-                    # Store non-JSON files as text
-                    content_str = content.decode('utf-8')
-                    self.briefing_text += f"\nFile: {attachment.filename}\n{content_str}\n"
-            except Exception as e:
-                error_msg = f"Warning: Could not process file {attachment.filename}: {str(e)}"
-                self.briefing_text += f"\n{error_msg}\n"
-                await message.channel.send(error_msg)
+        # Download and parse attached files concurrently, within the session's byte budget
+        budget = self.memory_limit - self.memory_size() if self.memory_limit else None
+        for file in await ingest_attachments(message.attachments, budget):
+            if file.error:
+                # Files refused by a size limit are not part of the briefing
+                if not file.skipped:
+                    self.briefing_text += f"\n{file.error}\n"
+                    self.briefing_index.add_text(file.error)
+                await get_output().send(message.channel, file.error)
+            elif file.documents:
+                # The prompt renders documents from json_dicts; the briefing only references them
+                first = len(self.json_dicts)
+                self.json_dicts.extend(file.documents)
+                self._json_bytes += file.size
+                indexes = f"json_dicts[{first}]" if len(file.documents) == 1 else f"json_dicts[{first}..{len(self.json_dicts) - 1}]"
+                self.briefing_text += f"\nFile: {file.filename} (JSON, {file.size:,} bytes) -> {indexes}\n"
+                self.briefing_index.add_documents(first, file.documents)
+                self.field_index.sync(self.json_dicts)
+            else:
+                # Store non-JSON files (and PDF text) as text
+                self.briefing_text += f"\nFile: {file.filename}\n{file.text}\n"
+                self.briefing_index.add_text(f"File: {file.filename}\n{file.text}")
         
         # Add context entry
         self.context.append({
@@ -144,94 +232,168 @@ class MistralAgent:
         status_msg = "✅ Information received and processed."
         if self.json_dicts:
             status_msg += f"\nStored JSON dictionaries: {len(self.json_dicts)}"
-        await message.channel.send(status_msg)
+        status_msg += f"\nBriefing size: {len(self.briefing_text):,} characters"
+        await get_output().send(message.channel, status_msg)
         
-        # Send briefing text in chunks if needed
-        if self.briefing_text:
-            max_chunk_size = 1900  # Discord's message limit with some buffer for formatting
-            chunks = [self.briefing_text[i:i+max_chunk_size] for i in range(0, len(self.briefing_text), max_chunk_size)]
+        # Echo only the text this message added; the full briefing was echoed piece by piece
+        await get_output().send_text(
+            message.channel, self.briefing_text[echo_start:],
+            title="Briefing added", filename="briefing_added.txt"
+        )
+
+    async def _check_attached_proof(self, message: discord.Message) -> bool:
+        """Return True if the message carries a verification data attachment that verifies"""
+        if len(message.attachments) != 2:
+            return False
+        try:
+            # Get the verification data file (second attachment)
+            verification_data = await message.attachments[1].read()
+            verification_json = json.loads(verification_data.decode('utf-8'))
             
-            for i, chunk in enumerate(chunks):
-                chunk_msg = f"briefing Text (Part {i+1}/{len(chunks)}):\n```\n{chunk}\n```"
-                await message.channel.send(chunk_msg)
+            # Call Rust function to verify proof
+            return await self.verify_proof_locally(verification_json)
+        except Exception as e:
+            logger.error(f"Error verifying proof: {e}")
+            return False
 
     async def handle_negotiation_message(self, message: discord.Message) -> None:
         """Handle incoming messages"""            
+        # A streamed reply is still being written; it is handled on its final edit
+        if message.content.endswith(STREAM_CURSOR):
+            return None
+        
+        turn = TurnPipeline()
+        
         # If message has two attachments, try to verify the proof
-        if len(message.attachments) == 2:
-            try:
-                # Get the verification data file (second attachment)
-                verification_data = await message.attachments[1].read()
-                verification_json = json.loads(verification_data.decode('utf-8'))
-                
-                # Call Rust function to verify proof
-                if await self.verify_proof_locally(verification_json):
-                    message.content = "Your proof verifies!\n" + message.content
-            except Exception as e:
-                logger.error(f"Error verifying proof: {e}")
+        if await turn.run("inbound_proof", self._check_attached_proof(message)):
+            message.content = "Your proof verifies!\n" + message.content
         
         if message.author.bot and message.author.id == int(self.other_bot_id):
             # Add message to conversation history
-            self.conversation_history.append({
-                "role": "them",
-                "content": message.content
-            })
+            self.add_turn("them", message.content, message_id=message.id)
                 
-            # Get response
-            response = await self.run()
-
-            # prevent rate limit
-            await asyncio.sleep(ONE_SECOND)
+            if STREAM_REPLIES:
+                # Stream the reply into a placeholder, then check its claims
+                sent, response = await turn.run("llm", self._stream_reply(message))
+                verification_file = await turn.run("expressions", self.verify_facts(response))
+            else:
+                # Get response
+                response = await turn.run("llm", self.run())
+                
+                # The reply does not depend on the verifiable statements,
+                # so send it while they are being generated
+                sent, verification_file = await asyncio.gather(
+                    turn.run("send", message.reply(response)),
+                    turn.run("expressions", self.verify_facts(response)),
+                )
             
-            # Generate verifiable statements to include in the response
-            verification_file = await self.verify_facts(response)
+            if verification_file:
+                # Read the expressions before sending, discord closes the file afterwards
+                verification_text = verification_file.fp.getvalue().decode('utf-8')
+                # edit() returns the updated message; keep it so its attachments are current
+                sent = await turn.run("attach", sent.edit(attachments=[verification_file]))
                 
-            # Send the response
-            if verification_file and self.first_verification == True:
-                self.first_verification = False
-                try:
-                    # Log the data being sent to GCP
-                    logger.info("Sending data to GCP:")
-                    logger.info(f"Response text: {response}")
-                    logger.info(f"Verification file content: {verification_file.fp.getvalue().decode('utf-8')}")
-                    logger.info(f"JSON dicts: {json.dumps(self.json_dicts, indent=2)}")
-                    
-                    # Call GCP function with verification file and json_dicts
-                    gcp_response = await self.gcp_client.call_gcp_function(
-                        verification_file=verification_file.fp.getvalue().decode('utf-8'),
-                        json_dicts=self.json_dicts
-                    )
-                    
-                    files = [verification_file]  # Start with verification file
-                    
-                    # Add verification data file if available
-                    if 'verification_data_file' in gcp_response:
-                        verification_data_file = discord.File(gcp_response['verification_data_file'])
-                        files.append(verification_data_file)
-                    
-                    # Add verification summary to response if available
-                    if 'verification_summary' in gcp_response:
-                        response += "\n\n" + gcp_response['verification_summary']
-                    
-                    # Send response with all files
-                    await message.reply(response, files=files)
-                    
-                    # Clean up the files
-                    if 'verification_data_file' in gcp_response:
-                        try:
-                            os.remove(gcp_response['verification_data_file'])
-                        except Exception as e:
-                            logger.error(f"Error cleaning up verification data file: {e}")
-                    
-                except Exception as e:
-                    logger.error(f"Error in GCP processing: {str(e)}")
-                    await message.reply(response, file=verification_file)
-            elif verification_file:
-                await message.reply(response, file=verification_file)
-            else:
-                await message.reply(response)
+                # Prove the claim if the cycle budget allows it, batched if only that fits
+                predicates = self._compile_predicates(verification_text)
+                shape = condition_shape(predicates, verification_text, self.json_dicts)
+                plan = get_budget().plan(self.budget_key, shape, can_batch=predicates is not None)
+                if plan.action != SKIP:
+                    # Prove in the background and attach the result once it lands,
+                    # so the reply does not wait on the prover
+                    task = turn.spawn("proof", self._attach_proof(sent, response, verification_text, predicates, plan))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._background_tasks.discard)
+            
+            turn.finish()
+            logger.info(f"Turn timings: {turn.report()}")
         return None
+
+    async def _stream_reply(self, message: discord.Message):
+        """Reply with a placeholder and edit the streamed text into it.
+
+        Edits are throttled to one per STREAM_EDIT_INTERVAL. While streaming
+        the content ends with STREAM_CURSOR; the final edit drops it, which
+        is the signal for the other bot to answer.
+
+        Returns:
+            The sent message and the full reply text
+        """
+        sent = await message.reply(STREAM_CURSOR)
+        loop = asyncio.get_running_loop()
+        last_edit = loop.time()
+        text = ""
+        async for text in self.run_stream():
+            if loop.time() - last_edit >= STREAM_EDIT_INTERVAL:
+                await sent.edit(content=text + STREAM_CURSOR)
+                last_edit = loop.time()
+        
+        sent = await sent.edit(content=text or "...")
+        return sent, text
+
+    @staticmethod
+    def _compile_predicates(verification_text: str) -> Optional[Dict[str, Any]]:
+        """Compile the expressions into a predicate program, None if they cannot be"""
+        try:
+            return compile_program(verification_text.splitlines())
+        except ExpressionError as e:
+            logger.warning(f"Sending text conditions only, could not compile predicates: {e}")
+            return None
+
+    async def _attach_proof(self, sent: discord.Message, response: str, verification_text: str,
+                            predicates: Optional[Dict[str, Any]], plan: ProofPlan) -> None:
+        """Run the proof job for a sent reply and edit the proof into it"""
+        gcp_response = {}
+        try:
+            # Payloads are capped and formatted only if the record is emitted
+            logger.info("Proving claim over %d documents: %s", len(self.json_dicts), payload(verification_text))
+            logger.debug("Reply being proven: %s", payload(response))
+            
+            # Submit the proof job with verification file, json_dicts and predicate program
+            gcp_response = await self.gcp_client.prove(
+                verification_file=verification_text,
+                json_dicts=self.json_dicts,
+                predicates=predicates,
+                batch=True if plan.action == BATCH else None
+            )
+            get_budget().settle(plan, gcp_response)
+            if not gcp_response:
+                return
+            
+            # Add verification summary to response if available
+            content = response
+            if 'verification_summary' in gcp_response:
+                content += "\n\n" + gcp_response['verification_summary']
+            
+            # Keep verification.txt and add the verification data file if available
+            attachments = list(sent.attachments)
+            if 'verification_data_file' in gcp_response:
+                attachments.append(discord.File(
+                    gcp_response['verification_data_file'],
+                    filename="verification_data.json"
+                ))
+            
+            await sent.edit(content=content, attachments=attachments)
+        except Exception as e:
+            logger.error(f"Error in GCP processing: {str(e)}")
+        finally:
+            # Clean up the files
+            cleanup_artifacts(gcp_response)
+
+    async def handle_negotiation_edit(self, before: discord.Message, after: discord.Message) -> None:
+        """Handle the other bot finishing a streamed reply or editing a proof into one"""
+        # The final edit of a streamed reply is the actual message
+        if before.content.endswith(STREAM_CURSOR) and not after.content.endswith(STREAM_CURSOR):
+            await self.handle_negotiation_message(after)
+            return
         
+        if len(before.attachments) >= 2 or not await self._check_attached_proof(after):
+            return
+        for msg in self.conversation_history:
+            if msg.get("message_id") == after.id:
+                msg["content"] = "Your proof verifies!\n" + msg["content"]
+                self.prompt_builder.invalidate()
+                break
+
     async def verify_proof_locally(self, verification_data: Dict[str, Any]) -> bool:
         """Verify a proof locally using Rust verification function"""
         try:
@@ -247,43 +409,141 @@ class MistralAgent:
             logger.error(f"Error in local verification: {e}")
             return False
 
-    async def run(self) -> str:
-        """Generate a response based on current state"""
-        # Add delay before responding
-        await asyncio.sleep(REPLY_DELAY)
-
-        # Keep only last 30 messages to keep context manageable
-        if len(self.conversation_history) > 30:
-            self.conversation_history = self.conversation_history[-30:]
+    def _build_messages(self) -> List[Dict[str, str]]:
+        """Build the chat messages for the next reply"""
+        # Keep the prompt within the token budget; older turns go to the summary
+        self.apply_history_budget()
 
         # Construct structured context
         system_prompt = self.get_structured_context()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"System prompt size: ~{estimate_tokens(system_prompt)} tokens")
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
         ]
 
-        # Make API call to get response
-        response = await self.client.chat.complete_async(
+    async def run(self) -> str:
+        """Generate a response based on current state"""
+        messages = self._build_messages()
+
+        # Make API call to get response; the shared limiter paces all Mistral calls
+        response = await get_limiter().call(
+            self.client.chat.complete_async,
             model=MISTRAL_MODEL,
             messages=messages,
+            priority=PRIORITY_NEGOTIATION,
+            tokens=_estimate_request_tokens(messages),
         )
 
         # Extract bot's response
         bot_response = response.choices[0].message.content
         
         # Add bot's response to history
-        self.conversation_history.append({
-            "role": "me",
-            "content": bot_response
-        })
+        self.add_turn("me", bot_response)
 
         return bot_response
+
+    async def run_stream(self):
+        """Generate a response with the streaming API.
+
+        Yields the reply text accumulated so far after every chunk; the
+        complete reply is added to the history once the stream ends.
+        """
+        messages = self._build_messages()
+
+        stream = await get_limiter().call(
+            self.client.chat.stream_async,
+            model=MISTRAL_MODEL,
+            messages=messages,
+            priority=PRIORITY_NEGOTIATION,
+            tokens=_estimate_request_tokens(messages),
+        )
+
+        bot_response = ""
+        async for chunk in stream:
+            delta = chunk.data.choices[0].delta.content
+            if isinstance(delta, str) and delta:
+                bot_response += delta
+                yield bot_response
+
+        # Add bot's response to history
+        self.add_turn("me", bot_response)
+        
+    def apply_history_budget(self) -> None:
+        """Trim history to the turns that fit in the context token budget.
+
+        The personality, briefing and running summary are always included;
+        the newest turns fill the rest of the budget (at least
+        MIN_HISTORY_TURNS of them). Turns that fall out of the window are
+        handed to a background task that folds them into the summary.
+        """
+        fixed = (
+            estimate_tokens(self.personality)
+            # Larger briefings are cut down to BRIEFING_TOKEN_BUDGET by retrieval
+            + min(self.briefing_index.tokens, BRIEFING_TOKEN_BUDGET)
+            + estimate_tokens(self.history_summary)
+        )
+        available = CONTEXT_TOKEN_BUDGET - fixed
         
+        used = 0
+        keep = 0
+        for msg in reversed(self.conversation_history):
+            cost = estimate_tokens(render_turn(msg))
+            if keep >= MIN_HISTORY_TURNS and used + cost > available:
+                break
+            used += cost
+            keep += 1
+        
+        cut = len(self.conversation_history) - keep
+        if cut <= 0:
+            return
+        self._pending_summary.extend(self.conversation_history[:cut])
+        self.conversation_history = self.conversation_history[cut:]
+        
+        if self._summary_task is None or self._summary_task.done():
+            self._summary_task = asyncio.create_task(self._fold_into_summary())
+
+    async def _fold_into_summary(self) -> None:
+        """Fold turns that left the history window into the rolling summary"""
+        while self._pending_summary:
+            evicted = self._pending_summary
+            self._pending_summary = []
+            turns = "".join(render_turn(msg) for msg in evicted)
+            prompt = f"""Update the running summary of a negotiation with the turns below.
+Keep every offer, number, deadline, condition and commitment either side made.
+Write at most 150 words of plain text. Output only the updated summary.
+
+Current summary:
+{self.history_summary or "(none)"}
+
+New turns ("User" is us, "else" is the other party):
+{turns}"""
+            try:
+                messages = [{"role": "user", "content": prompt}]
+                with span("summary"):
+                    response = await get_limiter().call(
+                        self.client.chat.complete_async,
+                        model=SUMMARY_MODEL,
+                        messages=messages,
+                        temperature=0.0,
+                        priority=PRIORITY_SUMMARY,
+                        tokens=_estimate_request_tokens(messages),
+                    )
+                self.history_summary = response.choices[0].message.content.strip()
+                self.prompt_builder.set_summary(self.history_summary)
+            except Exception as e:
+                # Keep the turns so the next eviction retries them
+                logger.error(f"Error updating conversation summary: {e}")
+                self._pending_summary = evicted + self._pending_summary
+                return
+
     async def verify_facts(self, response_text: str) -> Optional[discord.File]:
         """Verify facts in a response against JSON dictionaries"""
         if not self.json_dicts:
             return None
+        # Indexed at ingest; this only catches documents set without process_brief
+        self.field_index.sync(self.json_dicts)
             
         # Create a prompt for the verification
         prompt = f"""You are a verification assistant that emits only executable Rust expressions
@@ -297,6 +557,12 @@ Inputs you receive (in a single user message):
 
 - A natural‑language claim about some briefing data. The claim is to be treated as honest and literal.
 - A Rust variable called json_dicts already in scope, which is a Vec<HashMap<String, serde_json::Value>>.
+- The fields of json_dicts relevant to the claim, one per line as `path: type = value`, e.g.
+json_dicts[1].signed_data.data.offer_amount: f64 = 1456000
+Write that path as json_dicts[1]["signed_data"].get("data").unwrap().get("offer_amount").unwrap().as_f64().unwrap():
+the first key in ["..."], later keys with .get("...").unwrap(), list positions [n] with .get(n).unwrap(),
+then .as_f64().unwrap() for f64, .as_str().unwrap() for str and .as_bool().unwrap() for bool.
+Only use paths from this list.
 
 Task:
 • Parse the claim and decide which fields of json_dicts can prove or disprove it, IF ANY
@@ -336,15 +602,19 @@ Now your turn, here is your data.
 Response to verify:
 {response_text}
 
-Available JSON data:
-{json.dumps(self.json_dicts, indent=2)}
+Available fields:
+{self.field_index.view(response_text)}
 """
 
         # Make API call
-        response = await self.client.chat.complete_async(
+        messages = [{"role": "user", "content": prompt}]
+        response = await get_limiter().call(
+            self.client.chat.complete_async,
             model=MISTRAL_MODEL,
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
             temperature=0.0,  # Use low temperature for deterministic output
+            priority=PRIORITY_VERIFICATION,
+            tokens=_estimate_request_tokens(messages),
         )
         
         # Parse the response - now expecting raw Python expressions
@@ -357,8 +627,8 @@ Available JSON data:
         # Remove any markdown code blocks if present
         content = content.strip("```python").strip("```").strip()
         
-        # Split into lines and filter out empty lines
-        expressions = [line.strip() for line in content.split("\n") if line.strip()]
+        # Evaluate the expressions locally; only well-formed, true claims are worth proving
+        expressions = pre_evaluate(content, self.json_dicts)
         
         # If no expressions after filtering, return None
         if not expressions:
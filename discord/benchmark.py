@@ -0,0 +1,387 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import inspect
+import logging
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from agent import MistralAgent
+from gcp_client import GCPClient, cleanup_artifacts
+from prompt_builder import PromptBuilder
+from proof_cache import ProofCache
+from rate_limit import MistralRateLimiter, set_limiter
+from output_pipeline import OutputPipeline, set_output
+from simulator import (OFFER_PATH, ScriptedMistral, SimAttachment, SimChannel, SimMessage, SimUser,
+                       StubProofServer, percentile)
+
+logger = logging.getLogger(__name__)
+
+# Benchmarks for the agent, GCP client, PDF and signing hot paths.
+#
+#   python benchmark.py --output bench.json
+#   python benchmark.py --baseline bench.json   # exit 1 on regressions
+#   python benchmark.py --save-baseline bench.json --filter context
+
+DEFAULT_TOLERANCE = 0.25  # a case regresses when its mean is this much slower than the baseline
+
+CASES: Dict[str, Callable[[bool], Awaitable[Dict[str, Any]]]] = {}
+
+
+def case(name: str):
+    """Register a benchmark case; it returns {result name: stats}"""
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+class SkipCase(Exception):
+    """A case cannot run here, e.g. an optional dependency is missing"""
+
+
+async def measure(fn: Callable[..., Any], repeat: int, setup: Optional[Callable[[], tuple]] = None) -> Dict[str, float]:
+    """Time `fn(*setup())` `repeat` times; setup is not timed"""
+    samples = []
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+        start = time.perf_counter()
+        result = fn(*args)
+        if inspect.isawaitable(result):
+            await result
+        samples.append(time.perf_counter() - start)
+    mean = sum(samples) / len(samples)
+    return {
+        "runs": repeat,
+        "mean_ms": round(mean * 1000, 4),
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p90_ms": round(percentile(samples, 90) * 1000, 4),
+        "min_ms": round(min(samples) * 1000, 4),
+        "ops_per_sec": round(1 / mean, 1) if mean else 0.0,
+    }
+
+
+class FixedMistral:
+    """Mistral stand-in that always answers with the same content"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.chat = self
+
+    async def complete_async(self, **kwargs):
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def _agent(client=None) -> MistralAgent:
+    return MistralAgent(client=client or ScriptedMistral(), gcp_client=_shared_gcp_client())
+
+
+_gcp_client: Optional[GCPClient] = None
+
+
+def _shared_gcp_client() -> GCPClient:
+    """An unused client for agents that never prove, so each agent does not open a cache"""
+    global _gcp_client
+    if _gcp_client is None:
+        _gcp_client = GCPClient()
+    return _gcp_client
+
+
+def _offers(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "signed_data": {
+                "signer": f"Signer {i}",
+                "data": {"offer_amount": 1_000_000 + 1_000 * i, "closing_days": 30 + i % 60,
+                         "conditions": ["inspection", "financing"], "notes": "x" * 200},
+            },
+            "signature": "ab" * 128,
+        }
+        for i in range(count)
+    ]
+
+
+@case("context")
+async def bench_context(quick: bool) -> Dict[str, Any]:
+    """get_structured_context from scratch and after one new turn, for growing histories and briefings"""
+    results = {}
+    for turns in ((10, 100) if quick else (10, 100, 1000)):
+        for briefing_kb in (1, 64):
+            agent = _agent()
+            agent.briefing_text = "Offer details and constraints. " * (briefing_kb * 32)
+            for i in range(turns):
+                agent.add_turn("them" if i % 2 else "me", f"Turn {i}: I can do ${1_000_000 + i * 500:,} with a 30-day close.")
+            label = f"turns={turns},briefing_kb={briefing_kb}"
+
+            def rebuild():
+                agent.prompt_builder = PromptBuilder(agent.personality)
+                agent.get_structured_context()
+
+            def incremental():
+                agent.add_turn("them", "One more counteroffer at $1,250,000.")
+                agent.get_structured_context()
+
+            results[f"cold[{label}]"] = await measure(rebuild, 5 if quick else 20)
+            agent.get_structured_context()
+            results[f"incremental[{label}]"] = await measure(incremental, 20 if quick else 100)
+    return results
+
+
+@case("process_brief")
+async def bench_process_brief(quick: bool) -> Dict[str, Any]:
+    """process_brief with large JSON attachments, including the briefing echo"""
+    results = {}
+    for documents in ((100, 1000) if quick else (100, 1000, 10000)):
+        data = json.dumps(_offers(documents)).encode('utf-8')
+        user = SimUser(1)
+
+        def setup():
+            channel = SimChannel(1)
+            message = SimMessage(channel, user, "Sell above $1.2M.", [SimAttachment("offers.json", data)])
+            return _agent(), message
+
+        async def brief(agent, message):
+            await agent.process_brief(message)
+
+        results[f"json_kb={len(data) // 1024}"] = await measure(brief, 3 if quick else 5, setup)
+    return results
+
+
+@case("verify_facts")
+async def bench_verify_facts(quick: bool) -> Dict[str, Any]:
+    """verify_facts prompt building and parsing of the returned expressions"""
+    results = {}
+    json_dicts = _offers(20)
+    for lines in (1, 10, 50):
+        content = "\n".join(f"json_dicts[{i % 20}]{OFFER_PATH} > 900000.0" for i in range(lines))
+        agent = _agent(FixedMistral(f"```python\n{content}\n```"))
+        agent.json_dicts = json_dicts
+        reply = "I have two offers above $900,000 with a 30-day close."
+        results[f"expressions={lines}"] = await measure(lambda: agent.verify_facts(reply), 20 if quick else 100)
+    return results
+
+
+async def _serve(stub: StubProofServer):
+    """Serve the stub verification server over HTTP on a free local port"""
+    try:
+        from aiohttp import web
+    except ImportError as e:
+        raise SkipCase(f"aiohttp unavailable: {e}")
+
+    async def handler(request):
+        body = await request.json() if request.can_read_body else None
+        try:
+            result = await stub.handle(request.method, str(request.url), json=body, params=dict(request.query))
+        except (KeyError, ValueError) as e:
+            return web.json_response({"error": str(e)}, status=404)
+        return web.json_response(result)
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}/api/process"
+
+
+@case("gcp_client")
+async def bench_gcp_client(quick: bool) -> Dict[str, Any]:
+    """GCPClient.prove round trips against a local stand-in server, uncached and cached"""
+    runner, endpoint = await _serve(StubProofServer(latency=0.0))
+    client = GCPClient()
+    client.gcp_endpoint = endpoint
+    client.jobs_endpoint = endpoint.replace("/process", "/jobs")
+    client.batch_endpoint = endpoint.replace("/process", "/process_batch")
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client.cache = ProofCache(cache_dir=cache_dir)
+            json_dicts = _offers(4)
+            thresholds = iter(range(10 ** 9))
+
+            async def prove(conditions):
+                cleanup_artifacts(await client.prove(conditions, json_dicts))
+
+            def unique():
+                return (f"json_dicts[0]{OFFER_PATH} > {next(thresholds)}.0",)
+
+            def repeated():
+                return (f"json_dicts[0]{OFFER_PATH} > 900000.0",)
+
+            repeat = 20 if quick else 200
+            results["uncached"] = await measure(prove, repeat, unique)
+            await prove(*repeated())
+            results["cached"] = await measure(prove, repeat, repeated)
+    finally:
+        await client.close()
+        await runner.cleanup()
+    return results
+
+
+def _make_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """A text PDF with `pages` pages of Helvetica lines"""
+    objects: List[Optional[bytes]] = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    catalog, pages_id, font = 1, 2, 3
+    kids = []
+    for page in range(pages):
+        text = b"BT /F1 10 Tf 12 TL 72 750 Td " + b"".join(
+            b"(Page %d line %d: offer amount 1250000, closing in 30 days) '" % (page, line)
+            for line in range(lines_per_page)
+        ) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+        content = len(objects)
+        objects.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font, content))
+        kids.append(len(objects))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def _pdf_bot():
+    """PDFBot without a Discord connection, for its extraction and signing methods"""
+    # pdf_bot checks its environment at import time
+    for name in ("DISCORD_TOKEN_BOT3", "MISTRAL_API_KEY", "SIGNATURES_CHANNEL_ID"):
+        os.environ.setdefault(name, "1")
+    try:
+        import pdf_bot
+    except ImportError as e:
+        raise SkipCase(f"PDF dependencies unavailable: {e}")
+    return pdf_bot.PDFBot.__new__(pdf_bot.PDFBot)
+
+
+@case("pdf")
+async def bench_pdf(quick: bool) -> Dict[str, Any]:
+    """PDFBot.extract_pdf_content on multi-hundred-page PDFs"""
+    bot = _pdf_bot()
+    try:
+        import PyPDF2  # pdf_text imports it only when extracting
+    except ImportError as e:
+        raise SkipCase(f"PyPDF2 unavailable: {e}")
+    results = {}
+    for pages in ((100,) if quick else (100, 500)):
+        data = _make_pdf(pages)
+        results[f"pages={pages}"] = await measure(lambda: bot.extract_pdf_content(data), 2 if quick else 3)
+    return results
+
+
+@case("signing")
+async def bench_signing(quick: bool) -> Dict[str, Any]:
+    """KeyManager key loading and PDFBot.sign_data throughput"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # KeyManager keeps its keys in ./keys
+        os.chdir(workdir)
+        try:
+            bot = _pdf_bot()
+            from key_manager import KeyManager
+            bot.key_manager = KeyManager()
+            results = {"generate_key_pair": await measure(
+                lambda: bot.key_manager.generate_key_pair(f"Signer {len(bot.key_manager.private_keys)}"),
+                2 if quick else 5)}
+            results["load"] = await measure(KeyManager, 20 if quick else 100)
+            results["get_private_key"] = await measure(lambda: bot.key_manager.get_private_key("Signer 0"),
+                                                       20 if quick else 100)
+            document = _offers(1)[0]["signed_data"]["data"]
+            results["sign_data"] = await measure(lambda: bot.sign_data(document, "Signer 0"), 20 if quick else 100)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+async def run_cases(names: List[str], quick: bool) -> Dict[str, Any]:
+    # Stand-in clients answer instantly; do not throttle them to the API's rate
+    set_limiter(MistralRateLimiter(requests_per_second=1e9, tokens_per_minute=10 ** 12))
+    set_output(OutputPipeline(burst=0))
+    results: Dict[str, Any] = {}
+    for name in names:
+        try:
+            for result, stats in (await CASES[name](quick)).items():
+                results[f"{name}.{result}"] = stats
+        except SkipCase as e:
+            logger.warning(f"Skipping {name}: {e}")
+            results[name] = {"skipped": str(e)}
+    if _gcp_client is not None:
+        await _gcp_client.close()
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print mean times against a baseline run and return the names of regressed results"""
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get("results", {}).get(name, {})
+        if "mean_ms" not in stats or "mean_ms" not in before:
+            continue
+        change = stats["mean_ms"] / before["mean_ms"] - 1 if before["mean_ms"] else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:60} {before['mean_ms']:12.3f} {stats['mean_ms']:12.3f} ms {change:+8.1%}{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the negotiation hot paths")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer runs")
+    parser.add_argument("--output", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--save-baseline", help="also write the results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    names = [name for name in CASES if args.filter in name]
+    report = {
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": asyncio.run(run_cases(names, args.quick)),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report["results"], json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} results regressed by more than {args.tolerance:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
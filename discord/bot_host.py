@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord.ext import commands
+from dotenv import load_dotenv
+from mistralai import Mistral
+from agent import MistralAgent, PERSONALITIES
+from gcp_client import GCPClient
+from session_manager import SessionManager, negotiation_key, SESSION_MAX_BYTES
+from session_journal import SessionJournal, SESSION_JOURNAL_DIR
+from rate_limit import get_limiter
+from proof_budget import get_budget
+from metrics import get_metrics, start_metrics_server
+from output_pipeline import get_output
+
+logger = logging.getLogger(__name__)
+
+BOT_HOST_CONFIG = os.getenv("BOT_HOST_CONFIG", "bots.json")
+
+
+class BotIdentity:
+    """One negotiator bot: its Discord login, personality and channels"""
+
+    def __init__(self, name: str, prefix: str, token: str, personality: str, bot_id: str,
+                 other_bot_id: str, briefing_channel_id: int, negotiation_channel_id: int,
+                 welcome_message: Optional[str] = None):
+        if personality not in PERSONALITIES:
+            raise ValueError(f"{name}: unknown personality {personality!r}")
+        self.name = name
+        self.prefix = prefix
+        self.token = token
+        self.personality = personality
+        self.bot_id = bot_id
+        self.other_bot_id = other_bot_id
+        self.briefing_channel_id = int(briefing_channel_id)
+        self.negotiation_channel_id = int(negotiation_channel_id)
+        self.welcome_message = welcome_message or f"Hi! I'm {name}. Let's work out a deal!"
+
+    @classmethod
+    def from_config(cls, entry: Dict[str, Any]) -> "BotIdentity":
+        """Build an identity from a config entry; "${VAR}" in values reads the environment"""
+        values = {key: os.path.expandvars(value) if isinstance(value, str) else value
+                  for key, value in entry.items()}
+        missing = [key for key, value in values.items() if isinstance(value, str) and "${" in value]
+        if missing:
+            raise ValueError(f"{values.get('name', 'bot')}: unset environment variables in {', '.join(missing)}")
+        return cls(**values)
+
+
+class NegotiatorBot(commands.Bot):
+    """Discord bot running one negotiator identity.
+
+    Several of these can share one event loop, Mistral client and GCP
+    client (with its proof cache); the rate limiter and proof budget are
+    process-wide already.
+    """
+
+    def __init__(self, identity: BotIdentity, mistral_client: Optional[Mistral] = None,
+                 gcp_client: Optional[GCPClient] = None, ignored_prefixes=("!", "?")):
+        super().__init__(command_prefix=identity.prefix, intents=discord.Intents.all())
+        self.identity = identity
+        self.mistral_client = mistral_client or Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+        self.gcp_client = gcp_client or GCPClient()
+        # Commands addressed to any hosted bot are not negotiation or briefing content
+        self.ignored_prefixes = tuple(ignored_prefixes)
+        # One agent per negotiation; sessions survive reconnects, and restarts when journaling is enabled
+        self.sessions = SessionManager(self.create_agent, on_evict=self._end_session)
+        self.journal: Optional[SessionJournal] = None
+        self._restored: Dict[int, Dict[str, Any]] = {}
+        if SESSION_JOURNAL_DIR:
+            self.journal = SessionJournal(identity.bot_id or identity.name.replace(" ", "_"))
+            self._restored = self.journal.load()
+            for key in list(self._restored):
+                self.sessions.get_or_create(key)
+        self._register_commands()
+
+    def create_agent(self, negotiation_id: int) -> MistralAgent:
+        """Create the agent for one negotiation channel or thread"""
+        agent = MistralAgent(
+            personality_key=self.identity.personality,
+            bot_id=self.identity.bot_id,
+            bot_name=self.identity.name,
+            client=self.mistral_client,
+            gcp_client=self.gcp_client,
+            memory_limit=SESSION_MAX_BYTES
+        )
+        agent.set_channels(self.identity.briefing_channel_id, negotiation_id)
+        agent.set_other_bot(self.identity.other_bot_id)
+        state = self._restored.pop(negotiation_id, None)
+        if state is not None:
+            agent.restore(state)
+        return agent
+
+    def record(self, key: int, agent: MistralAgent) -> None:
+        """Journal what a handler changed in the session"""
+        if self.journal is not None:
+            self.journal.record(key, agent.snapshot(), self.sessions.items)
+
+    def _end_session(self, key: int, agent: MistralAgent) -> None:
+        agent.close()
+        if self.journal is not None:
+            self.journal.end(key)
+
+    def session_key(self, channel) -> Optional[int]:
+        """Session id for a briefing or negotiation channel or thread, None otherwise"""
+        return negotiation_key(channel, self.identity.briefing_channel_id,
+                               self.get_channel(self.identity.negotiation_channel_id))
+
+    async def setup_hook(self):
+        metrics = get_metrics()
+        metrics.gauge("negotiator_sessions", lambda: len(self.sessions), bot=self.identity.name)
+        metrics.gauge("negotiator_mistral_queue_depth", lambda: get_limiter().queue_depth)
+        metrics.gauge("negotiator_proof_budget_hourly_cycles", lambda: get_budget().stats()["hourly_cycles"])
+        # Hosted bots share one endpoint; only the first call starts it
+        await start_metrics_server()
+
+    async def on_ready(self):
+        logger.info(f"{self.user} ({self.identity.name}) has connected to Discord!")
+
+    async def on_message(self, message: discord.Message):
+        await self.process_commands(message)
+
+        # Ignore messages from self and commands
+        if message.author.id == self.user.id or message.content.startswith(self.ignored_prefixes):
+            return
+
+        key = self.session_key(message.channel)
+        briefing_id = self.identity.briefing_channel_id
+
+        # Handle messages in briefing channel
+        if message.channel.id == briefing_id or getattr(message.channel, "parent_id", None) == briefing_id:
+            if key is None:
+                await message.channel.send("Create a negotiation thread with the same name as this thread first.")
+                return
+            agent = self.sessions.get_or_create(key)
+            try:
+                await agent.process_brief(message)
+            finally:
+                self.record(key, agent)
+            return
+
+        # Handle messages in negotiation channel
+        if key is not None and message.author.bot and message.author.id == int(self.identity.other_bot_id):
+            agent = self.sessions.get_or_create(key)
+            try:
+                await agent.handle_negotiation_message(message)
+            finally:
+                self.record(key, agent)
+
+    async def on_message_edit(self, before: discord.Message, after: discord.Message):
+        # Proofs are edited into negotiation replies once the prover finishes
+        if after.author.id != int(self.identity.other_bot_id):
+            return
+        agent = self.sessions.get(self.session_key(after.channel))
+        if agent and agent.negotiation_channel_id == after.channel.id:
+            try:
+                await agent.handle_negotiation_edit(before, after)
+            finally:
+                self.record(agent.negotiation_channel_id, agent)
+
+    def _register_commands(self) -> None:
+        @self.command(name="start")
+        async def start_negotiation(ctx):
+            """Start the negotiation with this bot initiating the conversation"""
+            key = self.session_key(ctx.channel)
+            if key != ctx.channel.id:
+                await ctx.send("This command can only be used in the negotiation channel or its threads.")
+                return
+
+            agent = self.sessions.get_or_create(key)
+            if agent.negotiation_started:
+                await ctx.send("Negotiation has already started.")
+                return
+
+            # Mark negotiation as started
+            agent.negotiation_started = True
+
+            # Add welcome message to conversation history
+            agent.add_turn("me", self.identity.welcome_message)
+            self.record(key, agent)
+
+            await ctx.send(self.identity.welcome_message)
+
+        @self.command(name="transcript")
+        async def show_transcript(ctx):
+            """Show the conversation transcript"""
+            agent = self.sessions.get(self.session_key(ctx.channel))
+            if agent is None:
+                return
+
+            # Paged at line breaks, or sent as a file when long
+            await get_output().send_text(ctx.channel, agent.get_conversation_text(),
+                                         title="Transcript", filename="transcript.txt")
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """Read the host config: {"bots": [identity, ...], "pdf_bot": bool}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config.get("bots"), list):
+        raise ValueError(f"{path}: expected a \"bots\" list")
+    return config
+
+
+async def run_bots(identities: List[BotIdentity], pdf_bot: bool = False) -> None:
+    """Run every identity (and optionally the PDF signing bot) in this event loop"""
+    mistral_client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+    gcp_client = GCPClient()
+    prefixes = {"!", "?"} | {identity.prefix for identity in identities}
+    bots = [NegotiatorBot(identity, mistral_client, gcp_client, sorted(prefixes))
+            for identity in identities]
+    runs = [bot.start(identity.token) for bot, identity in zip(bots, identities)]
+    if pdf_bot:
+        # Imported only when hosted, as it requires its own environment variables
+        import pdf_bot as pdf
+        intents = discord.Intents.default()
+        intents.message_content = True
+        signer = pdf.PDFBot(intents=intents, mistral_client=mistral_client)
+        bots.append(signer)
+        runs.append(signer.start(pdf.DISCORD_TOKEN))
+    logger.info(f"Hosting {len(bots)} bots")
+    try:
+        await asyncio.gather(*runs)
+    finally:
+        await asyncio.gather(*(bot.close() for bot in bots), return_exceptions=True)
+        for bot in bots:
+            if getattr(bot, "journal", None) is not None:
+                bot.journal.close()
+        await gcp_client.close()
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    load_dotenv()
+    path = sys.argv[1] if len(sys.argv) > 1 else BOT_HOST_CONFIG
+    config = load_config(path)
+    identities = [BotIdentity.from_config(entry) for entry in config["bots"]]
+    asyncio.run(run_bots(identities, pdf_bot=bool(config.get("pdf_bot"))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import re
+import math
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from prompt_builder import estimate_tokens, render_document
+
+logger = logging.getLogger(__name__)
+
+# Briefings up to this many tokens go into the prompt whole; larger ones are retrieved from
+BRIEFING_TOKEN_BUDGET = int(os.getenv("BRIEFING_TOKEN_BUDGET", "2000"))
+BRIEFING_CHUNK_CHARS = int(os.getenv("BRIEFING_CHUNK_CHARS", "800"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "12"))
+RETRIEVAL_QUERY_TURNS = 4  # latest turns the query is built from
+PINNED_SHARE = 0.5  # at most this share of the budget goes to the briefer's own messages
+BM25_K1 = 1.2
+BM25_B = 0.75
+EXCERPT_NOTE = "(Excerpts of the briefing most relevant to the conversation.)\n\n"
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[._][a-z0-9]+)*")
+_SEPARATORS = ("\n\n", "\n", "},{", ",", " ")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words and numbers; dotted and underscored names stay whole"""
+    return _TOKEN.findall(text.lower())
+
+
+def split_chunks(text: str, size: int = BRIEFING_CHUNK_CHARS) -> List[str]:
+    """Split text into pieces of about `size` characters at the coarsest break available"""
+    pieces = []
+    while len(text) > size:
+        cut = size
+        for separator in _SEPARATORS:
+            position = text.rfind(separator, size // 2, size)
+            if position > 0:
+                cut = position + (1 if separator == "},{" else len(separator))
+                break
+        pieces.append(text[:cut])
+        text = text[cut:]
+    if text.strip():
+        pieces.append(text)
+    return [piece for piece in pieces if piece.strip()]
+
+
+class BriefingIndex:
+    """BM25 index over a negotiation's briefing chunks.
+
+    Briefing messages, file text and JSON documents are split into chunks
+    of about BRIEFING_CHUNK_CHARS as they are ingested, and each chunk's
+    terms are added to an inverted index. `render` picks the chunks that
+    best match the latest turns and fit a token budget; the briefer's own
+    messages are pinned so instructions are never ranked away.
+    """
+
+    def __init__(self, chunk_chars: int = BRIEFING_CHUNK_CHARS):
+        self.chunk_chars = chunk_chars
+        self.chunks: List[str] = []
+        self.pinned: List[bool] = []
+        self.tokens = 0  # estimated prompt tokens of every chunk
+        self._lengths: List[int] = []
+        self._total_length = 0
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._rendered: Optional[Tuple[str, int, int, str]] = None  # query, budget, chunks, text
+
+    @classmethod
+    def build(cls, briefing_text: str, json_dicts: List[Any], messages: Iterable[str] = ()) -> "BriefingIndex":
+        """Index restored state; `messages` are the briefer's messages to pin"""
+        index = cls()
+        for message in messages:
+            if message:
+                index.add_text(message, pinned=True)
+                # The briefing text holds each message too; index it once
+                briefing_text = briefing_text.replace(message + "\n", "", 1)
+        index.add_text(briefing_text)
+        index.add_documents(0, json_dicts)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def add_text(self, text: str, pinned: bool = False) -> None:
+        for piece in split_chunks(text, self.chunk_chars):
+            self._add(piece, pinned)
+
+    def add_documents(self, first: int, documents: List[Any]) -> None:
+        """Index documents stored at json_dicts[first:]"""
+        for offset, document in enumerate(documents):
+            index = first + offset
+            for i, piece in enumerate(split_chunks(render_document(index, document), self.chunk_chars)):
+                # Continuations keep the document's index so excerpts can still be cited
+                self._add(piece if i == 0 else f"json_dicts[{index}] (cont.): {piece}", False)
+
+    def _add(self, text: str, pinned: bool) -> None:
+        chunk_id = len(self.chunks)
+        terms = tokenize(text)
+        self.chunks.append(text)
+        self.pinned.append(pinned)
+        self._lengths.append(len(terms))
+        self._total_length += len(terms)
+        self.tokens += estimate_tokens(text)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> List[Tuple[float, int]]:
+        """The `k` best (score, chunk id) pairs for the query, best first"""
+        if not self.chunks:
+            return []
+        total = len(self.chunks)
+        average = self._total_length / total or 1
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, count in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[chunk_id] / average)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * count * (BM25_K1 + 1) / (count + norm)
+        ranked = sorted(((score, chunk_id) for chunk_id, score in scores.items()), reverse=True)
+        return ranked[:k]
+
+    def render(self, query: str, budget: int = BRIEFING_TOKEN_BUDGET) -> str:
+        """Pinned messages plus the best-matching chunks within `budget` tokens, in briefing order"""
+        if self._rendered is not None and self._rendered[:3] == (query, budget, len(self.chunks)):
+            return self._rendered[3]
+
+        chosen = set()
+        used = 0
+        # Newest instructions first, so the latest ones survive a tight budget
+        for chunk_id in reversed(range(len(self.chunks))):
+            cost = estimate_tokens(self.chunks[chunk_id])
+            if self.pinned[chunk_id] and used + cost <= budget * PINNED_SHARE:
+                chosen.add(chunk_id)
+                used += cost
+        ranked = [chunk_id for _, chunk_id in self.search(query, RETRIEVAL_TOP_K)]
+        if not ranked:
+            # Nothing matches yet (e.g. the opening turn): start from the top of the briefing
+            ranked = list(range(len(self.chunks)))[:RETRIEVAL_TOP_K]
+        for chunk_id in ranked:
+            cost = estimate_tokens(self.chunks[chunk_id])
+            if chunk_id not in chosen and used + cost <= budget:
+                chosen.add(chunk_id)
+                used += cost
+
+        text = EXCERPT_NOTE + "\n...\n".join(self.chunks[chunk_id].strip() for chunk_id in sorted(chosen))
+        self._rendered = (query, budget, len(self.chunks), text)
+        logger.debug(f"Briefing excerpts: {len(chosen)}/{len(self.chunks)} chunks, ~{used} tokens")
+        return text
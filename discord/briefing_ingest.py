@@ -0,0 +1,107 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+from pdf_text import extract_pdf_text
+
+logger = logging.getLogger(__name__)
+
+BRIEFING_MAX_FILE_BYTES = int(os.getenv("BRIEFING_MAX_FILE_BYTES", str(8 * 1024 * 1024)))
+BRIEFING_DOWNLOAD_CONCURRENCY = int(os.getenv("BRIEFING_DOWNLOAD_CONCURRENCY", "4"))
+PARSE_OFF_LOOP_BYTES = 256 * 1024  # larger files are decoded and parsed in a worker thread
+
+
+class IngestedFile:
+    """One briefing attachment after download: its documents or text, or why it was not read"""
+
+    def __init__(self, filename: str, size: int, documents: Optional[List[Any]] = None,
+                 text: Optional[str] = None, error: Optional[str] = None, skipped: bool = False):
+        self.filename = filename
+        self.size = size
+        self.documents = documents or []
+        self.text = text
+        self.error = error
+        self.skipped = skipped  # refused by a size limit before download
+
+
+def parse_json_documents(data: bytes) -> List[Any]:
+    """Parse a JSON file, or a JSON Lines / concatenated JSON file one document at a time"""
+    text = data.decode('utf-8')
+    decoder = json.JSONDecoder()
+    documents = []
+    position = 0
+    while True:
+        # Skip the whitespace (and newlines) between documents
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position == len(text):
+            break
+        document, position = decoder.raw_decode(text, position)
+        documents.append(document)
+    if not documents:
+        raise ValueError("Empty JSON file")
+    return documents
+
+
+async def _off_loop(fn, data: bytes):
+    if len(data) > PARSE_OFF_LOOP_BYTES:
+        return await asyncio.to_thread(fn, data)
+    return fn(data)
+
+
+async def _read(attachment, semaphore: asyncio.Semaphore) -> IngestedFile:
+    filename = attachment.filename
+    try:
+        async with semaphore:
+            data = await attachment.read()
+        if len(data) > BRIEFING_MAX_FILE_BYTES:
+            return IngestedFile(filename, len(data), skipped=True,
+                                error=f"Warning: Skipped file {filename}: larger than {BRIEFING_MAX_FILE_BYTES:,} bytes")
+        lower = filename.lower()
+        if lower.endswith('.pdf'):
+            text = await extract_pdf_text(data)
+            if text is None:
+                return IngestedFile(filename, len(data), error=f"Warning: Could not read PDF {filename}")
+            return IngestedFile(filename, len(data), text=text)
+        if lower.endswith(('.json', '.jsonl')):
+            try:
+                return IngestedFile(filename, len(data), documents=await _off_loop(parse_json_documents, data))
+            except ValueError:
+                # If JSON parsing fails, store as raw text
+                pass
+        return IngestedFile(filename, len(data), text=await _off_loop(lambda raw: raw.decode('utf-8'), data))
+    except Exception as e:
+        return IngestedFile(filename, 0, error=f"Warning: Could not process file {filename}: {str(e)}")
+
+
+async def ingest_attachments(attachments, budget: Optional[int] = None) -> List[IngestedFile]:
+    """Download and decode a message's attachments concurrently, in message order.
+
+    Files over BRIEFING_MAX_FILE_BYTES, or that no longer fit the session's
+    remaining `budget` (bytes, None = unlimited) by their declared size, are
+    skipped without being downloaded. JSON files yield their documents, PDFs
+    their extracted text and other files their text.
+    """
+    semaphore = asyncio.Semaphore(BRIEFING_DOWNLOAD_CONCURRENCY)
+    reads = []
+    for attachment in attachments:
+        size = getattr(attachment, "size", 0) or 0
+        if size > BRIEFING_MAX_FILE_BYTES:
+            reads.append(IngestedFile(attachment.filename, size, skipped=True,
+                                      error=f"Warning: Skipped file {attachment.filename}: larger than {BRIEFING_MAX_FILE_BYTES:,} bytes"))
+        elif budget is not None and size > budget:
+            reads.append(IngestedFile(attachment.filename, size, skipped=True,
+                                      error=f"Warning: Skipped file {attachment.filename}: briefing limit reached"))
+        else:
+            if budget is not None:
+                budget -= size
+            reads.append(_read(attachment, semaphore))
+
+    async def resolve(item):
+        return item if isinstance(item, IngestedFile) else await item
+
+    files = await asyncio.gather(*(resolve(item) for item in reads))
+    logger.info(f"Ingested {len(files)} briefing files ({sum(f.size for f in files):,} bytes)")
+    return list(files)
@@ -0,0 +1,467 @@
+import re
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lines starting or ending with one of these continue the surrounding expression
+CONTINUATION_OPERATORS = ("&&", "||", "+", "-", "*", "/", "%", "==", "!=", "<", ">")
+CAST_TYPES = ("f64", "i64", "u64", "usize")
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<number>\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>&&|\|\||==|!=|<=|>=|[-+*/%<>!()\[\].,])
+""", re.VERBOSE)
+
+# Binary operator precedence, loosest first, as in Rust
+_PRECEDENCE = {
+    "||": 1,
+    "&&": 2,
+    "==": 3, "!=": 3, "<": 3, ">": 3, "<=": 3, ">=": 3,
+    "+": 4, "-": 4,
+    "*": 5, "/": 5, "%": 5,
+}
+_COMPARISONS = {"==", "!=", "<", ">", "<=", ">="}
+
+
+class ExpressionError(ValueError):
+    """Base class for expressions that cannot be proven"""
+
+
+class MalformedExpression(ExpressionError):
+    """The expression is outside the supported subset or would not compile"""
+
+
+class EvaluationPanic(ExpressionError):
+    """The expression compiles but would panic, e.g. unwrapping a missing key"""
+
+
+# Runtime values. Rust scalars map onto Python ones (f64 -> float, i64/u64 ->
+# int, bool -> bool, &str -> str); the wrappers below stand in for the
+# container types so the evaluator can enforce Rust's typing rules.
+
+class _Vec:
+    __slots__ = ("items",)
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+
+
+class _Map:
+    """A HashMap<String, serde_json::Value>, i.e. one entry of json_dicts"""
+    __slots__ = ("entries",)
+
+    def __init__(self, entries: Dict[str, Any]):
+        self.entries = entries
+
+
+class _Json:
+    """A serde_json::Value"""
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class _Option:
+    __slots__ = ("value", "is_some")
+
+    def __init__(self, value: Any = None, is_some: bool = False):
+        self.value = value
+        self.is_some = is_some
+
+
+_NONE = _Option()
+
+
+def _some(value: Any) -> _Option:
+    return _Option(value, True)
+
+
+def _type_name(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "f64"
+    if isinstance(value, str):
+        return "&str"
+    return {
+        _Vec: "Vec", _Map: "HashMap", _Json: "serde_json::Value", _Option: "Option",
+    }.get(type(value), type(value).__name__)
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str, int]]:
+    tokens = []
+    pos = 0
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if match is None:
+            raise MalformedExpression(f"unexpected character {expression[pos]!r} at column {pos + 1}")
+        kind = match.lastgroup
+        if kind != "ws":
+            tokens.append((kind, match.group(), pos))
+        pos = match.end()
+    tokens.append(("end", "", pos))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing a tuple-based AST"""
+
+    def __init__(self, expression: str):
+        self.tokens = _tokenize(expression)
+        self.index = 0
+
+    def _peek(self) -> Tuple[str, str, int]:
+        return self.tokens[self.index]
+
+    def _next(self) -> Tuple[str, str, int]:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def _expect(self, text: str) -> None:
+        kind, value, pos = self._next()
+        if value != text or kind not in ("op", "ident"):
+            found = repr(value) if kind != "end" else "end of expression"
+            raise MalformedExpression(f"expected {text!r} at column {pos + 1}, found {found}")
+
+    def parse(self) -> tuple:
+        node = self._binary(1)
+        kind, value, pos = self._peek()
+        if kind != "end":
+            raise MalformedExpression(f"unexpected {value!r} at column {pos + 1}")
+        return node
+
+    def _binary(self, min_precedence: int) -> tuple:
+        left = self._unary()
+        while True:
+            kind, op, pos = self._peek()
+            precedence = _PRECEDENCE.get(op) if kind == "op" else None
+            if precedence is None or precedence < min_precedence:
+                return left
+            self._next()
+            right = self._binary(precedence + 1)
+            if op in _COMPARISONS and left[0] == "binary" and left[1] in _COMPARISONS:
+                # Rust rejects chained comparisons such as a < b < c
+                raise MalformedExpression(f"chained comparison at column {pos + 1}")
+            left = ("binary", op, left, right)
+
+    def _unary(self) -> tuple:
+        kind, value, _ = self._peek()
+        if kind == "op" and value in ("-", "!"):
+            self._next()
+            return ("unary", value, self._unary())
+        return self._postfix(self._primary())
+
+    def _primary(self) -> tuple:
+        kind, value, pos = self._next()
+        if kind == "number":
+            text = value.replace("_", "")
+            if "." in text or "e" in text or "E" in text:
+                return ("literal", float(text))
+            return ("literal", int(text))
+        if kind == "string":
+            try:
+                # Rust's common string escapes are a subset of JSON's
+                return ("literal", json.loads(value))
+            except ValueError:
+                raise MalformedExpression(f"invalid string literal at column {pos + 1}")
+        if kind == "ident":
+            if value in ("true", "false"):
+                return ("literal", value == "true")
+            if value == "json_dicts":
+                return ("root",)
+            raise MalformedExpression(f"unknown identifier {value!r} at column {pos + 1}")
+        if value == "(":
+            node = self._binary(1)
+            self._expect(")")
+            return node
+        found = repr(value) if kind != "end" else "end of expression"
+        raise MalformedExpression(f"unexpected {found} at column {pos + 1}")
+
+    def _postfix(self, node: tuple) -> tuple:
+        while True:
+            kind, value, pos = self._peek()
+            if value == "[" and kind == "op":
+                self._next()
+                key = self._binary(1)
+                self._expect("]")
+                node = ("index", node, key)
+            elif value == "." and kind == "op":
+                self._next()
+                kind, name, pos = self._next()
+                if kind != "ident":
+                    raise MalformedExpression(f"expected a method name at column {pos + 1}")
+                self._expect("(")
+                args = []
+                if self._peek()[1] != ")":
+                    args.append(self._binary(1))
+                    while self._peek()[1] == ",":
+                        self._next()
+                        args.append(self._binary(1))
+                self._expect(")")
+                node = ("method", node, name, tuple(args))
+            elif value == "as" and kind == "ident":
+                self._next()
+                kind, target, pos = self._next()
+                if target not in CAST_TYPES:
+                    raise MalformedExpression(f"unsupported cast to {target!r} at column {pos + 1}")
+                node = ("cast", node, target)
+            else:
+                return node
+
+
+@lru_cache(maxsize=1024)
+def parse(expression: str) -> tuple:
+    """Parse one expression into an AST, raising MalformedExpression"""
+    return _Parser(expression).parse()
+
+
+def _numeric(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _index(container: Any, key: Any) -> Any:
+    if isinstance(container, _Vec):
+        if not _numeric(key) or isinstance(key, float):
+            raise MalformedExpression(f"Vec cannot be indexed by {_type_name(key)}")
+        if not 0 <= key < len(container.items):
+            raise EvaluationPanic(f"index {key} out of bounds for json_dicts of length {len(container.items)}")
+        return _Map(container.items[key])
+    if isinstance(container, _Map):
+        if not isinstance(key, str):
+            raise MalformedExpression(f"HashMap cannot be indexed by {_type_name(key)}")
+        if key not in container.entries:
+            raise EvaluationPanic(f"key {key!r} not present")
+        return _Json(container.entries[key])
+    if isinstance(container, _Json):
+        # serde_json's Index yields Null rather than panicking on a miss
+        value = container.value
+        if isinstance(key, str):
+            return _Json(value.get(key) if isinstance(value, dict) else None)
+        if _numeric(key) and not isinstance(key, float):
+            in_range = isinstance(value, list) and 0 <= key < len(value)
+            return _Json(value[key] if in_range else None)
+        raise MalformedExpression(f"serde_json::Value cannot be indexed by {_type_name(key)}")
+    raise MalformedExpression(f"{_type_name(container)} cannot be indexed")
+
+
+def _call(receiver: Any, name: str, args: List[Any]) -> Any:
+    arity = len(args)
+    if isinstance(receiver, _Option):
+        if name == "unwrap" and arity == 0:
+            if not receiver.is_some:
+                raise EvaluationPanic("called unwrap() on a None value")
+            return receiver.value
+        if name in ("is_some", "is_none") and arity == 0:
+            return receiver.is_some == (name == "is_some")
+    elif isinstance(receiver, (_Map, _Json, _Vec)) and name == "get" and arity == 1:
+        value, key = getattr(receiver, "value", None), args[0]
+        if isinstance(receiver, _Json) and (
+                (isinstance(key, str) and not (isinstance(value, dict) and key in value))
+                or (_numeric(key) and not isinstance(key, float)
+                    and not (isinstance(value, list) and 0 <= key < len(value)))):
+            # Value::get is None on a miss; only [] indexing yields Null
+            return _NONE
+        try:
+            return _some(_index(receiver, args[0]))
+        except EvaluationPanic:
+            return _NONE
+    elif isinstance(receiver, _Vec) and name == "len" and arity == 0:
+        return len(receiver.items)
+    elif isinstance(receiver, _Json) and arity == 0:
+        value = receiver.value
+        if name == "as_f64":
+            return _some(float(value)) if _numeric(value) else _NONE
+        if name == "as_i64":
+            return _some(value) if _numeric(value) and not isinstance(value, float) else _NONE
+        if name == "as_u64":
+            return _some(value) if _numeric(value) and not isinstance(value, float) and value >= 0 else _NONE
+        if name == "as_str":
+            return _some(value) if isinstance(value, str) else _NONE
+        if name == "as_bool":
+            return _some(value) if isinstance(value, bool) else _NONE
+        if name == "is_null":
+            return value is None
+    elif _numeric(receiver):
+        if name == "abs" and arity == 0:
+            return abs(receiver)
+        if name in ("min", "max") and arity == 1 and type(args[0]) is type(receiver):
+            return min(receiver, args[0]) if name == "min" else max(receiver, args[0])
+    elif isinstance(receiver, str) and name == "len" and arity == 0:
+        return len(receiver.encode("utf-8"))
+    raise MalformedExpression(f"no method {name}() with {arity} argument(s) on {_type_name(receiver)}")
+
+
+def _arithmetic(op: str, left: Any, right: Any) -> Any:
+    if not (_numeric(left) and _numeric(right)) or type(left) is not type(right):
+        raise MalformedExpression(f"cannot apply {op} to {_type_name(left)} and {_type_name(right)}")
+    if isinstance(left, int):
+        if op in ("/", "%") and right == 0:
+            raise EvaluationPanic("integer division by zero")
+        if op == "/":
+            # Rust integer division truncates toward zero
+            return abs(left) // abs(right) * (1 if (left >= 0) == (right >= 0) else -1)
+        if op == "%":
+            return left - right * _arithmetic("/", left, right)
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if op == "%":
+        return float("nan") if right == 0 else abs(left) % abs(right) * (1 if left >= 0 else -1)
+    if right == 0:
+        # IEEE 754 semantics, as in Rust
+        return float("nan") if left == 0 or left != left else float("inf") * (1 if left > 0 else -1)
+    return left / right
+
+
+def _json_equal(value: Any, other: Any) -> bool:
+    """Equality of two serde_json::Values: numbers must also match in kind, so 1 != 1.0"""
+    if type(value) is not type(other):
+        return False
+    if isinstance(value, dict):
+        return value.keys() == other.keys() and all(_json_equal(value[key], other[key]) for key in value)
+    if isinstance(value, list):
+        return len(value) == len(other) and all(map(_json_equal, value, other))
+    return value == other
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    if op in ("==", "!=") and (isinstance(left, _Json) or isinstance(right, _Json)):
+        # serde_json::Value's PartialEq impls, as mirrored by predicates.rs: an f64
+        # matches any number through as_f64(), an integer only an integer
+        if isinstance(left, _Json) and isinstance(right, _Json):
+            equal = _json_equal(left.value, right.value)
+        else:
+            value, other = (left.value, right) if isinstance(left, _Json) else (right.value, left)
+            if isinstance(other, float):
+                equal = _numeric(value) and float(value) == other
+            elif isinstance(other, (int, str)):
+                equal = type(value) is type(other) and value == other
+            else:
+                raise MalformedExpression(f"cannot compare serde_json::Value with {_type_name(other)}")
+        return equal == (op == "==")
+    comparable = (_numeric(left) and _numeric(right) and type(left) is type(right)) or (
+        type(left) is type(right) and isinstance(left, (str, bool)))
+    if not comparable:
+        raise MalformedExpression(f"cannot compare {_type_name(left)} with {_type_name(right)}")
+    return {
+        "==": left == right, "!=": left != right,
+        "<": left < right, ">": left > right,
+        "<=": left <= right, ">=": left >= right,
+    }[op]
+
+
+def _evaluate(node: tuple, root: _Vec) -> Any:
+    kind = node[0]
+    if kind == "literal":
+        return node[1]
+    if kind == "root":
+        return root
+    if kind == "index":
+        return _index(_evaluate(node[1], root), _evaluate(node[2], root))
+    if kind == "method":
+        receiver = _evaluate(node[1], root)
+        return _call(receiver, node[2], [_evaluate(arg, root) for arg in node[3]])
+    if kind == "cast":
+        value = _evaluate(node[1], root)
+        if not _numeric(value):
+            raise MalformedExpression(f"cannot cast {_type_name(value)} as {node[2]}")
+        return float(value) if node[2] == "f64" else int(value)
+    if kind == "unary":
+        value = _evaluate(node[2], root)
+        if node[1] == "!":
+            if not isinstance(value, bool):
+                raise MalformedExpression(f"cannot apply ! to {_type_name(value)}")
+            return not value
+        if not _numeric(value):
+            raise MalformedExpression(f"cannot negate {_type_name(value)}")
+        return -value
+
+    op, left_node, right_node = node[1], node[2], node[3]
+    left = _evaluate(left_node, root)
+    if op in ("&&", "||"):
+        if not isinstance(left, bool):
+            raise MalformedExpression(f"{op} expects bool, found {_type_name(left)}")
+        # Short-circuit like Rust, but still type-check the right-hand side
+        if left == (op == "||"):
+            return left
+        right = _evaluate(right_node, root)
+        if not isinstance(right, bool):
+            raise MalformedExpression(f"{op} expects bool, found {_type_name(right)}")
+        return right
+    right = _evaluate(right_node, root)
+    if op in _COMPARISONS:
+        return _compare(op, left, right)
+    return _arithmetic(op, left, right)
+
+
+def evaluate(expression: str, json_dicts: List[Dict[str, Any]]) -> bool:
+    """Evaluate one Rust boolean expression over json_dicts.
+
+    Raises MalformedExpression if the expression falls outside the supported
+    subset or is ill-typed, and EvaluationPanic if it would panic at runtime.
+    """
+    result = _evaluate(parse(expression), _Vec(json_dicts))
+    if not isinstance(result, bool):
+        raise MalformedExpression(f"expression evaluates to {_type_name(result)}, not bool")
+    return result
+
+
+def split_expressions(text: str) -> List[str]:
+    """Group the lines of a verification file into whole expressions.
+
+    A line continues the previous expression while brackets are unbalanced
+    or when either side of the line break is a binary operator.
+    """
+    expressions: List[str] = []
+    current: List[str] = []
+    depth = 0
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        continues = current and (
+            depth > 0
+            or line.startswith(CONTINUATION_OPERATORS)
+            or current[-1].endswith(CONTINUATION_OPERATORS)
+        )
+        if current and not continues:
+            expressions.append(" ".join(current))
+            current = []
+            depth = 0
+        current.append(line)
+        depth += line.count("(") + line.count("[") - line.count(")") - line.count("]")
+    if current:
+        expressions.append(" ".join(current))
+    return expressions
+
+
+def pre_evaluate(text: str, json_dicts: List[Dict[str, Any]]) -> List[str]:
+    """Return the expressions in `text` that are well-formed and true.
+
+    Everything else would only produce a failed or pointless proof, so it is
+    logged and dropped before reaching the prover.
+    """
+    holding = []
+    for expression in split_expressions(text):
+        try:
+            if evaluate(expression, json_dicts):
+                holding.append(expression)
+            else:
+                logger.info(f"Dropping false claim: {expression}")
+        except ExpressionError as e:
+            logger.warning(f"Dropping unprovable claim ({type(e).__name__}: {e}): {expression}")
+        except RecursionError:
+            logger.warning(f"Dropping claim nested too deeply to evaluate: {expression}")
+    return holding
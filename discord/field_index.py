@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from log_payload import REDACTED_KEYS
+
+logger = logging.getLogger(__name__)
+
+FIELD_VIEW_MAX_LINES = int(os.getenv("FIELD_VIEW_MAX_LINES", "200"))  # fields per verification prompt
+VALUE_PREVIEW_CHARS = 40
+
+_HEX_BLOB = re.compile(r"^(0x)?[0-9a-fA-F]{64,}$")
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_WORD = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+_NUMBER_IN_TEXT = re.compile(r"\d")
+
+
+def _terms(text: str) -> Set[str]:
+    """Lowercase words with a plural 's' dropped, so "offers" matches "offer_amount" """
+    words = _WORD.findall(re.sub(r"([a-z])([A-Z])", r"\1 \2", text).lower())
+    return {word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words}
+
+
+def _type_name(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "f64"
+    if isinstance(value, str):
+        return "str"
+    return "null"
+
+
+def _preview(value: Any) -> str:
+    if isinstance(value, str) and len(value) > VALUE_PREVIEW_CHARS:
+        return json.dumps(value[:VALUE_PREVIEW_CHARS]) + "…"
+    return json.dumps(value)
+
+
+class Field:
+    __slots__ = ("path", "shape", "kind", "value", "value_terms")
+
+    def __init__(self, path: str, shape: str, value: Any):
+        self.path = path
+        self.shape = shape  # the path without array positions, shared across documents
+        self.kind = _type_name(value)
+        self.value = _preview(value)
+        self.value_terms = _terms(value) if isinstance(value, str) else set()
+
+    def render(self) -> str:
+        return f"{self.path}: {self.kind} = {self.value}"
+
+
+class FieldIndex:
+    """Typed leaf paths of the briefing documents, for the verification prompt.
+
+    Documents are walked once, when they are first seen, into one Field per
+    scalar value: `json_dicts[1].signed_data.data.offer_amount: f64 = 1456000`.
+    Signatures, keys and hex blobs are left out. `view` lists only the
+    fields whose names or values share words with the claim, so the prompt
+    does not grow with every document in the briefing.
+    """
+
+    def __init__(self):
+        self.fields: List[Field] = []
+        self._documents: Optional[List[Any]] = None
+        self._indexed = 0
+        self._shape_terms: Dict[str, Set[str]] = {}
+
+    def sync(self, json_dicts: List[Any]) -> None:
+        """Index documents appended to `json_dicts` since the last call"""
+        if json_dicts is not self._documents or len(json_dicts) < self._indexed:
+            self._documents = json_dicts
+            self._indexed = 0
+            self.fields = []
+            self._shape_terms = {}
+        for i in range(self._indexed, len(json_dicts)):
+            self._walk(json_dicts[i], f"json_dicts[{i}]", "")
+        self._indexed = len(json_dicts)
+
+    def _walk(self, value: Any, path: str, shape: str) -> None:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in REDACTED_KEYS:
+                    continue
+                key = str(key)
+                step = f".{key}" if _IDENTIFIER.match(key) else f"[{json.dumps(key)}]"
+                self._walk(item, path + step, shape + step)
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                self._walk(item, f"{path}[{i}]", shape + "[]")
+        elif not (isinstance(value, str) and _HEX_BLOB.match(value)):
+            if shape not in self._shape_terms:
+                self._shape_terms[shape] = _terms(shape)
+            self.fields.append(Field(path, shape, value))
+
+    def view(self, claim: str, max_lines: int = FIELD_VIEW_MAX_LINES) -> str:
+        """The fields relevant to `claim`, one per line, in document order"""
+        claim_terms = _terms(claim)
+        has_numbers = bool(_NUMBER_IN_TEXT.search(claim))
+        shapes = {shape for shape, terms in self._shape_terms.items() if terms & claim_terms}
+        selected = [
+            field for field in self.fields
+            if field.shape in shapes
+            or field.value_terms & claim_terms
+            # Figures in a claim are compared against numeric fields
+            or (has_numbers and field.kind == "f64")
+        ]
+        if not selected:
+            # Nothing matched by name; let the model see what there is
+            selected = self.fields
+        lines = [field.render() for field in selected[:max_lines]]
+        if len(selected) > max_lines:
+            lines.append(f"... {len(selected) - max_lines} more fields omitted")
+        logger.debug(f"Field view: {len(selected)}/{len(self.fields)} fields for the claim")
+        return "\n".join(lines)
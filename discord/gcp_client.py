@@ -1,9 +1,18 @@
 import os
-import requests
+import asyncio
+import random
+import tempfile
+import time
+import aiohttp
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
 import logging
 from dotenv import load_dotenv
+from proof_cache import ProofCache
+from expression_eval import MalformedExpression
+from predicate_ir import canonical_json, validate_program
+from metrics import get_metrics, span, CYCLE_BUCKETS
+from log_payload import payload, log_sampled
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,10 +21,99 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Transport settings (seconds unless noted)
+GCP_CONNECT_TIMEOUT = float(os.getenv("GCP_CONNECT_TIMEOUT", "10"))
+GCP_READ_TIMEOUT = float(os.getenv("GCP_READ_TIMEOUT", "900"))
+GCP_TOTAL_TIMEOUT = float(os.getenv("GCP_TOTAL_TIMEOUT", "1800"))
+GCP_MAX_RETRIES = int(os.getenv("GCP_MAX_RETRIES", "3"))
+GCP_POOL_SIZE = int(os.getenv("GCP_POOL_SIZE", "10"))  # connections
+GCP_BACKOFF_BASE = 0.5
+GCP_BACKOFF_CAP = 10.0
+GCP_JOB_WAIT = 30  # long-poll window per status request
+GCP_BATCH_WINDOW = float(os.getenv("GCP_BATCH_WINDOW", "0"))  # seconds to gather claims; 0 disables batching
+GCP_BATCH_MAX_CLAIMS = int(os.getenv("GCP_BATCH_MAX_CLAIMS", "16"))
+BUDGET_BATCH_WINDOW = 2.0  # used when a caller asks for batching while GCP_BATCH_WINDOW is off
+
+# Status codes worth retrying: the prover is a pure function of its inputs,
+# so re-sending a request after a gateway or overload error is safe.
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+class _RetryableStatus(Exception):
+    """Raised internally for a response status that should be retried"""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def _derive_endpoint(process_endpoint: str, name: str) -> str:
+    """Map `.../api/process` to a sibling endpoint such as `.../api/jobs`"""
+    base = process_endpoint.rstrip('/')
+    if base.endswith('/process'):
+        base = base[:-len('/process')]
+    return f"{base}/{name}"
+
+
+def _write_temp_file(prefix: str, suffix: str, content: str) -> str:
+    """Write content to a fresh temporary file and return its path"""
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=suffix)
+    with os.fdopen(fd, 'w') as f:
+        f.write(content)
+    return path
+
+
+def _proof_payload(verification_file: str, json_dicts: Dict[str, Any],
+                   predicates: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    payload = {
+        'verification_file': verification_file,
+        'json_dicts': json_dicts
+    }
+    if predicates is not None:
+        payload['predicates'] = predicates
+    return payload
+
+
+def _resolve_all(batch: List[Tuple[Dict[str, Any], asyncio.Future]], error: Exception) -> None:
+    """Fail every still-waiting claim in a batch"""
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+def _count_proof(response_data: Dict[str, Any]) -> None:
+    """Count a prover response and record the cycles it reports"""
+    metrics = get_metrics()
+    if not response_data:
+        metrics.inc("negotiator_proofs_total", result="failed")
+        return
+    if response_data.get('cached'):
+        # Served from the server's proof cache, no cycles were spent
+        metrics.inc("negotiator_proofs_total", result="cached")
+        return
+    metrics.inc("negotiator_proofs_total", result="proven")
+    if response_data.get('cycles') is not None:
+        metrics.observe("negotiator_proof_cycles", response_data['cycles'], buckets=CYCLE_BUCKETS)
+
+
+def cleanup_artifacts(response_data: Dict[str, Any]) -> None:
+    """Remove the temporary files created for a prover response"""
+    for key in ('verification_data_file', 'public_values_file'):
+        path = response_data.get(key)
+        if not path:
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.error(f"Error cleaning up {key}: {e}")
+
+
 class GCPClient:
     def __init__(self):
         self.gcp_endpoint = os.getenv('GCP_ENDPOINT')
         self.api_key = os.getenv('GCP_API_KEY')
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.cache = ProofCache()
         
         if not self.gcp_endpoint:
             logger.warning("GCP_ENDPOINT not set in environment variables")
@@ -25,6 +123,106 @@ class GCPClient:
             logger.warning("GCP_API_KEY not set in environment variables")
             self.api_key = "default-key"  # Default key for local testing
 
+        # Job and batch APIs live next to the synchronous endpoint unless configured explicitly
+        self.jobs_endpoint = os.getenv('GCP_JOBS_ENDPOINT') or _derive_endpoint(self.gcp_endpoint, 'jobs')
+        self.batch_endpoint = os.getenv('GCP_BATCH_ENDPOINT') or _derive_endpoint(self.gcp_endpoint, 'process_batch')
+
+        # Claims waiting for the current batch window to close
+        self._batch: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def batching(self) -> bool:
+        """Whether claims are gathered and sent together"""
+        return GCP_BATCH_WINDOW > 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=GCP_POOL_SIZE, keepalive_timeout=60)
+            timeout = aiohttp.ClientTimeout(
+                total=GCP_TOTAL_TIMEOUT,
+                sock_connect=GCP_CONNECT_TIMEOUT,
+                sock_read=GCP_READ_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                headers={'Authorization': f'Bearer {self.api_key}'},
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the underlying connection pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request_json(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        """
+        Send a request and decode the JSON body, retrying transient failures
+        with full-jitter exponential backoff.
+        """
+        session = self._get_session()
+        attempt = 0
+        while True:
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status in RETRYABLE_STATUSES and attempt < GCP_MAX_RETRIES:
+                        raise _RetryableStatus(response.status)
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, _RetryableStatus) as e:
+                if attempt >= GCP_MAX_RETRIES:
+                    raise
+                delay = random.uniform(0, min(GCP_BACKOFF_CAP, GCP_BACKOFF_BASE * 2 ** attempt))
+                attempt += 1
+                log_sampled(logger, logging.WARNING, "gcp_retry", "GCP request failed (%s), retry %d/%d in %.2fs",
+                            e, attempt, GCP_MAX_RETRIES, delay)
+                await asyncio.sleep(delay)
+
+    def _store(self, cache_key: str, response_data: Dict[str, Any]) -> None:
+        """Cache a completed prover response"""
+        if 'public_values' in response_data:
+            self.cache.put(cache_key, response_data)
+
+    def _finalize_response(self, response_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach verification artifacts and a readable summary to a prover result"""
+        # Create verification data file
+        verification_data = {
+            "proof": response_data.get("proof", ""),
+            "verification_key": response_data.get("verification_key", ""),
+            "public_values": response_data.get("public_values", "")
+        }
+        
+        # Save verification data to a per-response file so concurrent proofs do not collide
+        response_data['verification_data_file'] = _write_temp_file(
+            'verification_data_', '.json', json.dumps(verification_data, indent=2)
+        )
+        
+        # If we have public values, save them to a file
+        if 'public_values' in response_data:
+            public_values = response_data['public_values']
+            # Create a file with public values
+            response_data['public_values_file'] = _write_temp_file('public_values_', '.txt', public_values)
+            
+            # Parse the public values to add to response
+            try:
+                parsed_values = json.loads(public_values)
+                verification_summary = (
+                    "**Verification Results:**\n"
+                    f"- Conditions Verified: {parsed_values.get('conditions_verified', False)}\n"
+                    f"- Signatures Verified: {parsed_values.get('signature_verified', False)}\n"
+                    f"- Number of Public Keys: {len(parsed_values.get('public_keys', []))}\n"
+                    f"- Conditions Checked:\n```\n{parsed_values.get('conditions', 'None')}\n```"
+                )
+                response_data['verification_summary'] = verification_summary
+            except json.JSONDecodeError as e:
+                logger.error(f"Error parsing public values: {str(e)}")
+        
+        return response_data
+
     async def call_gcp_function(self, verification_file: str, json_dicts: Dict[str, Any]) -> Dict[str, Any]:
         """
         Call a function on the GCP VM with proper authentication and error handling
@@ -36,71 +234,28 @@ class GCPClient:
         Returns:
             Dict containing the response from GCP VM
         """
+        # Identical conditions over identical documents always prove the same way
+        cache_key = ProofCache.make_key(verification_file, json_dicts)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return self._finalize_response(cached)
+        
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            payload = {
-                'verification_file': verification_file,
-                'json_dicts': json_dicts
-            }
-            
-            logger.info("GCP Client - Preparing to send data:")
-            logger.info(f"Endpoint: {self.gcp_endpoint}")
-            logger.info(f"Verification file content: {verification_file}")
-            logger.info(f"JSON dicts: {json.dumps(json_dicts, indent=2)}")
-            
-            response = requests.post(
-                self.gcp_endpoint,
-                headers=headers,
-                json=payload,
-                timeout=1000000  
-            )
-            
-            response.raise_for_status()  # Raise exception for bad status codes
-            
-            response_data = response.json()
-            logger.info(f"GCP Client - Received response: {json.dumps(response_data, indent=2)}")
+            body = _proof_payload(verification_file, json_dicts, None)
             
-            # Create verification data file
-            verification_data = {
-                "proof": response_data.get("proof", ""),
-                "verification_key": response_data.get("verification_key", ""),
-                "public_values": response_data.get("public_values", "")
-            }
+            logger.info("GCP Client - Sending %d documents to %s: %s",
+                        len(json_dicts), self.gcp_endpoint, payload(verification_file))
+            logger.debug("GCP Client - Documents: %s", payload(json_dicts))
             
-            # Save verification data to file
-            with open('verification_data.json', 'w') as f:
-                json.dump(verification_data, f, indent=2)
-            response_data['verification_data_file'] = 'verification_data.json'
+            with span("gcp_prove", mode="sync"):
+                response_data = await self._request_json('POST', self.gcp_endpoint, json=body)
+            _count_proof(response_data)
+            logger.info("GCP Client - Received response: %s", payload(response_data))
+            self._store(cache_key, response_data)
             
-            # If we have public values, save them to a file
-            if 'public_values' in response_data:
-                public_values = response_data['public_values']
-                # Create a file with public values
-                with open('public_values.txt', 'w') as f:
-                    f.write(public_values)
-                response_data['public_values_file'] = 'public_values.txt'
-                
-                # Parse the public values to add to response
-                try:
-                    parsed_values = json.loads(public_values)
-                    verification_summary = (
-                        "**Verification Results:**\n"
-                        f"- Conditions Verified: {parsed_values.get('conditions_verified', False)}\n"
-                        f"- Signatures Verified: {parsed_values.get('signature_verified', False)}\n"
-                        f"- Number of Public Keys: {len(parsed_values.get('public_keys', []))}\n"
-                        f"- Conditions Checked:\n```\n{parsed_values.get('conditions', 'None')}\n```"
-                    )
-                    response_data['verification_summary'] = verification_summary
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error parsing public values: {str(e)}")
+            return self._finalize_response(response_data)
             
-            return response_data
-            
-        except requests.exceptions.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus) as e:
             logger.error(f"Error calling GCP function: {str(e)}")
             return {}
         except json.JSONDecodeError as e:
@@ -108,4 +263,171 @@ class GCPClient:
             return {}
         except Exception as e:
             logger.error(f"Unexpected error: {str(e)}")
-            return {} 
\ No newline at end of file
+            return {}
+
+    async def submit_proof_job(self, verification_file: str, json_dicts: Dict[str, Any],
+                               predicates: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Submit a proof job to the GCP server without waiting for the prover
+
+        Returns:
+            The job id, or None if the server does not expose the job API
+        """
+        payload = _proof_payload(verification_file, json_dicts, predicates)
+        try:
+            with span("gcp_submit"):
+                job = await self._request_json('POST', self.jobs_endpoint, json=payload)
+        except aiohttp.ClientResponseError as e:
+            if e.status in (404, 405):
+                logger.warning(f"Job API not available at {self.jobs_endpoint}")
+                return None
+            raise
+        logger.info(f"GCP Client - Submitted proof job {job.get('job_id')}")
+        return job.get('job_id')
+
+    async def get_proof_job(self, job_id: str, wait: int = 0) -> Dict[str, Any]:
+        """Fetch a job's status, long-polling up to `wait` seconds for completion"""
+        return await self._request_json(
+            'GET', f"{self.jobs_endpoint}/{job_id}", params={'wait': str(wait)}
+        )
+
+    async def wait_for_proof_job(self, job_id: str) -> Dict[str, Any]:
+        """
+        Wait for a submitted job to finish
+
+        Returns:
+            The prover result, or an empty dict if the job failed
+        """
+        deadline = time.monotonic() + GCP_TOTAL_TIMEOUT
+        while True:
+            if time.monotonic() > deadline:
+                logger.error(f"Proof job {job_id} did not finish within {GCP_TOTAL_TIMEOUT}s")
+                return {}
+            with span("gcp_job_poll"):
+                job = await self.get_proof_job(job_id, wait=GCP_JOB_WAIT)
+            status = job.get('status')
+            if status == 'done':
+                logger.info(f"GCP Client - Proof job {job_id} finished")
+                return job.get('result', {})
+            if status == 'failed':
+                logger.error(f"Proof job {job_id} failed: {job.get('error')}")
+                return {}
+
+    async def prove(self, verification_file: str, json_dicts: Dict[str, Any],
+                    predicates: Optional[Dict[str, Any]] = None,
+                    batch: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Prove conditions through the job API, falling back to the synchronous
+        endpoint for servers that do not support jobs. With batching enabled,
+        claims that carry a predicate program are gathered for up to
+        GCP_BATCH_WINDOW seconds and sent together in one request.
+
+        Args:
+            verification_file: The verification expressions as text
+            json_dicts: The JSON dictionaries to check them against
+            predicates: Optional predicate program compiled from the expressions
+            batch: Force batching on or off for this claim; defaults to GCP_BATCH_WINDOW
+
+        Returns:
+            Dict containing the response from GCP VM, empty on failure. Results
+            served from the proof cache are marked with 'cached'.
+        """
+        if predicates is not None:
+            try:
+                validate_program(predicates)
+            except MalformedExpression as e:
+                logger.error(f"Not sending invalid predicate program: {e}")
+                predicates = None
+
+        # Differently written expressions that compile to the same program share an entry
+        conditions = canonical_json(predicates) if predicates is not None else verification_file
+        cache_key = ProofCache.make_key(conditions, json_dicts)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            get_metrics().inc("negotiator_proofs_total", result="cached")
+            cached['cached'] = True
+            return self._finalize_response(cached)
+
+        response_data = {}
+        try:
+            payload = _proof_payload(verification_file, json_dicts, predicates)
+            batched = (self.batching if batch is None else batch) and predicates is not None
+            with span("gcp_prove", mode="batch" if batched else "single"):
+                if batched:
+                    response_data = await self._enqueue_batch(payload)
+                else:
+                    response_data = await self._prove_unbatched(payload)
+            if not response_data:
+                return {}
+            self._store(cache_key, response_data)
+            return self._finalize_response(response_data)
+        except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus) as e:
+            logger.error(f"Error running proof job: {str(e)}")
+            return {}
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            return {}
+        finally:
+            _count_proof(response_data)
+
+    async def _prove_unbatched(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Prove a single claim, as a job if the server supports them"""
+        job_id = await self.submit_proof_job(
+            payload['verification_file'], payload['json_dicts'], payload.get('predicates')
+        )
+        if job_id is None:
+            return await self._request_json('POST', self.gcp_endpoint, json=payload)
+        return await self.wait_for_proof_job(job_id)
+
+    async def _enqueue_batch(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a claim to the current batch and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        self._batch.append((payload, future))
+        if len(self._batch) >= GCP_BATCH_MAX_CLAIMS:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            window = GCP_BATCH_WINDOW if GCP_BATCH_WINDOW > 0 else BUDGET_BATCH_WINDOW
+            self._batch_timer = asyncio.get_running_loop().call_later(window, self._flush_batch)
+        return await future
+
+    def _flush_batch(self) -> None:
+        """Close the current batch window and send what it gathered"""
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.create_task(self._send_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Prove a batch in one request and resolve each claim's future"""
+        payloads = [payload for payload, _ in batch]
+        try:
+            logger.info(f"GCP Client - Proving a batch of {len(batch)} claims")
+            with span("gcp_batch"):
+                response = await self._request_json('POST', self.batch_endpoint, json={'claims': payloads})
+            results = response.get('results', [])
+        except aiohttp.ClientResponseError as e:
+            if e.status not in (404, 405):
+                _resolve_all(batch, error=e)
+                return
+            logger.warning(f"Batch API not available at {self.batch_endpoint}, proving claims one by one")
+            results = await asyncio.gather(
+                *(self._prove_unbatched(payload) for payload in payloads), return_exceptions=True
+            )
+        except Exception as e:
+            _resolve_all(batch, error=e)
+            return
+
+        for i, (_, future) in enumerate(batch):
+            result = results[i] if i < len(results) else {}
+            if isinstance(result, Exception):
+                _resolve_all([batch[i]], error=result)
+                continue
+            if 'error' in result:
+                logger.error(f"Batched claim {i} failed: {result['error']}")
+                result = {}
+            if not future.done():
+                future.set_result(result)
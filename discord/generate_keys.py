@@ -1,4 +1,5 @@
-from discord.key_manager import KeyManager
+import asyncio
+from key_manager import KeyManager
 
 def main():
     # Initialize key manager
@@ -21,5 +22,9 @@ def main():
     print("\nKey pairs generated and stored for:")
     print("\n".join(f"- {name}" for name in key_manager.list_available_signers()))
 
+    # Let a running verification server pick up the new keys without a restart
+    if asyncio.run(key_manager.push_public_keys(names)):
+        print("\nPublic keys pushed to the verification server.")
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,7 +1,30 @@
 from Crypto.PublicKey import RSA
 import json
 import os
+import asyncio
+import logging
 from pathlib import Path
+import aiohttp
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+KEY_PUSH_TIMEOUT = float(os.getenv("KEY_PUSH_TIMEOUT", "30"))  # seconds
+
+
+def default_registry_endpoint():
+    """KEY_REGISTRY_ENDPOINT, or `/api/keys` next to GCP_ENDPOINT"""
+    endpoint = os.getenv("KEY_REGISTRY_ENDPOINT")
+    if endpoint:
+        return endpoint
+    base = os.getenv("GCP_ENDPOINT", "http://localhost:8080/api/process").rstrip('/')
+    if base.endswith('/process'):
+        base = base[:-len('/process')]
+    return f"{base}/keys"
+
 
 class KeyManager:
     def __init__(self):
@@ -65,4 +88,29 @@ class KeyManager:
         """Return a random name from available signers."""
         import random
         signers = self.list_available_signers()
-        return random.choice(signers) if signers else None 
\ No newline at end of file
+        return random.choice(signers) if signers else None
+
+    async def push_public_keys(self, names=None, endpoint=None):
+        """Push public keys to the verification server's key registry.
+
+        Args:
+            names: Signers to push; all known signers if None
+            endpoint: Registry URL; default_registry_endpoint() if None
+
+        Returns:
+            True if the server accepted the keys
+        """
+        names = names if names is not None else self.list_available_signers()
+        public_keys = {name: self.public_keys[name].hex() for name in names if name in self.public_keys}
+        endpoint = endpoint or default_registry_endpoint()
+        headers = {"Authorization": f"Bearer {os.getenv('GCP_API_KEY', 'default-key')}"}
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=KEY_PUSH_TIMEOUT)) as session:
+                async with session.post(endpoint, json=public_keys, headers=headers) as response:
+                    response.raise_for_status()
+                    result = await response.json()
+            logger.info(f"Pushed {len(public_keys)} public keys to {endpoint}: {result}")
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error pushing public keys to {endpoint}: {str(e)}")
+            return False
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "600"))  # per logged payload
+LOG_SAMPLE_INTERVAL = float(os.getenv("LOG_SAMPLE_INTERVAL", "60"))  # seconds between repeats of a sampled event; 0 = log all
+STRING_HEAD = 80  # characters kept of a long string inside a document
+
+# Values under these keys are replaced by their size; the GCP server redacts the same keys
+REDACTED_KEYS = frozenset({
+    "signature", "proof", "verification_key", "private_key", "public_key", "public_keys",
+})
+
+
+class _Truncated(Exception):
+    pass
+
+
+class _Writer:
+    """Collects output until `limit` characters, then stops the walk"""
+
+    def __init__(self, limit: int):
+        self.parts: List[str] = []
+        self.left = limit
+
+    def write(self, text: str) -> None:
+        if len(text) > self.left:
+            # Only output that is actually cut marks the payload as truncated
+            self.parts.append(text[:self.left])
+            self.left = 0
+            raise _Truncated()
+        self.parts.append(text)
+        self.left -= len(text)
+
+
+def _describe(value: Any) -> str:
+    if isinstance(value, dict):
+        return f"{len(value)} keys"
+    if isinstance(value, (list, tuple)):
+        return f"{len(value)} items"
+    if isinstance(value, str):
+        return f"{len(value)} chars"
+    return type(value).__name__
+
+
+def _render(value: Any, out: _Writer) -> None:
+    """Compact JSON with redacted keys and shortened strings"""
+    if isinstance(value, dict):
+        out.write("{")
+        for i, (key, item) in enumerate(value.items()):
+            out.write(("," if i else "") + json.dumps(str(key)) + ":")
+            if key in REDACTED_KEYS and item is not None:
+                out.write(f'"<redacted, {_describe(item)}>"')
+            else:
+                _render(item, out)
+        out.write("}")
+    elif isinstance(value, (list, tuple)):
+        out.write("[")
+        for i, item in enumerate(value):
+            if i:
+                out.write(",")
+            _render(item, out)
+        out.write("]")
+    elif isinstance(value, str) and len(value) > STRING_HEAD:
+        out.write(json.dumps(value[:STRING_HEAD]) + f"…({len(value)} chars)")
+    else:
+        out.write(json.dumps(value, ensure_ascii=False, default=str))
+
+
+class Payload:
+    """A log argument formatted only if the record is emitted.
+
+    Use it with %-style arguments, `logger.info("Sent %s", payload(docs))`,
+    so nothing is serialized for disabled levels. The output is capped at
+    `limit` characters: documents are walked only up to the cap, and free
+    text longer than the cap is cut and tagged with its length and hash.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = LOG_PAYLOAD_MAX_CHARS):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        if isinstance(self.value, str):
+            if len(self.value) <= self.limit:
+                return self.value
+            digest = hashlib.sha256(self.value.encode("utf-8", "replace")).hexdigest()[:12]
+            return f"{self.value[:self.limit]}… [{len(self.value)} chars, sha256 {digest}]"
+        out = _Writer(self.limit)
+        try:
+            _render(self.value, out)
+        except _Truncated:
+            return "".join(out.parts) + f"… [truncated, {_describe(self.value)}]"
+        return "".join(out.parts)
+
+
+def payload(value: Any, limit: int = LOG_PAYLOAD_MAX_CHARS) -> Payload:
+    return Payload(value, limit)
+
+
+class LogSampler:
+    """Lets an event through at most once per interval, counting the rest"""
+
+    def __init__(self, interval: float = LOG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._events: Dict[str, List[float]] = {}  # key -> [last logged, suppressed since]
+
+    def allow(self, key: str) -> Optional[int]:
+        """None to drop the event, otherwise how many were dropped since the last one logged"""
+        now = time.monotonic()
+        event = self._events.get(key)
+        if event is None or now - event[0] >= self.interval:
+            suppressed = int(event[1]) if event else 0
+            self._events[key] = [now, 0]
+            return suppressed
+        event[1] += 1
+        return None
+
+
+_sampler = LogSampler()
+
+
+def log_sampled(log: logging.Logger, level: int, key: str, msg: str, *args) -> None:
+    """Log a repetitive event at most once per LOG_SAMPLE_INTERVAL for `key`"""
+    if not log.isEnabledFor(level):
+        return
+    suppressed = _sampler.allow(key)
+    if suppressed is None:
+        return
+    if suppressed:
+        msg += " (%d similar suppressed)"
+        args += (suppressed,)
+    log.log(level, msg, *args)
@@ -0,0 +1,195 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 = no metrics endpoint
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # local scrapes only by default
+
+STAGE_SECONDS = "negotiator_stage_seconds"
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+CYCLE_BUCKETS = (1e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8, 1e9)
+
+HELP = {
+    STAGE_SECONDS: "Time spent in each stage of a negotiation turn, proof or PDF signing",
+    "negotiator_proof_cycles": "zkVM cycles reported for each proof the server ran",
+    "negotiator_proofs_total": "Proof requests by outcome",
+    "negotiator_sessions": "Live negotiation sessions per bot",
+    "negotiator_mistral_queue_depth": "Mistral calls waiting for the rate limiter",
+    "negotiator_proof_budget_hourly_cycles": "zkVM cycles spent on proofs in the last hour",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram for one label set"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Process-wide histograms, counters and gauges in Prometheus text format.
+
+    Histograms and counters are updated in place; gauges are callbacks read
+    at scrape time, so registering a session count costs nothing per turn.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {STAGE_SECONDS: STAGE_BUCKETS}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, Callable[[], float]]] = {}
+
+    def observe(self, name: str, value: float, buckets: Optional[Sequence[float]] = None, **labels) -> None:
+        """Add a value to histogram `name`; `buckets` applies on first use"""
+        if name not in self._histograms:
+            self._histograms[name] = {}
+            self._buckets.setdefault(name, buckets or STAGE_BUCKETS)
+        series = self._histograms[name]
+        key = _labels(labels)
+        if key not in series:
+            series[key] = Histogram(self._buckets[name])
+        series[key].observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def gauge(self, name: str, read: Callable[[], float], **labels) -> None:
+        """Register a callback read at every scrape; re-registering replaces it"""
+        self._gauges.setdefault(name, {})[_labels(labels)] = read
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """Time the enclosed block into the stage histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage, **labels)
+
+    def render(self) -> str:
+        """The metrics in Prometheus text exposition format"""
+        lines: List[str] = []
+        for name, series in sorted(self._histograms.items()):
+            self._header(lines, name, "histogram")
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(float(bound))))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for name, series in sorted(self._counters.items()):
+            self._header(lines, name, "counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for name, series in sorted(self._gauges.items()):
+            self._header(lines, name, "gauge")
+            for labels, read in sorted(series.items(), key=lambda item: item[0]):
+                try:
+                    value = read()
+                except Exception as e:
+                    logger.warning(f"Could not read gauge {name}: {e}")
+                    continue
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(lines: List[str], name: str, kind: str) -> None:
+        if name in HELP:
+            lines.append(f"# HELP {name} {HELP[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+_metrics: Optional[Metrics] = None
+_server: Optional[asyncio.AbstractServer] = None
+
+
+def get_metrics() -> Metrics:
+    """Return the metrics registry shared by the whole process"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+
+def span(stage: str, **labels):
+    """Time the enclosed block as `stage`, e.g. `with span("pdf_extract"): ...`"""
+    return get_metrics().span(stage, **labels)
+
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Skip the headers; scrapes have no body
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request.split()
+        if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+            status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+            body = get_metrics().render().encode("utf-8")
+        else:
+            status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"Not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError) as e:
+        logger.debug(f"Metrics scrape failed: {e}")
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[asyncio.AbstractServer]:
+    """Serve GET /metrics on host:port; does nothing if port is 0 or the server already runs"""
+    global _server
+    if not port or _server is not None:
+        return _server
+    try:
+        _server = await asyncio.start_server(_handle_scrape, host, port)
+    except OSError as e:
+        logger.error(f"Could not start metrics endpoint on {host}:{port}: {e}")
+        return None
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return _server
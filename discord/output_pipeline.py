@@ -0,0 +1,127 @@
+import io
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+MAX_DISCORD_MESSAGE = 1900  # Discord's message limit with some buffer for formatting
+# Longer output is sent as one file instead of several messages
+OUTPUT_ATTACH_THRESHOLD = int(os.getenv("OUTPUT_ATTACH_THRESHOLD", str(3 * MAX_DISCORD_MESSAGE)))
+# Discord allows about 5 messages per 5 seconds per channel; 0 = no pacing
+OUTPUT_BURST = int(os.getenv("OUTPUT_BURST", "5"))
+OUTPUT_WINDOW = float(os.getenv("OUTPUT_WINDOW", "5"))
+MAX_TRACKED_CHANNELS = 1000
+
+
+def paginate(text: str, limit: int = MAX_DISCORD_MESSAGE) -> List[str]:
+    """Split text into pages of at most `limit` characters, at line breaks where possible"""
+    pages: List[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        if len(current) + len(line) <= limit:
+            current += line
+            continue
+        if current:
+            pages.append(current)
+            current = ""
+        # A single line longer than a page is split at spaces, or hard-split
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit) + 1 or limit
+            pages.append(line[:cut])
+            line = line[cut:]
+        current = line
+    if current:
+        pages.append(current)
+    return [page.rstrip("\n") for page in pages if page.strip()]
+
+
+def _code_block(text: str) -> str:
+    # Keep fences inside the text from closing the block
+    return "```\n" + text.replace("```", "`​``") + "\n```"
+
+
+class _ChannelQueue:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.sent: Deque[float] = deque()
+
+
+class OutputPipeline:
+    """Sends bot output to Discord, paced per channel.
+
+    Sends to one channel go out in order, at most `burst` per `window`
+    seconds, so a long echo waits its turn instead of running into
+    Discord's rate limits. Long text is paginated at line breaks, or sent
+    as a single file above `attach_threshold` characters.
+    """
+
+    def __init__(self, burst: int = OUTPUT_BURST, window: float = OUTPUT_WINDOW,
+                 attach_threshold: int = OUTPUT_ATTACH_THRESHOLD):
+        self.burst = burst
+        self.window = window
+        self.attach_threshold = attach_threshold
+        self._channels: "OrderedDict[int, _ChannelQueue]" = OrderedDict()
+
+    def _queue(self, channel) -> _ChannelQueue:
+        key = getattr(channel, "id", id(channel))
+        queue = self._channels.get(key)
+        if queue is None:
+            queue = self._channels[key] = _ChannelQueue()
+            if len(self._channels) > MAX_TRACKED_CHANNELS:
+                # Forget the least recently used channel unless it is sending
+                oldest_key, oldest = next(iter(self._channels.items()))
+                if not oldest.lock.locked():
+                    del self._channels[oldest_key]
+        self._channels.move_to_end(key)
+        return queue
+
+    async def send(self, channel, content: Optional[str] = None, **kwargs):
+        """Send one message, waiting for the channel's rate budget"""
+        queue = self._queue(channel)
+        async with queue.lock:
+            if self.burst > 0:
+                now = time.monotonic()
+                while queue.sent and now - queue.sent[0] >= self.window:
+                    queue.sent.popleft()
+                if len(queue.sent) >= self.burst:
+                    await asyncio.sleep(self.window - (now - queue.sent[0]))
+                    queue.sent.popleft()
+                queue.sent.append(time.monotonic())
+            return await channel.send(content, **kwargs)
+
+    async def send_text(self, channel, text: str, title: str, filename: str) -> None:
+        """Send text under a title, as code-block pages or as one file when long"""
+        if not text.strip():
+            return
+        if len(text) > self.attach_threshold:
+            file = discord.File(io.BytesIO(text.encode("utf-8")), filename=filename)
+            await self.send(channel, f"{title} ({len(text):,} characters, attached):", file=file)
+            return
+        # Leave room for the title and the code fences
+        pages = paginate(text, MAX_DISCORD_MESSAGE - len(title) - 32)
+        for i, page in enumerate(pages):
+            header = f"{title} (Part {i+1}/{len(pages)}):" if len(pages) > 1 else f"{title}:"
+            await self.send(channel, f"{header}\n{_code_block(page)}")
+
+
+_output: Optional[OutputPipeline] = None
+
+
+def get_output() -> OutputPipeline:
+    """Return the output pipeline shared by every bot in the process"""
+    global _output
+    if _output is None:
+        _output = OutputPipeline()
+    return _output
+
+
+def set_output(output: OutputPipeline) -> None:
+    """Replace the shared pipeline, e.g. with an unpaced one for offline runs"""
+    global _output
+    _output = output
@@ -2,13 +2,16 @@ import os
 import discord
 import logging
 from dotenv import load_dotenv
-import PyPDF2
-import io
 import json
 from datetime import datetime
 from mistralai import Mistral
 import re
-from discord.key_manager import KeyManager
+from key_manager import KeyManager
+from pdf_text import extract_pdf_text
+from prompt_builder import estimate_tokens
+from rate_limit import get_limiter, PRIORITY_PDF
+from metrics import span, start_metrics_server
+from log_payload import payload
 from Crypto.Hash import SHA256
 from Crypto.Signature import pkcs1_15
 
@@ -39,14 +42,16 @@ if not all([DISCORD_TOKEN, MISTRAL_API_KEY, SIGNATURES_CHANNEL_ID]):
     raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
 class PDFBot(discord.Client):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, mistral_client=None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.mistral_client = Mistral(api_key=MISTRAL_API_KEY)
+        # bot_host.py passes the Mistral client shared by all hosted bots
+        self.mistral_client = mistral_client or Mistral(api_key=MISTRAL_API_KEY)
         self.key_manager = KeyManager()
 
     async def setup_hook(self):
         """Optional method to set up the bot when it starts."""
         logger.info("Bot is starting up...")
+        await start_metrics_server()
 
     async def on_ready(self):
         """Called when the bot is ready to start working."""
@@ -55,13 +60,8 @@ class PDFBot(discord.Client):
 
     async def extract_pdf_content(self, pdf_bytes):
         """Extract text content from PDF bytes."""
-        try:
-            pdf_file = io.BytesIO(pdf_bytes)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            return "\n".join(page.extract_text() for page in pdf_reader.pages)
-        except Exception as e:
-            logger.error(f"Error extracting PDF content: {e}")
-            return None
+        # Shared with briefing ingestion; runs off the event loop
+        return await extract_pdf_text(pdf_bytes)
 
     def sign_data(self, data, signer_name):
         """Sign the data dictionary using the signer's private key."""
@@ -118,20 +118,27 @@ class PDFBot(discord.Client):
             5. Include ALL relevant information from the entire document
             """
 
-            # Use the official chat.complete method
-            response = self.mistral_client.chat.complete(
-                model="mistral-large-latest",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Extract ALL important information from this document into a clean JSON object:\n\n{text}"
-                    }
-                ]
-            )
+            messages = [
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": f"Extract ALL important information from this document into a clean JSON object:\n\n{text}"
+                }
+            ]
+
+            # Go through the shared limiter, behind negotiation traffic; the
+            # extracted JSON can be about as long as the document itself
+            with span("pdf_llm"):
+                response = await get_limiter().call(
+                    self.mistral_client.chat.complete_async,
+                    model="mistral-large-latest",
+                    messages=messages,
+                    priority=PRIORITY_PDF,
+                    tokens=sum(estimate_tokens(m["content"]) for m in messages) * 2,
+                )
 
             # Get the response content
             content = response.choices[0].message.content
@@ -139,7 +146,7 @@ class PDFBot(discord.Client):
             # Extract just the JSON content between the first { and last }
             json_match = re.search(r'({.*})', content, re.DOTALL)
             if not json_match:
-                logger.error(f"Could not find JSON content in response: {content}")
+                logger.error("Could not find JSON content in response: %s", payload(content))
                 return None
                 
             json_content = json_match.group(1)
@@ -148,7 +155,7 @@ class PDFBot(discord.Client):
             try:
                 extracted_data = json.loads(json_content)
             except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON response from Mistral: {json_content}")
+                logger.error("Invalid JSON response from Mistral: %s", payload(json_content))
                 logger.error(f"JSON error: {str(e)}")
                 return None
 
@@ -165,7 +172,8 @@ class PDFBot(discord.Client):
                 return None
 
             # Sign the extracted data
-            signed_data = self.sign_data(extracted_data, signer_name)
+            with span("pdf_sign"):
+                signed_data = self.sign_data(extracted_data, signer_name)
             if not signed_data:
                 return None
 
@@ -177,7 +185,7 @@ class PDFBot(discord.Client):
 
         except Exception as e:
             logger.error(f"Error processing PDF content: {e}")
-            logger.error(f"Original text: {text[:500]}...")  # Log first 500 chars of text for debugging
+            logger.error("Original text: %s", payload(text, limit=500))
             return None
 
     async def on_message(self, message):
@@ -206,8 +214,10 @@ class PDFBot(discord.Client):
         try:
             processing_msg = await message.channel.send("Processing PDF, please wait...")
             
-            pdf_bytes = await attachment.read()
-            text_content = await self.extract_pdf_content(pdf_bytes)
+            with span("pdf_download"):
+                pdf_bytes = await attachment.read()
+            with span("pdf_extract"):
+                text_content = await self.extract_pdf_content(pdf_bytes)
             
             if not text_content:
                 await processing_msg.edit(content="Sorry, I couldn't read the PDF content.")
@@ -225,10 +235,11 @@ class PDFBot(discord.Client):
             signer_info = f" (signed by {processed_data['signed_data']['signer']})" if processed_data.get('signed_data', {}).get('signer') else ""
             
             await processing_msg.delete()
-            await message.channel.send(
-                f"Here's the processed and signed data{signer_info}:",
-                file=discord.File(filename)
-            )
+            with span("pdf_send"):
+                await message.channel.send(
+                    f"Here's the processed and signed data{signer_info}:",
+                    file=discord.File(filename)
+                )
             os.remove(filename)
 
         except Exception as e:
@@ -0,0 +1,26 @@
+import io
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _extract(pdf_bytes: bytes) -> str:
+    # PyPDF2 is only needed by the bots that read PDFs
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return "\n".join(page.extract_text() for page in pdf_reader.pages)
+
+
+async def extract_pdf_text(pdf_bytes: bytes) -> Optional[str]:
+    """Extract the text of a PDF in a worker thread, None if it cannot be read.
+
+    Used by the PDF signing bot and for PDFs attached to briefings; parsing
+    a long PDF takes seconds and would otherwise stall the event loop.
+    """
+    try:
+        return await asyncio.to_thread(_extract, pdf_bytes)
+    except Exception as e:
+        logger.error(f"Error extracting PDF content: {e}")
+        return None
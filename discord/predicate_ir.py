@@ -0,0 +1,263 @@
+import json
+from typing import Any, Dict, List, Tuple, Union
+
+from expression_eval import MalformedExpression, parse
+
+# Structured form of the verification conditions, pre-checked by the GCP
+# server before proving (GCP/verification_proof/lib/src/predicates.rs).
+#
+#   {"version": 1,
+#    "paths": [[0, "signed_data", "data", "offer_amount"], ...],
+#    "predicates": [["gt", ["get", 0, "f64"], ["f64", 1200000.0]], ...]}
+#
+# Every field path is stored once in `paths` and referenced by index, so the
+# evaluator resolves each distinct lookup a single time. Nodes are lists whose
+# first element is the operator:
+#
+#   ["f64", x] ["i64", n] ["str", s] ["bool", b]    constants
+#   ["get", path, type]   value at a path as f64/i64/u64/str/bool/json
+#   ["exists", path] ["is_null", path] ["count"]
+#   ["add"|"sub"|"mul"|"div"|"rem"|"min"|"max", a, b] ["neg"|"abs", a]
+#   ["sum", a, b, ...] ["avg", a, b, ...]            f64 aggregates
+#   ["to_f64", a] ["to_int", a]
+#   ["eq"|"ne"|"lt"|"le"|"gt"|"ge", a, b]
+#   ["and", a, b, ...] ["or", a, b, ...] ["not", a]
+PROGRAM_VERSION = 1
+
+Path = List[Union[int, str]]
+
+_ARITHMETIC = {"+": "add", "-": "sub", "*": "mul", "/": "div", "%": "rem"}
+_COMPARISONS = {"==": "eq", "!=": "ne", "<": "lt", "<=": "le", ">": "gt", ">=": "ge"}
+_GET_TYPES = {"as_f64": "f64", "as_i64": "i64", "as_u64": "u64", "as_str": "str", "as_bool": "bool"}
+# Value type produced by a typed lookup
+_VALUE_TYPES = {"f64": "f64", "i64": "int", "u64": "int", "str": "str", "bool": "bool", "json": "json"}
+
+# Operator -> (minimum arity, maximum arity or None for variadic)
+_ARITY = {
+    "f64": (1, 1), "i64": (1, 1), "str": (1, 1), "bool": (1, 1),
+    "get": (2, 2), "exists": (1, 1), "is_null": (1, 1), "count": (0, 0),
+    "add": (2, 2), "sub": (2, 2), "mul": (2, 2), "div": (2, 2), "rem": (2, 2),
+    "min": (2, 2), "max": (2, 2), "neg": (1, 1), "abs": (1, 1),
+    "sum": (2, None), "avg": (2, None), "to_f64": (1, 1), "to_int": (1, 1),
+    "eq": (2, 2), "ne": (2, 2), "lt": (2, 2), "le": (2, 2), "gt": (2, 2), "ge": (2, 2),
+    "and": (2, None), "or": (2, None), "not": (1, 1),
+}
+
+
+class ProgramBuilder:
+    """Lowers expression ASTs into a predicate program with a shared path table"""
+
+    def __init__(self):
+        self.paths: List[Path] = []
+        self.predicates: List[list] = []
+        self._path_ids: Dict[Tuple, int] = {}
+
+    def add(self, expression: str) -> None:
+        """Lower one boolean expression, raising MalformedExpression if the IR cannot express it"""
+        checkpoint = len(self.paths)
+        try:
+            node, kind = self._lower(parse(expression))
+            if kind != "bool":
+                raise MalformedExpression(f"expression evaluates to {kind}, not bool")
+        except MalformedExpression:
+            # Forget paths only the rejected expression referenced
+            for path in self.paths[checkpoint:]:
+                del self._path_ids[tuple(path)]
+            del self.paths[checkpoint:]
+            raise
+        self.predicates.append(node)
+
+    def program(self) -> Dict[str, Any]:
+        return {"version": PROGRAM_VERSION, "paths": self.paths, "predicates": self.predicates}
+
+    def _path_id(self, path: Path) -> int:
+        key = tuple(path)
+        if key not in self._path_ids:
+            self._path_ids[key] = len(self.paths)
+            self.paths.append(list(path))
+        return self._path_ids[key]
+
+    def _access(self, node: tuple) -> Tuple[str, Any]:
+        """Classify a field-access chain as ("root", None), ("path", steps),
+        ("option", steps) or ("typed", (steps, type)); ("value", None) otherwise"""
+        kind = node[0]
+        if kind == "root":
+            return "root", None
+        if kind == "index" or (kind == "method" and node[2] == "get" and len(node[3]) == 1):
+            base, steps = self._access(node[1])
+            key = node[2] if kind == "index" else node[3][0]
+            if key[0] != "literal" or isinstance(key[1], (bool, float)):
+                raise MalformedExpression("field paths must use literal keys and indices")
+            if base == "root":
+                if not isinstance(key[1], int):
+                    raise MalformedExpression("json_dicts must be indexed by position")
+                steps = []
+            elif base != "path":
+                raise MalformedExpression("cannot index into an unwrapped option or scalar")
+            steps = steps + [key[1]]
+            return ("path" if kind == "index" else "option"), steps
+        if kind == "method" and not node[3]:
+            base, value = self._access(node[1])
+            name = node[2]
+            if name == "unwrap" and base == "option":
+                return "path", value
+            if name == "unwrap" and base == "typed_option":
+                return "typed", value
+            if name in _GET_TYPES and base == "path":
+                return "typed_option", (value, _GET_TYPES[name])
+        return "value", None
+
+    def _lower(self, node: tuple) -> Tuple[list, str]:
+        """Return (ir_node, type) for an AST node"""
+        access, value = self._access(node)
+        if access == "path":
+            if len(value) < 2:
+                raise MalformedExpression("a whole document is not a comparable value")
+            return ["get", self._path_id(value), "json"], "json"
+        if access == "typed":
+            path, get_type = value
+            return ["get", self._path_id(path), get_type], _VALUE_TYPES[get_type]
+        if access != "value":
+            raise MalformedExpression("option or collection used as a value")
+
+        kind = node[0]
+        if kind == "literal":
+            literal = node[1]
+            if isinstance(literal, bool):
+                return ["bool", literal], "bool"
+            if isinstance(literal, int):
+                return ["i64", literal], "int"
+            if isinstance(literal, float):
+                return ["f64", literal], "f64"
+            return ["str", literal], "str"
+
+        if kind == "method":
+            return self._lower_method(node)
+
+        if kind == "cast":
+            operand, operand_type = self._lower(node[1])
+            if operand_type not in ("f64", "int"):
+                raise MalformedExpression(f"cannot cast {operand_type}")
+            if node[2] == "f64":
+                return ["to_f64", operand], "f64"
+            return ["to_int", operand], "int"
+
+        if kind == "unary":
+            operand, operand_type = self._lower(node[2])
+            if node[1] == "!":
+                if operand_type != "bool":
+                    raise MalformedExpression(f"cannot apply ! to {operand_type}")
+                return ["not", operand], "bool"
+            if operand_type not in ("f64", "int"):
+                raise MalformedExpression(f"cannot negate {operand_type}")
+            return ["neg", operand], operand_type
+
+        if kind == "binary":
+            return self._lower_binary(node[1], node[2], node[3])
+
+        raise MalformedExpression(f"cannot lower {kind} node")
+
+    def _lower_method(self, node: tuple) -> Tuple[list, str]:
+        receiver, name, args = node[1], node[2], node[3]
+        access, value = self._access(receiver)
+        if name in ("is_some", "is_none") and access == "option" and not args:
+            exists = ["exists", self._path_id(value)]
+            return (exists if name == "is_some" else ["not", exists]), "bool"
+        if name == "is_null" and access == "path" and not args:
+            return ["is_null", self._path_id(value)], "bool"
+        if name == "len" and access == "root" and not args:
+            return ["count"], "int"
+
+        operand, operand_type = self._lower(receiver)
+        if operand_type in ("f64", "int"):
+            if name == "abs" and not args:
+                return ["abs", operand], operand_type
+            if name in ("min", "max") and len(args) == 1:
+                other, other_type = self._lower(args[0])
+                if other_type == operand_type:
+                    return [name, operand, other], operand_type
+        raise MalformedExpression(f"method {name}() is not supported on {operand_type}")
+
+    def _lower_binary(self, op: str, left_node: tuple, right_node: tuple) -> Tuple[list, str]:
+        left, left_type = self._lower(left_node)
+        right, right_type = self._lower(right_node)
+
+        if op in ("&&", "||"):
+            if left_type != "bool" or right_type != "bool":
+                raise MalformedExpression(f"{op} expects bool operands")
+            name = "and" if op == "&&" else "or"
+            # Flatten a && b && c into one variadic node
+            operands = []
+            for operand in (left, right):
+                operands.extend(operand[1:] if operand[0] == name else [operand])
+            return [name] + operands, "bool"
+
+        if op in _COMPARISONS:
+            json_equality = op in ("==", "!=") and "json" in (left_type, right_type)
+            if left_type != right_type and not json_equality:
+                raise MalformedExpression(f"cannot compare {left_type} with {right_type}")
+            if left_type == "json" and right_type == "json" and op not in ("==", "!="):
+                raise MalformedExpression("serde_json values can only be compared for equality")
+            return [_COMPARISONS[op], left, right], "bool"
+
+        if left_type != right_type or left_type not in ("f64", "int"):
+            raise MalformedExpression(f"cannot apply {op} to {left_type} and {right_type}")
+        if left_type == "f64" and op == "+":
+            # a + b + c becomes one aggregate node
+            operands = []
+            for operand in (left, right):
+                operands.extend(operand[1:] if operand[0] == "sum" else [operand])
+            return ["sum"] + operands, "f64"
+        if (left_type == "f64" and op == "/" and left[0] == "sum"
+                and right[0] == "f64" and right[1] == len(left) - 1):
+            # (a + b) / 2.0 is an average
+            return ["avg"] + left[1:], "f64"
+        return [_ARITHMETIC[op], left, right], left_type
+
+
+def compile_program(expressions: List[str]) -> Dict[str, Any]:
+    """Compile boolean expressions into a predicate program, one predicate each"""
+    builder = ProgramBuilder()
+    for expression in expressions:
+        builder.add(expression)
+    return builder.program()
+
+
+def validate_program(program: Dict[str, Any]) -> None:
+    """Check a program's structure before it is sent to the prover"""
+    if not isinstance(program, dict) or program.get("version") != PROGRAM_VERSION:
+        raise MalformedExpression(f"expected a version {PROGRAM_VERSION} predicate program")
+    paths = program.get("paths")
+    predicates = program.get("predicates")
+    if not isinstance(paths, list) or not isinstance(predicates, list) or not predicates:
+        raise MalformedExpression("program needs a path table and at least one predicate")
+    # A path is a document position followed by keys and indices; the
+    # position alone is a whole document (`json_dicts.get(n).is_some()`)
+    for path in paths:
+        if (not isinstance(path, list) or not path or type(path[0]) is not int
+                or not all(type(step) in (int, str) for step in path)):
+            raise MalformedExpression(f"invalid path {path!r}")
+
+    def check(node: Any) -> None:
+        if not isinstance(node, list) or not node or node[0] not in _ARITY:
+            raise MalformedExpression(f"invalid node {node!r}")
+        op, args = node[0], node[1:]
+        low, high = _ARITY[op]
+        if len(args) < low or (high is not None and len(args) > high):
+            raise MalformedExpression(f"{op} takes {low}..{high or 'n'} operands, got {len(args)}")
+        if op in ("get", "exists", "is_null"):
+            if type(args[0]) is not int or not 0 <= args[0] < len(paths):
+                raise MalformedExpression(f"{op} refers to unknown path {args[0]!r}")
+            if op == "get" and args[1] not in _VALUE_TYPES:
+                raise MalformedExpression(f"unknown value type {args[1]!r}")
+        elif op not in ("f64", "i64", "str", "bool"):
+            for arg in args:
+                check(arg)
+
+    for predicate in predicates:
+        check(predicate)
+
+
+def canonical_json(program: Dict[str, Any]) -> str:
+    """Stable serialization, so identical programs share a proof cache entry"""
+    return json.dumps(program, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
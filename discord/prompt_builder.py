@@ -0,0 +1,146 @@
+import json
+from typing import Any, List, Dict, Optional
+
+BRIEFING_HEADER = "----(BRIEFING INFORMATION)------\n\n"
+DOCUMENTS_HEADER = "----(BRIEFING DOCUMENTS)------\n\n"
+SUMMARY_HEADER = "----(EARLIER CONVERSATION SUMMARY)------\n\n"
+CONVERSATION_HEADER = "-----(CURRENT CONVERSATION)-------\n\n"
+NO_BRIEFING = "No briefing information available."
+NO_CONVERSATION = "No conversation yet."
+
+
+# Rough characters-per-token ratio for English text with Mistral's tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for context budgeting"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def render_document(index: int, document: Any) -> str:
+    """Format one briefing document as compact JSON under its json_dicts index"""
+    return f"json_dicts[{index}]: {json.dumps(document, separators=(',', ':'), ensure_ascii=False)}\n"
+
+
+def render_turn(msg: Dict[str, str]) -> str:
+    """Format a single history entry the way the prompt presents it"""
+    role = "User" if msg["role"] == "me" else "else"
+    return f"{role}: {msg['content']}\n\n"
+
+
+class PromptBuilder:
+    """Assembles the agent's system prompt from cached segments.
+
+    The personality and briefing only change when new briefing material
+    arrives, so they are rendered once into a cached head. Conversation turns
+    are rendered once as they are appended to the history, so building the
+    prompt for a new turn only formats the new turns.
+    """
+
+    def __init__(self, personality: str):
+        self.personality = personality
+        self._briefing: Optional[str] = None
+        self._summary = ""
+        self._documents: Optional[List[Any]] = None
+        self._rendered_documents: List[str] = []
+        self._documents_text = ""
+        self._head = ""
+        self._history: Optional[List[Dict[str, str]]] = None
+        self._turns: List[str] = []
+        self._conversation = ""
+        self._prompt: Optional[str] = None
+
+    def set_briefing(self, briefing_text: str) -> None:
+        """Re-render the static head if the briefing changed"""
+        if self._briefing is not None and briefing_text is self._briefing:
+            return
+        self._briefing = briefing_text
+        self._render_head()
+
+    def set_documents(self, documents: List[Any]) -> None:
+        """Render documents appended to `documents` since the last call.
+
+        Briefings reference their JSON files by index instead of holding a
+        copy, so the documents get their own section of the head.
+        """
+        replaced = documents is not self._documents or len(documents) < len(self._rendered_documents)
+        if replaced and not documents and not self._rendered_documents:
+            self._documents = documents
+            return
+        if replaced:
+            self._documents = documents
+            self._rendered_documents = []
+            self._documents_text = ""
+        elif len(documents) == len(self._rendered_documents):
+            return
+        for i in range(len(self._rendered_documents), len(documents)):
+            rendered = render_document(i, documents[i])
+            self._rendered_documents.append(rendered)
+            self._documents_text += rendered
+        if self._briefing is not None:
+            self._render_head()
+
+    def set_summary(self, summary: str) -> None:
+        """Set the rolling summary of turns that left the history window"""
+        if summary == self._summary:
+            return
+        self._summary = summary
+        if self._briefing is not None:
+            self._render_head()
+
+    def _render_head(self) -> None:
+        head = (
+            self.personality + "\n\n"
+            + BRIEFING_HEADER
+            + (self._briefing if self._briefing else NO_BRIEFING)
+            + "\n\n"
+        )
+        if self._documents_text:
+            head += DOCUMENTS_HEADER + self._documents_text + "\n"
+        if self._summary:
+            head += SUMMARY_HEADER + self._summary + "\n\n"
+        self._head = head + CONVERSATION_HEADER
+        self._prompt = None
+
+    def sync_history(self, history: List[Dict[str, str]]) -> None:
+        """Render any turns appended to `history` since the last sync.
+
+        A different list object, or one shorter than what was rendered, means
+        the history was trimmed or replaced and is rendered from scratch.
+        """
+        if history is not self._history or len(history) < len(self._turns):
+            self._history = history
+            self._turns = []
+            self._conversation = ""
+            self._prompt = None
+        for msg in history[len(self._turns):]:
+            turn = render_turn(msg)
+            self._turns.append(turn)
+            self._conversation += turn
+            self._prompt = None
+
+    def invalidate(self) -> None:
+        """Forget rendered turns, e.g. after a history entry was edited in place"""
+        self._history = None
+
+    @property
+    def documents_text(self) -> str:
+        return self._documents_text
+
+    @property
+    def conversation_text(self) -> str:
+        return self._conversation if self._turns else NO_CONVERSATION
+
+    def build(self) -> str:
+        """Return the assembled prompt, reusing it if nothing changed"""
+        if self._prompt is None:
+            if self._briefing is None:
+                self.set_briefing("")
+            self._prompt = self._head + self.conversation_text
+        return self._prompt
+
+    @property
+    def size(self) -> int:
+        """Length of the assembled prompt in characters"""
+        return len(self.build())
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# zkVM cycles a negotiation, and the whole process per hour, may spend on proofs; 0 = unlimited
+PROOF_CYCLE_BUDGET_PER_NEGOTIATION = int(os.getenv("PROOF_CYCLE_BUDGET_PER_NEGOTIATION", "100000000"))
+PROOF_CYCLE_BUDGET_PER_HOUR = int(os.getenv("PROOF_CYCLE_BUDGET_PER_HOUR", "1000000000"))
+# Estimate for a condition shape that has never been proven
+PROOF_DEFAULT_CYCLES = int(os.getenv("PROOF_DEFAULT_CYCLES", "20000000"))
+# Until measured, a batched claim is assumed to cost this fraction of a solo proof
+BATCH_COST_FACTOR = 0.5
+COST_SMOOTHING = 0.3  # weight of the newest measurement in the running average
+HOUR = 60 * 60
+
+PROVE = "prove"
+BATCH = "batch"
+SKIP = "skip"
+
+
+def _skeleton(node: Any) -> Any:
+    """A predicate with constants and concrete paths abstracted away"""
+    op = node[0]
+    if op in ("f64", "i64", "str", "bool"):
+        return op
+    if op == "get":
+        return ["get", node[2]]
+    if op in ("exists", "is_null"):
+        return [op]
+    return [op] + [_skeleton(arg) for arg in node[1:]]
+
+
+def condition_shape(predicates: Optional[Dict[str, Any]], verification_text: str,
+                    json_dicts: List[Dict[str, Any]]) -> str:
+    """Key claims that should cost about the same number of cycles.
+
+    The guest parses every document, so the document count and size (in
+    powers of two) matter as much as the structure of the predicates.
+    """
+    if predicates is not None:
+        structure = [_skeleton(predicate) for predicate in predicates["predicates"]]
+    else:
+        structure = ["text", len(verification_text.splitlines())]
+    size = len(json.dumps(json_dicts, separators=(',', ':')))
+    shape = json.dumps([structure, len(json_dicts), size.bit_length()], separators=(',', ':'))
+    return hashlib.sha256(shape.encode('utf-8')).hexdigest()[:16]
+
+
+class ProofPlan:
+    """The scheduler's decision for one claim, with the cycles reserved for it"""
+
+    def __init__(self, action: str, negotiation: Any, shape: str, reserved: int,
+                 entry: Optional[list] = None):
+        self.action = action
+        self.negotiation = negotiation
+        self.shape = shape
+        self.reserved = reserved
+        self._entry = entry  # the hourly-window entry holding the reservation
+
+
+class ProofBudget:
+    """Decides which claims to prove, batch or skip against cycle budgets.
+
+    Each condition shape keeps running averages of the cycles a solo and a
+    batched proof cost. A claim is proven on its own if its estimated cost
+    fits both the negotiation's and the process's hourly budget, batched if
+    only the cheaper batched cost fits, and skipped otherwise. Estimates are
+    reserved up front so concurrent claims cannot overshoot, then settled
+    against the cycles the server reports.
+    """
+
+    def __init__(self, per_negotiation: int = PROOF_CYCLE_BUDGET_PER_NEGOTIATION,
+                 per_hour: int = PROOF_CYCLE_BUDGET_PER_HOUR):
+        self.per_negotiation = per_negotiation
+        self.per_hour = per_hour
+        self._costs: Dict[Tuple[str, bool], float] = {}
+        self._spent: Dict[Any, int] = {}
+        self._hourly: Deque[list] = deque()  # [timestamp, cycles]
+        self._hourly_total = 0
+        self.skipped = 0
+
+    def estimate(self, shape: str, batched: bool) -> int:
+        """Estimated cycles for a claim of this shape"""
+        cost = self._costs.get((shape, batched))
+        if cost is None and batched:
+            return int(self.estimate(shape, False) * BATCH_COST_FACTOR)
+        return int(cost if cost is not None else PROOF_DEFAULT_CYCLES)
+
+    def remaining(self, negotiation: Any) -> Optional[int]:
+        """Cycles still available to a negotiation, None if unlimited"""
+        limits = []
+        if self.per_negotiation > 0:
+            limits.append(self.per_negotiation - self._spent.get(negotiation, 0))
+        if self.per_hour > 0:
+            self._prune_hourly()
+            limits.append(self.per_hour - self._hourly_total)
+        return min(limits) if limits else None
+
+    def plan(self, negotiation: Any, shape: str, can_batch: bool = True) -> ProofPlan:
+        """Decide what to do with a claim and reserve its estimated cost"""
+        remaining = self.remaining(negotiation)
+        solo = self.estimate(shape, False)
+        batched = self.estimate(shape, True)
+        if remaining is None or solo <= remaining:
+            action, cost = PROVE, solo
+        elif can_batch and batched <= remaining:
+            action, cost = BATCH, batched
+        else:
+            self.skipped += 1
+            logger.info(f"Skipping proof: ~{solo} cycles, {remaining} left in budget")
+            return ProofPlan(SKIP, negotiation, shape, 0)
+        entry = [time.monotonic(), cost]
+        self._hourly.append(entry)
+        self._hourly_total += cost
+        self._spent[negotiation] = self._spent.get(negotiation, 0) + cost
+        return ProofPlan(action, negotiation, shape, cost, entry)
+
+    def settle(self, plan: ProofPlan, response: Dict[str, Any]) -> None:
+        """Replace a plan's reservation with what the proof actually cost"""
+        if plan.action == SKIP:
+            return
+        cycles = response.get('cycles')
+        if not response:
+            actual = 0  # nothing was proven
+        elif response.get('cached'):
+            actual = 0
+        elif cycles is None:
+            actual = plan.reserved  # server does not report cycles
+        else:
+            actual = int(cycles)
+            self.record(plan.shape, plan.action == BATCH, actual)
+        delta = actual - plan.reserved
+        self._spent[plan.negotiation] = self._spent.get(plan.negotiation, 0) + delta
+        # Adjust the reservation in place, so it leaves the hourly window at the right time
+        self._prune_hourly()
+        if plan._entry is not None and plan._entry[0] >= time.monotonic() - HOUR:
+            plan._entry[1] += delta
+            self._hourly_total += delta
+        plan.reserved = actual
+
+    def record(self, shape: str, batched: bool, cycles: int) -> None:
+        """Fold a measured cycle count into the shape's running average"""
+        key = (shape, batched)
+        previous = self._costs.get(key)
+        self._costs[key] = cycles if previous is None else (
+            COST_SMOOTHING * cycles + (1 - COST_SMOOTHING) * previous)
+
+    def spent(self, negotiation: Any) -> int:
+        """Cycles a negotiation has spent or reserved"""
+        return self._spent.get(negotiation, 0)
+
+    def restore_spent(self, negotiation: Any, cycles: int) -> None:
+        """Carry a restored negotiation's spending over from its saved session"""
+        if cycles:
+            self._spent[negotiation] = cycles
+
+    def forget(self, negotiation: Any) -> None:
+        """Drop a finished negotiation's spending"""
+        self._spent.pop(negotiation, None)
+
+    def stats(self) -> Dict[str, int]:
+        self._prune_hourly()
+        return {
+            "shapes": len(self._costs),
+            "hourly_cycles": self._hourly_total,
+            "skipped": self.skipped,
+        }
+
+    def _prune_hourly(self) -> None:
+        cutoff = time.monotonic() - HOUR
+        while self._hourly and self._hourly[0][0] < cutoff:
+            self._hourly_total -= self._hourly.popleft()[1]
+
+
+_budget: Optional[ProofBudget] = None
+
+
+def get_budget() -> ProofBudget:
+    """Return the proof budget shared by every negotiation in the process"""
+    global _budget
+    if _budget is None:
+        _budget = ProofBudget()
+    return _budget
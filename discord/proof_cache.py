@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from log_payload import log_sampled
+
+logger = logging.getLogger(__name__)
+
+PROOF_CACHE_DIR = os.getenv("PROOF_CACHE_DIR", ".proof_cache")
+PROOF_CACHE_TTL = float(os.getenv("PROOF_CACHE_TTL", str(24 * 60 * 60)))  # seconds
+PROOF_CACHE_MAX_ENTRIES = int(os.getenv("PROOF_CACHE_MAX_ENTRIES", "256"))  # in memory
+PROOF_CACHE_MAX_BYTES = int(os.getenv("PROOF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # on disk
+
+
+class ProofCache:
+    """In-memory LRU of prover responses backed by a directory of JSON files.
+
+    Entries are keyed by a hash of the verification conditions and the
+    documents they are checked against, so the same claim over the same data
+    is only proven once, including across restarts.
+    """
+
+    def __init__(self, cache_dir: str = PROOF_CACHE_DIR, ttl: float = PROOF_CACHE_TTL,
+                 max_entries: int = PROOF_CACHE_MAX_ENTRIES, max_bytes: int = PROOF_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(verification_file: str, json_dicts: List[Dict[str, Any]]) -> str:
+        """Hash the normalized conditions together with the canonical documents"""
+        conditions = "\n".join(line.strip() for line in verification_file.splitlines() if line.strip())
+        documents = json.dumps(json_dicts, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        digest = hashlib.sha256()
+        digest.update(conditions.encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(documents.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response, or None on a miss"""
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is not None and time.time() - entry[0] < self.ttl:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            log_sampled(logger, logging.INFO, "proof_cache_hit", "Proof cache hit (%d hits, %d misses)",
+                        self.hits, self.misses)
+            return dict(entry[1])
+
+        if entry is not None:
+            self._discard(key)
+        self.misses += 1
+        return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a prover response in memory and on disk"""
+        entry = (time.time(), dict(response))
+        self._remember(key, entry)
+        try:
+            # Write then rename so a crash never leaves a partial entry behind
+            tmp_path = self._path(key).with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"created": entry[0], "response": entry[1]}, f)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except OSError as e:
+            logger.error(f"Error writing proof cache entry: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current cache size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "disk_bytes": sum(size for _, size, _ in self._disk_entries()),
+        }
+
+    def _remember(self, key: str, entry: Tuple[float, Dict[str, Any]]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _discard(self, key: str) -> None:
+        self._memory.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        try:
+            with open(self._path(key)) as f:
+                stored = json.load(f)
+            return stored["created"], stored["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _disk_entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict_disk(self) -> None:
+        """Drop expired files, then the oldest ones until the directory fits in max_bytes"""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, path in entries:
+            if now - mtime < self.ttl and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,173 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Mistral's default tier allows one request per second per API key
+MISTRAL_REQUESTS_PER_SECOND = float(os.getenv("MISTRAL_REQUESTS_PER_SECOND", "1"))
+MISTRAL_TOKENS_PER_MINUTE = int(os.getenv("MISTRAL_TOKENS_PER_MINUTE", "500000"))
+MISTRAL_MAX_RETRIES = int(os.getenv("MISTRAL_MAX_RETRIES", "5"))
+
+# Lower numbers are served first
+PRIORITY_NEGOTIATION = 0
+PRIORITY_VERIFICATION = 1
+PRIORITY_SUMMARY = 2
+PRIORITY_PDF = 3
+
+# After a 429 the request interval is doubled (up to this factor) and then
+# eased back toward the configured rate on every success.
+MAX_SLOWDOWN = 8.0
+RECOVERY_FACTOR = 0.9
+DEFAULT_RETRY_AFTER = 2.0  # seconds, when a 429 carries no Retry-After header
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(error, "status", None)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the Retry-After header (seconds) from an SDK error, if present"""
+    response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class MistralRateLimiter:
+    """Process-wide limiter for Mistral requests and tokens.
+
+    Callers wait in a priority queue, so negotiation replies are dispatched
+    ahead of summaries and PDF extraction. Requests are spaced to the
+    allowed request rate and drawn from a per-minute token bucket; a 429
+    pauses everyone for its Retry-After and temporarily slows the rate.
+    """
+
+    def __init__(self, requests_per_second: float = MISTRAL_REQUESTS_PER_SECOND,
+                 tokens_per_minute: int = MISTRAL_TOKENS_PER_MINUTE):
+        self.base_interval = 1.0 / requests_per_second
+        self.interval = self.base_interval
+        self.token_capacity = tokens_per_minute
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot"""
+        return sum(1 for entry in self._waiters if not entry[3].done())
+
+    async def acquire(self, priority: int, tokens: int) -> None:
+        """Wait for a request slot with enough token budget"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), tokens, future])
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    def release_unused(self, reserved: int, used: int) -> None:
+        """Return tokens reserved for a request but not consumed by it"""
+        self._refill()
+        self._tokens = min(self.token_capacity, self._tokens + max(0, reserved - used))
+
+    def throttled(self, retry_after: Optional[float]) -> None:
+        """Record a 429: pause all requests and slow the request rate"""
+        pause = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        self.interval = min(self.base_interval * MAX_SLOWDOWN, self.interval * 2)
+        logger.warning(f"Mistral rate limited; pausing {pause:.1f}s, interval now {self.interval:.2f}s "
+                       f"({self.queue_depth} queued)")
+
+    def succeeded(self) -> None:
+        """Ease the request rate back toward the configured limit"""
+        self.interval = max(self.base_interval, self.interval * RECOVERY_FACTOR)
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args,
+                   priority: int = PRIORITY_NEGOTIATION, tokens: int = 0, **kwargs) -> Any:
+        """Call an async Mistral SDK method under the limiter, retrying on 429
+
+        Args:
+            fn: The SDK coroutine function, e.g. client.chat.complete_async
+            priority: One of the PRIORITY_* constants
+            tokens: Estimated prompt + completion tokens for the request
+        """
+        tokens = min(tokens, self.token_capacity)
+        for attempt in range(MISTRAL_MAX_RETRIES + 1):
+            with span("mistral_queue"):
+                await self.acquire(priority, tokens)
+            try:
+                response = await fn(*args, **kwargs)
+            except Exception as e:
+                if _status_code(e) != 429 or attempt == MISTRAL_MAX_RETRIES:
+                    raise
+                self.release_unused(tokens, 0)
+                self.throttled(_retry_after(e))
+                continue
+            self.succeeded()
+            usage = getattr(response, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None) is not None:
+                self.release_unused(tokens, usage.total_tokens)
+            return response
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.token_capacity / 60.0
+        self._tokens = min(self.token_capacity, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+    def _delay_for(self, tokens: int) -> float:
+        """Seconds until a request needing `tokens` may start"""
+        self._refill()
+        now = time.monotonic()
+        delay = max(self._next_slot - now, self._paused_until - now, 0.0)
+        if self._tokens < tokens:
+            delay = max(delay, (tokens - self._tokens) / (self.token_capacity / 60.0))
+        return delay
+
+    async def _dispatch(self) -> None:
+        """Release waiters in priority order as capacity becomes available"""
+        while self._waiters:
+            priority, seq, tokens, future = self._waiters[0]
+            if future.done():
+                # Caller was cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._delay_for(tokens)
+            if delay > 0:
+                # Re-check the head afterwards: a more urgent request may have arrived
+                await asyncio.sleep(delay)
+                continue
+            heapq.heappop(self._waiters)
+            self._tokens -= tokens
+            self._next_slot = time.monotonic() + self.interval
+            future.set_result(None)
+
+
+_limiter: Optional[MistralRateLimiter] = None
+
+
+def get_limiter() -> MistralRateLimiter:
+    """Return the limiter shared by every Mistral call in the process"""
+    global _limiter
+    if _limiter is None:
+        _limiter = MistralRateLimiter()
+    return _limiter
+
+
+def set_limiter(limiter: MistralRateLimiter) -> None:
+    """Replace the shared limiter, e.g. with an unthrottled one for offline runs"""
+    global _limiter
+    _limiter = limiter
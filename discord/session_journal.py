@@ -0,0 +1,226 @@
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SESSION_JOURNAL_DIR = os.getenv("SESSION_JOURNAL_DIR", "")  # empty = keep sessions in memory only
+SESSION_SNAPSHOT_EVERY = int(os.getenv("SESSION_SNAPSHOT_EVERY", "500"))  # journal entries between snapshots
+SESSION_JOURNAL_FSYNC = os.getenv("SESSION_JOURNAL_FSYNC", "0") == "1"
+SNAPSHOT_VERSION = 1
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {
+        "briefing_text": "",
+        "json_dicts": [],
+        "context": [],
+        "conversation_history": [],
+        "turn_count": 0,
+        "history_summary": "",
+        "pending_summary": [],
+        "negotiation_started": False,
+        "proof_cycles_spent": 0,
+    }
+
+
+def apply_entry(states: Dict[int, Dict[str, Any]], entry: Dict[str, Any]) -> None:
+    """Replay one journal entry onto the session states"""
+    key = entry["session"]
+    if entry.get("end"):
+        states.pop(key, None)
+        return
+    state = states.setdefault(key, _empty_state())
+    state["briefing_text"] += entry.get("brief", "")
+    state["json_dicts"].extend(entry.get("json", []))
+    state["context"].extend(entry.get("context", []))
+    turns = entry.get("turns", [])
+    history = state["conversation_history"] + turns
+    state["conversation_history"] = history[len(history) - entry.get("keep", len(history)):]
+    state["turn_count"] = entry.get("turn_count", state["turn_count"])
+    # Turns edited after they were recorded, by absolute turn number
+    first_turn = state["turn_count"] - len(state["conversation_history"])
+    for turn, content in entry.get("patch", {}).items():
+        index = int(turn) - first_turn
+        if 0 <= index < len(state["conversation_history"]):
+            state["conversation_history"][index]["content"] = content
+    for field in ("history_summary", "pending_summary", "negotiation_started", "proof_cycles_spent"):
+        if field in entry:
+            state[field] = entry[field]
+
+
+class SessionJournal:
+    """Append-only journal of session changes with periodic snapshots.
+
+    After each handled briefing or negotiation event, record() appends what
+    changed in the session since the last entry: new briefing text,
+    documents and turns, how many turns the history kept, and the summary
+    if it changed. Every `snapshot_every` entries the live sessions are
+    written to a snapshot and the journal starts over, so a restart loads
+    one snapshot and replays a short journal instead of the channel history.
+    """
+
+    def __init__(self, name: str, directory: str = SESSION_JOURNAL_DIR,
+                 snapshot_every: int = SESSION_SNAPSHOT_EVERY, fsync: bool = SESSION_JOURNAL_FSYNC):
+        self.directory = Path(directory)
+        self.journal_path = self.directory / f"{name}.jsonl"
+        self.snapshot_path = self.directory / f"{name}.snapshot.json"
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.entries = 0  # entries since the last snapshot
+        self._cursors: Dict[int, Dict[str, Any]] = {}
+        self._file = None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """Rebuild every session's state from the snapshot and the journal"""
+        states: Dict[int, Dict[str, Any]] = {}
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") == SNAPSHOT_VERSION:
+                states = {int(key): state for key, state in snapshot["sessions"].items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not read session snapshot {self.snapshot_path}: {e}")
+
+        try:
+            with open(self.journal_path, 'rb+') as f:
+                good = 0
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        apply_entry(states, json.loads(line))
+                    except (ValueError, KeyError, TypeError) as e:
+                        # A torn final line is expected after a crash; cut the journal
+                        # at the first bad entry so new entries are not appended after it
+                        logger.warning(f"Truncating {self.journal_path} at line {line_number}: {e}")
+                        f.truncate(good)
+                        break
+                    good += len(line)
+                    self.entries += 1
+        except FileNotFoundError:
+            pass
+
+        for key, state in states.items():
+            self._cursors[key] = self._cursor(state)
+        logger.info(f"Restored {len(states)} sessions from {self.directory}")
+        return states
+
+    def record(self, key: int, state: Dict[str, Any],
+               live_sessions: Optional[Callable[[], Iterable[Tuple[int, Any]]]] = None) -> None:
+        """Append the changes to a session's state (an agent snapshot()) since it was last recorded.
+
+        `live_sessions` yields (key, agent) pairs and is used to write a
+        snapshot when the journal has grown long enough.
+        """
+        cursor = self._cursors.get(key) or self._cursor(_empty_state())
+        entry: Dict[str, Any] = {"session": key}
+        if len(state["briefing_text"]) > cursor["brief"]:
+            entry["brief"] = state["briefing_text"][cursor["brief"]:]
+        if len(state["json_dicts"]) > cursor["json"]:
+            entry["json"] = state["json_dicts"][cursor["json"]:]
+        if len(state["context"]) > cursor["context"]:
+            entry["context"] = state["context"][cursor["context"]:]
+        new_turns = state["turn_count"] - cursor["turns"]
+        history = state["conversation_history"]
+        if new_turns > 0:
+            # Turns trimmed before they were recorded are only kept in pending_summary
+            entry["turns"] = history[len(history) - min(new_turns, len(history)):]
+            entry["turn_count"] = state["turn_count"]
+        if new_turns > 0 or len(history) != cursor["keep"]:
+            entry["keep"] = len(history)
+        patch = self._edited_turns(cursor, state)
+        if patch:
+            entry["patch"] = patch
+        if state["history_summary"] != cursor["summary"]:
+            entry["history_summary"] = state["history_summary"]
+        if len(state["pending_summary"]) != cursor["pending"] or "history_summary" in entry:
+            entry["pending_summary"] = state["pending_summary"]
+        if state["negotiation_started"] != cursor["started"]:
+            entry["negotiation_started"] = state["negotiation_started"]
+        if state["proof_cycles_spent"] != cursor["spent"]:
+            entry["proof_cycles_spent"] = state["proof_cycles_spent"]
+        if len(entry) == 1:
+            return
+
+        self._append(entry)
+        self._cursors[key] = self._cursor(state)
+        if live_sessions is not None and self.snapshot_every and self.entries >= self.snapshot_every:
+            self.compact(live_sessions())
+
+    def end(self, key: int) -> None:
+        """Drop a session from the journal"""
+        if self._cursors.pop(key, None) is not None:
+            self._append({"session": key, "end": True})
+
+    def compact(self, live_sessions: Iterable[Tuple[int, Any]]) -> None:
+        """Write the live sessions to a fresh snapshot and truncate the journal"""
+        sessions = {str(key): agent.snapshot() for key, agent in live_sessions}
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": SNAPSHOT_VERSION, "sessions": sessions}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.error(f"Could not write session snapshot {self.snapshot_path}: {e}")
+            return
+        # Entries up to here are in the snapshot; sessions missing from it have ended
+        self.close()
+        open(self.journal_path, 'w').close()
+        self._cursors = {int(key): self._cursor(state) for key, state in sessions.items()}
+        self.entries = 0
+        logger.info(f"Snapshot of {len(sessions)} sessions written to {self.snapshot_path}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        try:
+            if self._file is None:
+                self._file = open(self.journal_path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.entries += 1
+        except OSError as e:
+            logger.error(f"Could not append to session journal {self.journal_path}: {e}")
+
+    @staticmethod
+    def _edited_turns(cursor: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, str]:
+        """Turns recorded before whose content has changed since, by absolute turn number"""
+        history = state["conversation_history"]
+        first_turn = state["turn_count"] - len(history)
+        recorded_first = cursor["turns"] - len(cursor["contents"])
+        patch = {}
+        for turn in range(max(first_turn, recorded_first), min(state["turn_count"], cursor["turns"])):
+            content = history[turn - first_turn]["content"]
+            recorded = cursor["contents"][turn - recorded_first]
+            if content is not recorded and content != recorded:
+                patch[str(turn)] = content
+        return patch
+
+    @staticmethod
+    def _cursor(state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "brief": len(state["briefing_text"]),
+            "json": len(state["json_dicts"]),
+            "context": len(state["context"]),
+            "turns": state["turn_count"],
+            "keep": len(state["conversation_history"]),
+            # References, not copies: turns edited in place get new strings
+            "contents": [msg["content"] for msg in state["conversation_history"]],
+            "summary": state["history_summary"],
+            "pending": len(state["pending_summary"]),
+            "started": state["negotiation_started"],
+            # Snapshots written before proof budgets were journaled lack it
+            "spent": state.get("proof_cycles_spent", 0),
+        }
@@ -0,0 +1,129 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "500"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", str(6 * 60 * 60)))  # seconds
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(2 * 1024 * 1024)))  # briefing + history
+
+S = TypeVar("S")
+
+
+class SessionManager(Generic[S]):
+    """Keeps one negotiation session per channel or thread id.
+
+    Sessions are created on first use by `factory(key)` and kept in LRU
+    order. Sessions idle for longer than `idle_ttl` are evicted lazily, and
+    the least recently used one is evicted when `max_sessions` is reached.
+    """
+
+    def __init__(self, factory: Callable[[int], S], max_sessions: int = MAX_SESSIONS,
+                 idle_ttl: float = SESSION_IDLE_TTL,
+                 on_evict: Optional[Callable[[int, S], None]] = None):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.created = 0
+        self.evicted = 0
+        self._sessions: "OrderedDict[int, S]" = OrderedDict()
+        self._last_used: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._sessions
+
+    def get(self, key: int) -> Optional[S]:
+        """Return an existing session and mark it as used"""
+        self._evict_idle()
+        session = self._sessions.get(key)
+        if session is not None:
+            self._touch(key)
+        return session
+
+    def get_or_create(self, key: int) -> S:
+        """Return the session for `key`, creating it if needed"""
+        session = self.get(key)
+        if session is not None:
+            return session
+        while len(self._sessions) >= self.max_sessions:
+            oldest = next(iter(self._sessions))
+            self._evict(oldest, "session limit reached")
+        session = self.factory(key)
+        self._sessions[key] = session
+        self._touch(key)
+        self.created += 1
+        logger.info(f"Created session {key} ({len(self._sessions)} active)")
+        return session
+
+    def items(self) -> List[Tuple[int, S]]:
+        """Live (key, session) pairs, least recently used first"""
+        return list(self._sessions.items())
+
+    def remove(self, key: int) -> None:
+        """End a session explicitly"""
+        if key in self._sessions:
+            self._evict(key, "removed")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "created": self.created,
+            "evicted": self.evicted,
+        }
+
+    def _touch(self, key: int) -> None:
+        self._sessions.move_to_end(key)
+        self._last_used[key] = time.monotonic()
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl
+        # LRU order means the idle sessions are all at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions))
+            if self._last_used[oldest] >= cutoff:
+                break
+            self._evict(oldest, "idle")
+
+    def _evict(self, key: int, reason: str) -> None:
+        session = self._sessions.pop(key)
+        self._last_used.pop(key, None)
+        self.evicted += 1
+        logger.info(f"Evicted session {key} ({reason}, {len(self._sessions)} active)")
+        if self.on_evict is not None:
+            try:
+                self.on_evict(key, session)
+            except Exception as e:
+                logger.error(f"Error cleaning up session {key}: {e}")
+
+
+def negotiation_key(channel: discord.abc.Messageable, briefing_channel_id: int,
+                    negotiation_channel: Optional[discord.TextChannel]) -> Optional[int]:
+    """Map a briefing or negotiation channel to the id its session is keyed by.
+
+    The negotiation channel and its threads are sessions of their own. The
+    briefing channel briefs the negotiation channel's session, and a thread
+    in the briefing channel briefs the negotiation thread with the same name.
+    Returns None for other channels, or a briefing thread with no match.
+    """
+    if negotiation_channel is None:
+        return None
+    if channel.id in (briefing_channel_id, negotiation_channel.id):
+        return negotiation_channel.id if channel.id == briefing_channel_id else channel.id
+    if not isinstance(channel, discord.Thread):
+        return None
+    if channel.parent_id == negotiation_channel.id:
+        return channel.id
+    if channel.parent_id == briefing_channel_id:
+        for thread in negotiation_channel.threads:
+            if thread.name == channel.name:
+                return thread.id
+    return None
@@ -0,0 +1,383 @@
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import logging
+import resource
+import tempfile
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from agent import MistralAgent, STREAM_CURSOR
+from expression_eval import ExpressionError, evaluate
+from gcp_client import GCPClient
+from proof_budget import get_budget
+from proof_cache import ProofCache
+from rate_limit import MistralRateLimiter, set_limiter
+from output_pipeline import OutputPipeline, set_output
+
+logger = logging.getLogger(__name__)
+
+# Headless driver: two MistralAgents negotiate in-process against a scripted
+# LLM and a stub verification server, many negotiations at once.
+#
+#   python simulator.py --negotiations 1000 --turns 10
+
+OFFER_PATH = '["signed_data"].get("data").unwrap().get("offer_amount").unwrap().as_f64().unwrap()'
+REPLIES = [
+    "I have an offer above ${amount:,} with a 30-day close. Can you match that?",
+    "Your number is below what I've been offered. I'd need something closer to ${amount:,}.",
+    "I can move a little, but the offers I hold are over ${amount:,}.",
+    "How about we meet at ${amount:,} and close within 30 days?",
+]
+WELCOME = "Hi! Let's work out a deal!"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (q in 0..100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def _completion(content: str) -> SimpleNamespace:
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class ScriptedMistral:
+    """Stand-in for the Mistral client that answers from templates after a fixed latency"""
+
+    def __init__(self, latency: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.chat = self
+
+    def _respond(self, prompt: str) -> str:
+        if "verification assistant" in prompt:
+            # Claims are mostly true, sometimes unverifiable or false
+            roll = self.rng.random()
+            if roll < 0.2:
+                return ""
+            threshold = 1_000_000.0 if roll < 0.9 else 9_000_000.0
+            return f"json_dicts[0]{OFFER_PATH} > {threshold}"
+        if "running summary" in prompt:
+            return "Both sides hold offers above $1M and are converging on price and a 30-day close."
+        amount = self.rng.randrange(1_000_000, 1_500_000, 5_000)
+        return self.rng.choice(REPLIES).format(amount=amount)
+
+    async def complete_async(self, messages: List[Dict[str, str]], **kwargs) -> SimpleNamespace:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return _completion(self._respond(messages[-1]["content"]))
+
+    async def stream_async(self, messages: List[Dict[str, str]], **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._stream(self._respond(messages[-1]["content"]))
+
+    async def _stream(self, text: str):
+        for start in range(0, len(text), 16):
+            delta = SimpleNamespace(content=text[start:start + 16])
+            yield SimpleNamespace(data=SimpleNamespace(choices=[SimpleNamespace(delta=delta)]))
+            await asyncio.sleep(0)
+
+
+class StubProofServer:
+    """In-memory stand-in for the GCP verification server's job, process and batch routes.
+
+    Conditions are checked with the local evaluator; proofs are placeholders.
+    """
+
+    def __init__(self, latency: float = 0.05, cycles: int = 5_000_000):
+        self.latency = latency
+        self.cycles = cycles
+        self.proofs = 0
+        self.batches = 0
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._ids = itertools.count(1)
+
+    async def handle(self, method: str, url: str, json: Optional[Dict[str, Any]] = None,
+                     params: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        path = urlparse(url).path
+        if method == 'POST' and path.endswith('/jobs'):
+            job_id = str(next(self._ids))
+            self._jobs[job_id] = asyncio.create_task(self._prove(json))
+            return {"job_id": job_id, "status": "running"}
+        if method == 'GET' and '/jobs/' in path:
+            job_id = path.rsplit('/', 1)[1]
+            task = self._jobs[job_id]
+            await asyncio.wait({task}, timeout=float((params or {}).get('wait', 0)))
+            if not task.done():
+                return {"status": "running"}
+            del self._jobs[job_id]
+            return {"status": "done", "result": task.result()}
+        if method == 'POST' and path.endswith('/process_batch'):
+            return {"results": await self._prove_batch(json['claims'])}
+        if method == 'POST' and path.endswith('/process'):
+            return await self._prove(json)
+        raise ValueError(f"stub server has no route {method} {path}")
+
+    def _check(self, payload: Dict[str, Any]) -> List[bool]:
+        results = []
+        for line in payload['verification_file'].splitlines():
+            try:
+                results.append(evaluate(line, payload['json_dicts']))
+            except ExpressionError:
+                results.append(False)
+        return results
+
+    def _result(self, conditions: str, results: List[bool], cycles: int) -> Dict[str, Any]:
+        public_values = {
+            "conditions": conditions,
+            "conditions_verified": bool(results) and all(results),
+            "predicate_results": results,
+            "signature_verified": True,
+            "public_keys": [],
+        }
+        return {"proof": "00", "verification_key": "00", "public_values": json.dumps(public_values),
+                "cycles": cycles}
+
+    async def _prove(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        self.proofs += 1
+        return self._result(payload['verification_file'], self._check(payload), self.cycles)
+
+    async def _prove_batch(self, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        await asyncio.sleep(self.latency)
+        self.batches += 1
+        # Like the server, each claim of a batch is proven on its own
+        return [self._result(claim['verification_file'], self._check(claim), self.cycles)
+                for claim in claims]
+
+
+class StubGCPClient(GCPClient):
+    """GCPClient whose requests are served by a StubProofServer instead of HTTP"""
+
+    def __init__(self, server: StubProofServer, cache_dir: str):
+        super().__init__()
+        self.server = server
+        self.cache = ProofCache(cache_dir=cache_dir)
+
+    async def _request_json(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        return await self.server.handle(method, url, **kwargs)
+
+    async def close(self) -> None:
+        pass
+
+
+class SimUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.bot = True
+
+
+class SimAttachment:
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self.size = len(data)
+        self._data = data
+
+    @classmethod
+    def from_file(cls, file) -> "SimAttachment":
+        data = file.fp.read()
+        if hasattr(file, "close"):
+            file.close()
+        return cls(file.filename, data)
+
+    async def read(self) -> bytes:
+        return self._data
+
+
+class SimChannel:
+    """A channel that records messages; edits are passed to `on_edit`"""
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.sent = 0
+        self.latest: Dict[int, "SimMessage"] = {}  # author id -> their latest message
+        self.on_edit = None
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> "SimMessage":
+        self.sent += 1
+        return SimMessage(self, None, content or "")
+
+
+class SimMessage:
+    _ids = itertools.count(1)
+
+    def __init__(self, channel: SimChannel, author: Optional[SimUser], content: str,
+                 attachments: Optional[List[SimAttachment]] = None, message_id: Optional[int] = None,
+                 replier: Optional[SimUser] = None):
+        self.id = message_id or next(self._ids)
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.attachments = attachments or []
+        self.replier = replier  # the side this copy was delivered to, and who replies to it
+
+    def delivered_to(self, user: SimUser) -> "SimMessage":
+        return SimMessage(self.channel, self.author, self.content, list(self.attachments), self.id, user)
+
+    async def reply(self, content: str) -> "SimMessage":
+        message = SimMessage(self.channel, self.replier, content)
+        self.channel.sent += 1
+        self.channel.latest[self.replier.id] = message
+        return message
+
+    async def edit(self, content: Optional[str] = None, attachments: Optional[list] = None) -> "SimMessage":
+        files = self.attachments if attachments is None else [
+            item if isinstance(item, SimAttachment) else SimAttachment.from_file(item) for item in attachments
+        ]
+        after = SimMessage(self.channel, self.author, self.content if content is None else content,
+                           files, self.id)
+        latest = self.channel.latest.get(getattr(self.author, "id", None))
+        if latest is not None and latest.id == self.id:
+            self.channel.latest[self.author.id] = after
+        if self.channel.on_edit is not None:
+            self.channel.on_edit(self, after)
+        return after
+
+
+def _offer_document(rng: random.Random) -> bytes:
+    offer = {
+        "signed_data": {
+            "signer": rng.choice(["Alice", "Bob", "Charlie", "Diana", "Eve"]),
+            "data": {"offer_amount": rng.randrange(1_100_000, 1_500_000, 1_000), "closing_days": 30},
+        },
+        "signature": "00",
+    }
+    return json.dumps(offer).encode('utf-8')
+
+
+class Simulation:
+    def __init__(self, turns: int, llm: ScriptedMistral, gcp_client: GCPClient, seed: Optional[int] = None):
+        self.turns = turns
+        self.llm = llm
+        self.gcp_client = gcp_client
+        self.rng = random.Random(seed)
+        self.latencies: List[float] = []
+        self.agents: List[MistralAgent] = []
+        self._edit_tasks = set()
+
+    def _agent(self, personality: str, user: SimUser, other: SimUser, channel: SimChannel) -> MistralAgent:
+        agent = MistralAgent(personality_key=personality, bot_id=str(user.id), bot_name=personality,
+                             client=self.llm, gcp_client=self.gcp_client)
+        agent.set_channels(channel.id, channel.id)
+        agent.set_other_bot(str(other.id))
+        self.agents.append(agent)
+        return agent
+
+    async def negotiate(self, index: int) -> None:
+        """Brief two agents and let them exchange `turns` replies"""
+        channel = SimChannel(index)
+        users = [SimUser(2 * index + 1), SimUser(2 * index + 2)]
+        agents = [self._agent("bot1", users[0], users[1], channel),
+                  self._agent("bot2", users[1], users[0], channel)]
+
+        def on_edit(before: SimMessage, after: SimMessage) -> None:
+            # Proofs edited into a reply reach the other side, as on Discord;
+            # streamed replies are delivered by the loop below instead
+            if before.content.endswith(STREAM_CURSOR):
+                return
+            side = 1 if after.author is users[0] else 0
+            task = asyncio.create_task(agents[side].handle_negotiation_edit(
+                before.delivered_to(users[side]), after.delivered_to(users[side])))
+            self._edit_tasks.add(task)
+            task.add_done_callback(self._edit_tasks.discard)
+
+        channel.on_edit = on_edit
+
+        briefing = SimChannel(-index)
+        for agent, user in zip(agents, users):
+            documents = [SimAttachment(f"offer_{i}.json", _offer_document(self.rng)) for i in range(2)]
+            await agent.process_brief(SimMessage(briefing, user, "Sell above $1.2M.", documents))
+
+        agents[0].negotiation_started = True
+        agents[0].add_turn("me", WELCOME)
+        message = SimMessage(channel, users[0], WELCOME)
+        side = 1
+        for _ in range(self.turns):
+            start = time.perf_counter()
+            await agents[side].handle_negotiation_message(message.delivered_to(users[side]))
+            self.latencies.append(time.perf_counter() - start)
+            message = channel.latest[users[side].id]
+            side = 1 - side
+
+        for agent in agents:
+            if agent._background_tasks:
+                await asyncio.gather(*agent._background_tasks, return_exceptions=True)
+
+
+async def simulate(negotiations: int, turns: int, concurrency: int, llm_latency: float,
+                   proof_latency: float, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Run `negotiations` simulated negotiations and report throughput and latency"""
+    set_limiter(MistralRateLimiter(requests_per_second=1e9, tokens_per_minute=10 ** 12))
+    set_output(OutputPipeline(burst=0))
+    server = StubProofServer(latency=proof_latency)
+    cache_dir = tempfile.TemporaryDirectory(prefix="sim_proof_cache_")
+    simulation = Simulation(turns, ScriptedMistral(llm_latency, seed), StubGCPClient(server, cache_dir.name), seed)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int) -> None:
+        async with semaphore:
+            await simulation.negotiate(index)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run(i) for i in range(1, negotiations + 1)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    if simulation._edit_tasks:
+        await asyncio.gather(*simulation._edit_tasks, return_exceptions=True)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cache_dir.cleanup()
+    failures = [r for r in results if isinstance(r, Exception)]
+    for failure in failures[:3]:
+        logger.error(f"Negotiation failed: {failure!r}")
+
+    latencies = simulation.latencies
+    sessions = len(simulation.agents)
+    return {
+        "negotiations": negotiations,
+        "failed": len(failures),
+        "turns": len(latencies),
+        "seconds": round(elapsed, 3),
+        "turns_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "turn_latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 2)
+            for name, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))
+        },
+        "session_state_bytes": sum(a.memory_size() for a in simulation.agents) // max(1, sessions),
+        "rss_kb_per_session": round((rss_after - rss_before) / max(1, sessions), 2),
+        "llm_calls": simulation.llm.calls,
+        "proofs": server.proofs,
+        "proof_batches": server.batches,
+        "proof_budget": get_budget().stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run negotiations headlessly and report throughput")
+    parser.add_argument("--negotiations", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=10, help="replies per negotiation")
+    parser.add_argument("--concurrency", type=int, default=0, help="negotiations in flight (0 = all)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per scripted LLM call")
+    parser.add_argument("--proof-latency", type=float, default=0.05, help="seconds per stub proof")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level)
+    report = asyncio.run(simulate(args.negotiations, args.turns, args.concurrency or args.negotiations,
+                                  args.llm_latency, args.proof_latency, args.seed))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Dict, List
+from metrics import get_metrics, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class TurnPipeline:
+    """Runs the stages of one negotiation turn and records their timings.
+
+    Stages can be awaited in sequence with `run`, overlapped by gathering
+    several `run` calls, or left running in the background with `spawn`.
+    Every stage timing also goes into the process's stage histogram.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._pending: List[str] = []
+        self._start = time.perf_counter()
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """Time the enclosed block as stage `name`"""
+        self._pending.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            self._pending.remove(name)
+            get_metrics().observe(STAGE_SECONDS, self.timings[name], stage=name)
+            logger.debug(f"Stage {name} took {self.timings[name]:.2f}s")
+
+    async def run(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        """Await `awaitable` as stage `name`"""
+        async with self.stage(name):
+            return await awaitable
+
+    def spawn(self, name: str, awaitable: Awaitable[Any]) -> asyncio.Task:
+        """Start stage `name` in the background"""
+        return asyncio.create_task(self.run(name, awaitable))
+
+    def finish(self) -> None:
+        """Record the turn's total time, up to the stages it waited for"""
+        get_metrics().observe(STAGE_SECONDS, self.elapsed, stage="turn")
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def report(self) -> str:
+        """One-line summary of stage timings, e.g. `llm=2.10s send=0.20s total=2.40s`"""
+        parts = [f"{name}={seconds:.2f}s" for name, seconds in self.timings.items()]
+        parts += [f"{name}=pending" for name in self._pending]
+        parts.append(f"total={self.elapsed:.2f}s")
+        return " ".join(parts)